@@ -0,0 +1,42 @@
+"""add normalized_name summoners
+
+Revision ID: 3c1f6a8d92b4
+Revises: f80eab35e57e
+Create Date: 2026-10-17 09:12:44.518203
+
+"""
+from alembic import op
+from sqlalchemy import Column, String
+
+# pylint: skip-file
+
+# revision identifiers, used by Alembic.
+revision = "3c1f6a8d92b4"
+down_revision = "f80eab35e57e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("summoners", Column("normalized_name", String))
+    # Same as utils.utils.normalize_name(); lower case without whitespaces.
+    op.execute(
+        "UPDATE summoners SET normalized_name = lower(replace(summoner_name, ' ', ''))"
+    )
+    # A renamed summoner can leave an older row with the same name; keep the newest.
+    op.execute(
+        """
+        UPDATE summoners AS older SET normalized_name = NULL
+        FROM summoners AS newer
+        WHERE older.normalized_name = newer.normalized_name
+        AND (older.updated_at, older.id) < (newer.updated_at, newer.id)
+        """
+    )
+    op.create_index(
+        "ix_summoners_normalized_name", "summoners", ["normalized_name"], unique=True
+    )
+
+
+def downgrade():
+    op.drop_index("ix_summoners_normalized_name", table_name="summoners")
+    op.drop_column("summoners", "normalized_name")
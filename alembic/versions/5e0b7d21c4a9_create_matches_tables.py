@@ -0,0 +1,84 @@
+"""create matches tables
+
+Revision ID: 5e0b7d21c4a9
+Revises: 3c1f6a8d92b4
+Create Date: 2026-10-17 11:02:31.904117
+
+"""
+import datetime
+from alembic import op
+from sqlalchemy import (
+    Column,
+    Integer,
+    BigInteger,
+    String,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    UniqueConstraint,
+)
+
+# pylint: skip-file
+
+# revision identifiers, used by Alembic.
+revision = "5e0b7d21c4a9"
+down_revision = "3c1f6a8d92b4"
+branch_labels = None
+depends_on = None
+
+
+def timestamps():
+    return [
+        Column("created_at", DateTime, default=datetime.datetime.utcnow),
+        Column(
+            "updated_at",
+            DateTime,
+            default=datetime.datetime.utcnow,
+            onupdate=datetime.datetime.utcnow,
+        ),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        "matches",
+        Column("id", Integer, primary_key=True),
+        Column("match_id", String(30), nullable=False),
+        Column("region", String(20)),
+        Column("game_mode", String(30)),
+        Column("duration", Integer),
+        Column("game_end_timestamp", BigInteger),
+        *timestamps(),
+    )
+    op.create_index("ix_matches_match_id", "matches", ["match_id"], unique=True)
+
+    op.create_table(
+        "match_participants",
+        Column("id", Integer, primary_key=True),
+        Column(
+            "match_id",
+            String(30),
+            ForeignKey("matches.match_id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        Column("puuid", String, nullable=False),
+        Column("summoner_name", String),
+        Column("champion", String(30)),
+        Column("kills", Integer),
+        Column("deaths", Integer),
+        Column("assists", Integer),
+        Column("damage", Integer),
+        Column("win", Boolean),
+        Column("team_id", Integer),
+        *timestamps(),
+        UniqueConstraint("match_id", "puuid"),
+    )
+    op.create_index(
+        "ix_match_participants_match_id", "match_participants", ["match_id"]
+    )
+    op.create_index("ix_match_participants_puuid", "match_participants", ["puuid"])
+
+
+def downgrade():
+    op.drop_table("match_participants")
+    op.drop_table("matches")
@@ -0,0 +1,152 @@
+"""create roster_entries
+
+Move team_members.members JSONB lists into one roster_entries row per
+summoner, and add roster_members view joining them with summoners.
+
+Revision ID: 8d4e2f6a1b37
+Revises: 5e0b7d21c4a9
+Create Date: 2026-10-17 14:20:05.331872
+
+"""
+import datetime
+from alembic import op
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    DateTime,
+    ForeignKey,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+
+# pylint: skip-file
+
+# revision identifiers, used by Alembic.
+revision = "8d4e2f6a1b37"
+down_revision = "5e0b7d21c4a9"
+branch_labels = None
+depends_on = None
+
+# Same as db.models.roster_entries.CREATE_ROSTER_MEMBERS_VIEW at this revision.
+CREATE_ROSTER_MEMBERS_VIEW = """
+CREATE VIEW roster_members AS
+SELECT roster_entries.channel_id, roster_entries.position, roster_entries.roles,
+summoners.puuid, summoners.summoner_name, summoners.summoner_icon_image_url,
+summoners.summoner_level, summoners.tier_division, summoners.tier_rank,
+summoners.solo_win, summoners.solo_loss, summoners.league_points
+FROM roster_entries
+JOIN summoners ON summoners.puuid = roster_entries.puuid
+"""
+
+
+def timestamps():
+    return [
+        Column("created_at", DateTime, default=datetime.datetime.utcnow),
+        Column(
+            "updated_at",
+            DateTime,
+            default=datetime.datetime.utcnow,
+            onupdate=datetime.datetime.utcnow,
+        ),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        "roster_entries",
+        Column("id", Integer, primary_key=True),
+        Column("channel_id", String, nullable=False),
+        Column(
+            "puuid",
+            String,
+            ForeignKey("summoners.puuid", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        Column("position", Integer, nullable=False),
+        Column("roles", JSONB),
+        *timestamps(),
+        UniqueConstraint("channel_id", "puuid"),
+    )
+    op.create_index("ix_roster_entries_channel_id", "roster_entries", ["channel_id"])
+
+    # Members saved before their summoner row existed still need one for the foreign key.
+    # Stats missing from old member dicts default to unranked with no games.
+    op.execute(
+        """
+        INSERT INTO summoners (summoner_name, normalized_name, region, puuid,
+            summoner_icon_image_url, summoner_level, tier_division, tier_rank,
+            solo_win, solo_loss, league_points, created_at, updated_at)
+        SELECT
+            member->>'summoner_name',
+            -- Same as utils.utils.normalize_name(), unless a saved summoner has the
+            -- name or another member has it too; the newest roster's member keeps it.
+            CASE WHEN name_rank = 1 AND NOT EXISTS (
+                SELECT 1 FROM summoners AS taken WHERE taken.normalized_name = member_name
+            ) THEN member_name ELSE NULL END,
+            'na1',
+            member->>'puuid',
+            COALESCE(member->>'summoner_icon_image_url', ''),
+            COALESCE((member->>'summoner_level')::integer, 0),
+            COALESCE(member->>'tier_division', 'UNRANKED'),
+            COALESCE(member->>'tier_rank', 'I'),
+            COALESCE((member->>'solo_win')::integer, 0),
+            COALESCE((member->>'solo_loss')::integer, 0),
+            COALESCE((member->>'league_points')::integer, 0),
+            now(),
+            -- Old timestamp so the rank is refreshed on next lookup.
+            'epoch'::timestamp
+        FROM (
+            SELECT member, member_name,
+                row_number() OVER (
+                    PARTITION BY member_name
+                    ORDER BY saved_at DESC NULLS LAST, member->>'puuid'
+                ) AS name_rank
+            FROM (
+                SELECT DISTINCT ON (member->>'puuid')
+                    member,
+                    lower(replace(member->>'summoner_name', ' ', '')) AS member_name,
+                    team_members.updated_at AS saved_at
+                FROM team_members, jsonb_array_elements(team_members.members) AS member
+                WHERE member->>'puuid' IS NOT NULL
+                ORDER BY member->>'puuid', team_members.updated_at DESC NULLS LAST
+            ) AS unique_members
+        ) AS members
+        ON CONFLICT (puuid) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO roster_entries (channel_id, puuid, position, roles, created_at, updated_at)
+        SELECT team_members.channel_id, member.value->>'puuid', member.ordinality,
+            member.value->'roles', now(), now()
+        FROM team_members,
+            jsonb_array_elements(team_members.members) WITH ORDINALITY AS member
+        WHERE member.value->>'puuid' IS NOT NULL
+        ON CONFLICT (channel_id, puuid) DO NOTHING
+        """
+    )
+    op.execute(CREATE_ROSTER_MEMBERS_VIEW)
+    op.drop_table("team_members")
+
+
+def downgrade():
+    op.create_table(
+        "team_members",
+        Column("id", Integer, primary_key=True),
+        Column("channel_id", String, nullable=False),
+        Column("members", JSONB),
+        *timestamps(),
+    )
+    op.execute(
+        """
+        INSERT INTO team_members (channel_id, members, created_at, updated_at)
+        SELECT channel_id,
+            jsonb_agg(to_jsonb(roster_members) - 'channel_id' - 'position' ORDER BY position),
+            now(), now()
+        FROM roster_members
+        GROUP BY channel_id
+        """
+    )
+    op.execute("DROP VIEW roster_members")
+    op.drop_table("roster_entries")
@@ -0,0 +1,75 @@
+"""match participant positions
+
+Bots all have the puuid 'BOT', so a unique (match_id, puuid) kept one bot
+per match. Participants are now told apart by their position in the match;
+puuid stays indexed for lookups. Saved matches with bots lost some of
+them and are deleted, to be fetched again.
+
+Revision ID: a3f7c1e9b542
+Revises: f6d2b8a4c051
+Create Date: 2026-10-18 14:26:51.903172
+
+"""
+from alembic import op
+from sqlalchemy import Column, Integer
+
+# pylint: skip-file
+
+# revision identifiers, used by Alembic.
+revision = "a3f7c1e9b542"
+down_revision = "f6d2b8a4c051"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Participants cascade.
+    op.execute(
+        """
+        DELETE FROM matches WHERE match_id IN (
+            SELECT match_id FROM match_participants WHERE puuid = 'BOT'
+        )
+        """
+    )
+    op.add_column("match_participants", Column("position", Integer))
+    # Rows were inserted in match order.
+    op.execute(
+        """
+        UPDATE match_participants SET position = numbered.position
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY match_id ORDER BY id) - 1
+                AS position
+            FROM match_participants
+        ) AS numbered
+        WHERE match_participants.id = numbered.id
+        """
+    )
+    op.alter_column("match_participants", "position", nullable=False)
+    op.drop_constraint(
+        "match_participants_match_id_puuid_key", "match_participants", type_="unique"
+    )
+    op.create_unique_constraint(
+        "match_participants_match_id_position_key",
+        "match_participants",
+        ["match_id", "position"],
+    )
+
+
+def downgrade():
+    # Only one bot per match fits the old constraint.
+    op.execute(
+        """
+        DELETE FROM matches WHERE match_id IN (
+            SELECT match_id FROM match_participants WHERE puuid = 'BOT'
+        )
+        """
+    )
+    op.drop_constraint(
+        "match_participants_match_id_position_key", "match_participants", type_="unique"
+    )
+    op.create_unique_constraint(
+        "match_participants_match_id_puuid_key",
+        "match_participants",
+        ["match_id", "puuid"],
+    )
+    op.drop_column("match_participants", "position")
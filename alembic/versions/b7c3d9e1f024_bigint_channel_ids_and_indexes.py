@@ -0,0 +1,74 @@
+"""bigint channel ids and lookup indexes
+
+Discord guild ids don't fit in 32 bits; store channel ids as bigint.
+Index roster_entries.puuid, used by the roster_members join and by
+cascaded deletes from summoners. Lookups by channel use the
+(channel_id, puuid) unique index, so the channel_id index is dropped.
+
+Revision ID: b7c3d9e1f024
+Revises: 8d4e2f6a1b37
+Create Date: 2026-10-17 16:48:19.207731
+
+"""
+from alembic import op
+from sqlalchemy import BigInteger, String
+
+# pylint: skip-file
+
+# revision identifiers, used by Alembic.
+revision = "b7c3d9e1f024"
+down_revision = "8d4e2f6a1b37"
+branch_labels = None
+depends_on = None
+
+# Same as db.models.roster_entries.CREATE_ROSTER_MEMBERS_VIEW at this revision.
+CREATE_ROSTER_MEMBERS_VIEW = """
+CREATE VIEW roster_members AS
+SELECT roster_entries.channel_id, roster_entries.position, roster_entries.roles,
+summoners.puuid, summoners.summoner_name, summoners.summoner_icon_image_url,
+summoners.summoner_level, summoners.tier_division, summoners.tier_rank,
+summoners.solo_win, summoners.solo_loss, summoners.league_points
+FROM roster_entries
+JOIN summoners ON summoners.puuid = roster_entries.puuid
+"""
+
+
+def upgrade():
+    # The view depends on roster_entries.channel_id's type.
+    op.execute("DROP VIEW roster_members")
+    op.alter_column(
+        "roster_entries",
+        "channel_id",
+        type_=BigInteger,
+        postgresql_using="channel_id::bigint",
+    )
+    op.execute(CREATE_ROSTER_MEMBERS_VIEW)
+    op.alter_column(
+        "channels",
+        "channel_id",
+        type_=BigInteger,
+        postgresql_using="channel_id::bigint",
+    )
+
+    op.drop_index("ix_roster_entries_channel_id", table_name="roster_entries")
+    op.create_index("ix_roster_entries_puuid", "roster_entries", ["puuid"])
+
+
+def downgrade():
+    op.drop_index("ix_roster_entries_puuid", table_name="roster_entries")
+    op.create_index("ix_roster_entries_channel_id", "roster_entries", ["channel_id"])
+
+    op.alter_column(
+        "channels",
+        "channel_id",
+        type_=String,
+        postgresql_using="channel_id::text",
+    )
+    op.execute("DROP VIEW roster_members")
+    op.alter_column(
+        "roster_entries",
+        "channel_id",
+        type_=String,
+        postgresql_using="channel_id::text",
+    )
+    op.execute(CREATE_ROSTER_MEMBERS_VIEW)
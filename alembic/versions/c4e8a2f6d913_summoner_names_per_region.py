@@ -0,0 +1,47 @@
+"""summoner names per region
+
+Summoner names are only unique within a platform; the same normalized
+name can belong to summoners of different regions. Replace the unique
+normalized_name index with a unique (region, normalized_name) index, which
+also serves lookups by name from a channel's region.
+
+Revision ID: c4e8a2f6d913
+Revises: b7c3d9e1f024
+Create Date: 2026-10-17 19:02:37.604118
+
+"""
+from alembic import op
+
+# pylint: skip-file
+
+# revision identifiers, used by Alembic.
+revision = "c4e8a2f6d913"
+down_revision = "b7c3d9e1f024"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_index("ix_summoners_normalized_name", table_name="summoners")
+    op.create_index(
+        "ix_summoners_region_normalized_name",
+        "summoners",
+        ["region", "normalized_name"],
+        unique=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_summoners_region_normalized_name", table_name="summoners")
+    # Names taken in more than one region; keep the newest, as before this revision.
+    op.execute(
+        """
+        UPDATE summoners AS older SET normalized_name = NULL
+        FROM summoners AS newer
+        WHERE older.normalized_name = newer.normalized_name
+        AND (older.updated_at, older.id) < (newer.updated_at, newer.id)
+        """
+    )
+    op.create_index(
+        "ix_summoners_normalized_name", "summoners", ["normalized_name"], unique=True
+    )
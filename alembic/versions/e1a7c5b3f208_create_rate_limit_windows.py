@@ -0,0 +1,43 @@
+"""create rate_limit_windows
+
+Riot rate limit windows counted by every bot process sharing the api key.
+
+Revision ID: e1a7c5b3f208
+Revises: c4e8a2f6d913
+Create Date: 2026-10-17 21:14:52.730416
+
+"""
+import datetime
+from alembic import op
+from sqlalchemy import Column, Integer, Float, String, DateTime, UniqueConstraint
+
+# pylint: skip-file
+
+# revision identifiers, used by Alembic.
+revision = "e1a7c5b3f208"
+down_revision = "c4e8a2f6d913"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "rate_limit_windows",
+        Column("id", Integer, primary_key=True),
+        Column("key", String, nullable=False),
+        Column("seconds", Integer, nullable=False),
+        Column("start", Float, nullable=False),
+        Column("count", Integer, nullable=False),
+        Column("created_at", DateTime, default=datetime.datetime.utcnow),
+        Column(
+            "updated_at",
+            DateTime,
+            default=datetime.datetime.utcnow,
+            onupdate=datetime.datetime.utcnow,
+        ),
+        UniqueConstraint("key", "seconds"),
+    )
+
+
+def downgrade():
+    op.drop_table("rate_limit_windows")
@@ -0,0 +1,43 @@
+"""fill missing summoner stats
+
+Summoner rows added for roster members by 8d4e2f6a1b37 could be missing
+stats the old member dicts didn't have. Default them to unranked with no
+games; updated_at is left as is, so they are refreshed on next lookup.
+
+Revision ID: f6d2b8a4c051
+Revises: e1a7c5b3f208
+Create Date: 2026-10-18 10:41:07.215834
+
+"""
+from alembic import op
+
+# pylint: skip-file
+
+# revision identifiers, used by Alembic.
+revision = "f6d2b8a4c051"
+down_revision = "e1a7c5b3f208"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        UPDATE summoners SET
+            summoner_icon_image_url = COALESCE(summoner_icon_image_url, ''),
+            summoner_level = COALESCE(summoner_level, 0),
+            tier_division = COALESCE(tier_division, 'UNRANKED'),
+            tier_rank = COALESCE(tier_rank, 'I'),
+            solo_win = COALESCE(solo_win, 0),
+            solo_loss = COALESCE(solo_loss, 0),
+            league_points = COALESCE(league_points, 0)
+        WHERE summoner_icon_image_url IS NULL OR summoner_level IS NULL
+            OR tier_division IS NULL OR tier_rank IS NULL OR solo_win IS NULL
+            OR solo_loss IS NULL OR league_points IS NULL
+        """
+    )
+
+
+def downgrade():
+    # The defaults can't be told apart from real values.
+    pass
@@ -0,0 +1,142 @@
+"""
+Latency of the lookups the bot runs on every command, with a large table
+
+Fills summoners and roster_entries with '--rows' rows and times
+'check_cached' by region and normalized_name, by puuid, and 'get_roster' by channel.
+Row caches are cleared before each lookup, so every lookup reaches the db.
+'summoner_name scan' filters on an unindexed expression for comparison.
+
+eg; python -m benchmarks.lookups --rows 100000
+Use '--db-url' only with an empty scratch database; tables are dropped at the end.
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+from sqlalchemy import create_engine, select, func
+
+from db.db import Base, async_session_scope, bind_async_engine, create_async_db_engine
+from db.cache import row_caches
+from db.models.summoners import Summoners
+from db.models.roster_entries import RosterEntries, CREATE_ROSTER_MEMBERS_VIEW
+from db.repositories.roster import get_roster
+from riot_api.methods.utils import check_cached
+
+# Players per channel roster
+ROSTER_SIZE = 10
+# Rows inserted per statement
+CHUNK_SIZE = 5000
+
+
+def fill_tables(engine, rows):
+    """Insert 'rows' summoners; every ROSTER_SIZE of them are one channel's roster"""
+    for start in range(0, rows, CHUNK_SIZE):
+        indexes = range(start, min(start + CHUNK_SIZE, rows))
+        engine.execute(
+            Summoners.__table__.insert(),
+            [
+                {
+                    "summoner_name": f"Summoner {index}",
+                    "normalized_name": f"summoner{index}",
+                    "puuid": f"puuid-{index}",
+                    "region": "na1",
+                    "tier_division": "GOLD",
+                    "tier_rank": "I",
+                    "league_points": index % 100,
+                }
+                for index in indexes
+            ],
+        )
+        engine.execute(
+            RosterEntries.__table__.insert(),
+            [
+                {
+                    # Guild ids are snowflakes bigger than 32 bits.
+                    "channel_id": 2**40 + index // ROSTER_SIZE,
+                    "puuid": f"puuid-{index}",
+                    "position": index % ROSTER_SIZE,
+                }
+                for index in indexes
+            ],
+        )
+
+
+async def scan_by_summoner_name(name):
+    """Lookup no index can serve; reads every row"""
+    async with async_session_scope() as session:
+        result = await session.execute(
+            select(Summoners).where(func.lower(Summoners.summoner_name) == name)
+        )
+        return result.scalar_one_or_none()
+
+
+async def time_lookups(lookup, params):
+    """Milliseconds each 'lookup(param)' took"""
+    timings = []
+    for param in params:
+        for row_cache in row_caches.values():
+            row_cache.clear()
+        start = time.perf_counter()
+        await lookup(param)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def run_lookups(rows, count):
+    """Time each lookup 'count' times with random keys"""
+    indexes = [random.randrange(rows) for _ in range(count)]
+    lookups = {
+        "region, normalized_name": lambda index: check_cached(
+            ("na1", f"summoner{index}"),
+            Summoners,
+            (Summoners.region, Summoners.normalized_name),
+        ),
+        "puuid": lambda index: check_cached(
+            f"puuid-{index}", Summoners, Summoners.puuid
+        ),
+        "roster by channel": lambda index: get_roster(2**40 + index // ROSTER_SIZE),
+        "summoner_name scan": lambda index: scan_by_summoner_name(f"summoner {index}"),
+    }
+    print(f"{'lookup':<26}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, lookup in lookups.items():
+        # Scans are slow; fewer of them are enough.
+        params = indexes if not name.endswith("scan") else indexes[:20]
+        timings = sorted(await time_lookups(lookup, params))
+        p95 = timings[int(len(timings) * 0.95)]
+        print(f"{name:<26}{statistics.median(timings):>10.3f}{p95:>10.3f}")
+
+
+def main():
+    """Fill tables, time lookups and drop the tables"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--db-url", default=None)
+    args = parser.parse_args()
+
+    db_url = args.db_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "benchmark.db"
+    )
+    engine = create_engine(db_url)
+    tables = [Summoners.__table__, RosterEntries.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    engine.execute(CREATE_ROSTER_MEMBERS_VIEW)
+    try:
+        start = time.perf_counter()
+        fill_tables(engine, args.rows)
+        print(f"inserted {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+        async_engine = create_async_db_engine(db_url)
+        bind_async_engine(async_engine)
+        asyncio.run(run_lookups(args.rows, args.lookups))
+    finally:
+        engine.execute("DROP VIEW roster_members")
+        Base.metadata.drop_all(engine, tables=tables)
+
+
+if __name__ == "__main__":
+    main()
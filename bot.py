@@ -5,40 +5,51 @@ Bot codes
 
 import os
 import asyncio
-import pydash
+import functools
 
 from dotenv import load_dotenv
 
 # DB
-from sqlalchemy import create_engine
-
 # Discord
 import discord
 from discord.ext import commands
 
-from db.db import bind_engine, Session
-from db.models.team_members import TeamMembers
+from db import repositories
+from db.cache import row_cache_stats
 
 
 # Riot util func.
-# pylint: disable=unused-import
-from riot_api import (
-    get_summoner_rank,
-    previous_match,
-    create_summoner_list,
-    check_cached,
-)
+# Methods are looked up on 'riot_api' when a command runs, so importing bot
+# doesn't load them (or sqlalchemy, through 'repositories').
+import riot_api
+from riot_api import STATIC_DATA_REFRESH_INTERVAL, DEFAULT_REGION
 
 # from riot_api import check_cached
 
 from utils.embed_object import EmbedData
-from utils.utils import create_embed, get_file_path, normalize_name, create_team_string
+from utils.assets import assets
+from utils.utils import (
+    create_embed,
+    get_file_path,
+    normalize_name,
+    create_team_string,
+    create_match_team_string,
+    TypingIndicator,
+    parse_roles,
+    parse_region,
+    parse_shard_ids,
+    parse_team_options,
+)
 from utils.make_teams import make_teams
 from utils.constants import (
     TIER_RANK_MAP,
     MAX_NUM_PLAYERS_TEAM,
+    MAX_NUM_PLAYERS_LOBBY,
+    MAX_TEAM_ALTERNATIVES,
+    ROLES,
     UNCOMMON_TIERS,
     UNCOMMON_TIER_DISPLAY_MAP,
+    REGIONS,
 )
 
 intents = discord.Intents.default()
@@ -50,18 +61,19 @@ load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
 LOCAL_BOT_PREFIX = os.getenv("LOCAL_BOT_PREFIX")
 DB_URL = os.getenv("DB_URL")
+# Shards this process runs (eg. '0-3'); every shard when unset.
+# Processes running different shard ranges need the same SHARD_COUNT.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = parse_shard_ids(os.getenv("SHARD_IDS")) if os.getenv("SHARD_IDS") else None
 
 # differ by env.
-# Connec to DB.
-engine = create_engine(DB_URL)
-bind_engine(engine)
-session = Session()
-
 # ADD help_command attribute to remove default help command
-bot = commands.Bot(
+bot = commands.AutoShardedBot(
     command_prefix=commands.when_mentioned_or(LOCAL_BOT_PREFIX),
     intents=intents,
     help_command=None,
+    shard_count=SHARD_COUNT,
+    shard_ids=SHARD_IDS,
 )
 
 # folder and path for data json
@@ -69,10 +81,42 @@ data_folder_path = get_file_path("data/")
 json_path = data_folder_path + "data.json"
 
 
+async def get_region(ctx):
+    """Riot platform the server picked with 'region' command, or DEFAULT_REGION"""
+    if ctx.guild is None:
+        return DEFAULT_REGION
+    return await repositories.get_channel_region(ctx.guild.id) or DEFAULT_REGION
+
+
+def region_name(region):
+    """Short name of the platform users know (eg. 'EUW' for 'euw1')"""
+    return REGIONS.get(region, region).upper()
+
+
 @bot.event
 async def on_ready():
     """Prints that the bot is connected"""
-    print(f"{bot.user.name} has connected to Discord!")
+    print(f"{bot.user.name} has connected to Discord! Shards: {sorted(bot.shards)}")
+    # Rosters of other processes' guilds are left to them.
+    shards = (bot.shard_ids, bot.shard_count) if SHARD_IDS is not None else None
+
+    try:
+        # Load data dragon data and recently used rosters before the first commands.
+        report = await riot_api.warm_up_caches(shards=shards)
+        print(
+            "Cache warm-up: static data {0}, {1[rosters]} rosters, {1[summoners]} "
+            "summoners in {1[seconds]:.2f}s{2}{3}".format(
+                "loaded" if report["static_data"] else "not loaded",
+                report,
+                " (stopped at time budget)" if report["timed_out"] else "",
+                f" (failed: {report['error']})" if report["error"] else "",
+            )
+        )
+    finally:
+        # Refresh loops run whatever warm-up managed to load; they retry on errors.
+        riot_api.static_data.start_refresh_loop(STATIC_DATA_REFRESH_INTERVAL)
+        # Keep ranks of players in rosters current for 'teams'.
+        riot_api.start_roster_refresher(shards=shards)
 
 
 @bot.event
@@ -94,8 +138,9 @@ async def help_command(ctx):
     try:
         embed_data = EmbedData()
         embed_data.title = f"How to use {bot.user.name}"
+        region = await get_region(ctx)
         embed_data.description = (
-            f"`All Data from NA server`\n\n <@!{bot.user.id}> <command>"
+            f"`All Data from {region_name(region)} server`\n\n <@!{bot.user.id}> <command>"
         )
         embed_data.color = discord.Color.gold()
 
@@ -106,7 +151,7 @@ async def help_command(ctx):
         embed_data.fields.append({"name": "** **", "value": "** **", "inline": False})
 
         for command in bot.commands:
-            if not str(command).startswith("help"):
+            if not str(command).startswith("help") and not command.hidden:
                 embed_data.fields.append(
                     {
                         "name": "** **",
@@ -132,11 +177,10 @@ async def help_command(ctx):
 async def get_rank(ctx, *, name: str):  # using * for get a summoner name with space
     """Sends the summoner's rank information to the bot"""
     try:
-        # typing indicator
-        async with ctx.typing():
-            await asyncio.sleep(1)
-
-        summoner_info = get_summoner_rank(name)
+        # typing indicator, only if the lookup is slow
+        region = await get_region(ctx)
+        async with TypingIndicator(ctx):
+            summoner_info = await riot_api.get_summoner_rank(name, region)
 
         embed_data = EmbedData()
         embed_data.title = "Solo/Duo Rank"
@@ -146,33 +190,26 @@ async def get_rank(ctx, *, name: str):  # using * for get a summoner name with s
         # Add author, thumbnail, fields, and footer to the embed
         embed_data.author = {}
         embed_data.author = {
-            "name": summoner_info["summoner_name"],
+            "name": summoner_info.summoner_name,
             # For op.gg link, we have to remove all whitespace.
-            "url": "https://na.op.gg/summoner/userName={0}".format(
-                summoner_info["summoner_name"].replace(" ", "")
+            "url": "https://{0}.op.gg/summoner/userName={1}".format(
+                REGIONS.get(region, "na"), summoner_info.summoner_name.replace(" ", "")
             ),
-            "icon_url": summoner_info["summoner_icon_image_url"],
+            "icon_url": summoner_info.summoner_icon_image_url,
         }
 
-        # Upload tier image to discord to use it as thumbnail of embed using full path of image.
-        file = discord.File(summoner_info["tier_image_path"])
-
-        # Embed thumbnail image of tier at the side of the embed
-        # Note: This takes the 'file name', not a full path.
-        embed_data.thumbnail = "attachment://{0[tier_image_name]}".format(summoner_info)
-
         # Setting variables for summoner information to display as field
-        summoner_total_game = summoner_info["solo_win"] + summoner_info["solo_loss"]
+        summoner_total_game = summoner_info.solo_win + summoner_info.solo_loss
 
         # Due to zero division error, need to handle situation where total games are zero
         solo_rank_win_percentage = (
             0
             if summoner_total_game == 0
-            else int(summoner_info["solo_win"] / summoner_total_game * 100)
+            else int(summoner_info.solo_win / summoner_total_game * 100)
         )
 
-        embed_data.description = "**{0[tier]}**   {0[league_points]}LP \
-                    \nTotal Games Played: {1}\n{0[solo_win]}W {0[solo_loss]}L {2}%".format(
+        embed_data.description = "**{0.tier}**   {0.league_points}LP \
+                    \nTotal Games Played: {1}\n{0.solo_win}W {0.solo_loss}L {2}%".format(
             summoner_info,
             summoner_total_game,
             solo_rank_win_percentage,
@@ -182,12 +219,13 @@ async def get_rank(ctx, *, name: str):  # using * for get a summoner name with s
         embed_data.fields.append(
             {
                 "name": "** **",
-                "value": "`All Data from NA server`",
+                "value": f"`All Data from {region_name(region)} server`",
                 "inline": False,
             }
         )
 
-        await ctx.send(file=file, embed=create_embed(embed_data))
+        # Tier image is uploaded once and its url reused after.
+        await assets.send_embed(ctx, embed_data, summoner_info.tier_image_name)
 
     except Exception as e_values:
         # 404 error means Data not found in API
@@ -209,7 +247,6 @@ async def get_rank(ctx, *, name: str):  # using * for get a summoner name with s
         await ctx.send(embed=create_embed(embed_data))
 
 
-# TODO: REWORK THIS WITHOUT pd
 @bot.command(
     name="last_match",
     help="Displays the information about the latest game of the summoner.",
@@ -217,26 +254,58 @@ async def get_rank(ctx, *, name: str):  # using * for get a summoner name with s
 async def get_last_match(ctx, *, name: str):
     """Sends the summoner's last match information to the bot"""
     try:
+        # typing indicator, only if the lookup is slow
+        region = await get_region(ctx)
+        async with TypingIndicator(ctx):
+            last_match_info = await riot_api.previous_match(name, region)
 
-        # last_match_info = previous_match(name)
-        embed = discord.Embed(
-            title="last match",
-            description="Under development",
-            color=discord.Color.red(),
+        if last_match_info is None:
+            raise Exception("NO MATCHES")
+
+        player = last_match_info["player"]
+        minutes, seconds = divmod(last_match_info["duration"], 60)
+
+        embed_data = EmbedData()
+        embed_data.title = f"Last match of {player['summoner_name'] if player else name}"
+        embed_data.description = "{0} {1} - {2}:{3:02d}".format(
+            "Victory" if player and player["win"] else "Defeat",
+            last_match_info["game_mode"].capitalize(),
+            minutes,
+            seconds,
         )
-        # dfi.export(last_match_info, "df_styled.png")
-        # file = discord.File("df_styled.png")
-        # embed = discord.Embed()
-        # embed.set_image(url="attachment://df_styled.png")
-        await ctx.send(
-            embed=embed,
-            # file=file
+        embed_data.color = (
+            discord.Color.blue() if player and player["win"] else discord.Color.red()
         )
-        # os.remove("df_styled.png")
+        embed_data.footer = last_match_info["match_id"]
+
+        embed_data.fields = []
+        for team_name, team_id in (
+            ("blue", riot_api.BLUE_TEAM_ID),
+            ("red", riot_api.RED_TEAM_ID),
+        ):
+            team = last_match_info["teams"].get(team_id)
+            if not team:
+                continue
+            embed_data.fields.append(
+                {
+                    "name": "TEAM {0} - {1}".format(
+                        team_name.upper(), "WIN" if team[0]["win"] else "LOSS"
+                    ),
+                    "value": create_match_team_string(
+                        team, player["puuid"] if player else None
+                    ),
+                    "inline": False,
+                }
+            )
+
+        await ctx.send(embed=create_embed(embed_data))
 
     except Exception as e_values:
         # 404 error means Data not found in API
-        if "404" in str(e_values):
+        if str(e_values) == "NO MATCHES":
+            error_title = f'Summoner "{name}" has no matches'
+            error_description = "Play a game and try again!"
+        elif "404" in str(e_values):
             error_title = f'Summoner "{name}" is not found'
             error_description = f"Please check the summoner name agian \n \
               \n __*NOTE*__ :   **{get_last_match.name}** command only accepts one summoner name.\
@@ -261,54 +330,44 @@ async def add_summoner(ctx, *, message):
     json file and sends the list to the bot"""
 
     try:
-        # typing indicator
-        async with ctx.typing():
-            await asyncio.sleep(1)
-
         # converting the message into list of summoners
         # Split by ',' and remove leading/trailling white spaces.
         user_input_names = [x.strip() for x in message.split(",")]
 
         # initializing server id to a variable
-        server_id = str(ctx.guild.id)
+        server_id = ctx.guild.id
 
         # initializing total number of players for counting both incoming and existing summoners
         total_number_of_players = 0
 
         # Grab team member list from db
-        members_list_record_cached = check_cached(
-            server_id, TeamMembers, TeamMembers.channel_id
-        )
+        members = await repositories.get_roster(server_id)
 
         # If we have record;
         # Check # of players that were save in the list.
         # Remove names from user input if we already have the name in record.
-        if members_list_record_cached:
-            # Convert into dict.
-            total_number_of_players += len(
-                members_list_record_cached["dict"]["members"]
-            )
+        if members:
+            total_number_of_players += len(members)
 
-            for member in members_list_record_cached["dict"]["members"]:
-                record_name = member["summoner_name"]
-                name_record_input_match = pydash.find(
-                    user_input_names,
-                    lambda input_name: (input_name == record_name),
-                )
-
-                if name_record_input_match:
-                    user_input_names.remove(name_record_input_match)
+            record_names = {normalize_name(m["summoner_name"]) for m in members}
+            user_input_names = [
+                input_name
+                for input_name in user_input_names
+                if normalize_name(input_name) not in record_names
+            ]
 
         # 'user_input_names' should be filtered with names that we don't have record of.
         total_number_of_players += len(user_input_names)
 
-        # If 'total_number_of_players' will be more than 10, error out.
-        if total_number_of_players > MAX_NUM_PLAYERS_TEAM:
+        # If 'total_number_of_players' will be more than the lobby limit, error out.
+        # Players over 10 sit on the bench when teams are made.
+        if total_number_of_players > MAX_NUM_PLAYERS_LOBBY:
             raise Exception(
                 "Limit Exceeded",
-                "You have exceeded a limit of 10 summoners! \
-                \nPlease add {0} more summoners!".format(
-                    MAX_NUM_PLAYERS_TEAM
+                "You have exceeded a limit of {0} summoners! \
+                \nPlease add {1} more summoners!".format(
+                    MAX_NUM_PLAYERS_LOBBY,
+                    MAX_NUM_PLAYERS_LOBBY
                     - total_number_of_players
                     + len(user_input_names)
                 ),
@@ -320,52 +379,45 @@ async def add_summoner(ctx, *, message):
             return
 
         # make dictionary for newly coming in players
-        new_team_members = create_summoner_list(user_input_names)
-
-        # If we had a db record, update.
-        if members_list_record_cached:
-            # Get original list
-            members_update = members_list_record_cached["dict"]["members"]
-
-            # Append new players
-            for player_list in new_team_members:
-                members_update.append(player_list)
-
-            # Set new member list.
-            # Note; was going to use members_list_record_cached['raw'] to update,
-            # but looks like it doesn't work.
-            member_list_query_result = (
-                session.query(TeamMembers)
-                .filter(TeamMembers.channel_id == server_id)
-                .one_or_none()
+        # Names that failed to look up are reported after adding the valid ones.
+        async with TypingIndicator(ctx):
+            new_team_members, failed_summoners = await riot_api.create_summoner_list(
+                user_input_names, await get_region(ctx)
             )
-            member_list_query_result.members = members_update
 
-            # Update record.
-            # TODO: Simplify this - use base.py - update()
+        # Append new players in one locked update, creating the record if needed.
+        # Players typed differently but already in the list are skipped.
+        if new_team_members:
             try:
-                session.commit()
-            except Exception as e_value:
-                session.rollback()
-                raise e_value
-            finally:
-                session.close()
-        else:
-            # If we don't have a record, create one.
-            members_create_data = []
-            # TODO: No need to group by server_id once we have everything migrated to db.
-            for new_player in new_team_members:
-                members_create_data.append(new_player)
-            create_member = TeamMembers(server_id, members_create_data)
-            create_member.create()
+                await repositories.add_members(
+                    server_id, new_team_members, MAX_NUM_PLAYERS_LOBBY
+                )
+            except repositories.RosterFullError as e_value:
+                # Another 'add' filled the list in the meantime.
+                raise Exception(
+                    "Limit Exceeded",
+                    "You have exceeded a limit of {0} summoners! \
+                    \nPlease add {1} more summoners!".format(
+                        e_value.limit, e_value.available
+                    ),
+                ) from e_value
+
+        if failed_summoners:
+            raise Exception(
+                "Invalid Summoner Name",
+                ", ".join([f"`{name}`" for name in failed_summoners]),
+                failed_summoners,
+            )
 
         # display list of summoners
         await display_current_list_of_summoners(ctx)
 
     except Exception as e_values:
-        if "404" in str(e_values):
-            error_title = "Invalid Summoner Name"
-            error_description = f"`{e_values.args[1]}` is not a valid name. \
+        if "Invalid Summoner Name" in str(e_values):
+            # 404 error means Data not found in API; anything else is a failed lookup.
+            not_found = all("404" in str(e) for e in e_values.args[2].values())
+            error_title = e_values.args[0] if not_found else "Failed to Add Summoner"
+            error_description = f"{e_values.args[1]} could not be added. \
                 \n\nAdding multiple summoners:\n `@{bot.user.name} add name1, name2`"
         elif "Limit Exceeded" in str(e_values):
             error_title = e_values.args[0]
@@ -391,21 +443,19 @@ async def display_current_list_of_summoners(ctx):
     """For displaying current list of summoners"""
     try:
         # server id
-        server_id = str(ctx.guild.id)
+        server_id = ctx.guild.id
 
         total_number_of_players = 0
 
         # Grab team member list from db
-        members_list_record_cached = check_cached(
-            server_id, TeamMembers, TeamMembers.channel_id
-        )
+        members = await repositories.get_roster(server_id)
 
         # If no record, error out.
-        if members_list_record_cached is None:
+        if members is None:
             raise Exception("NO SUMMONERS IN THE LIST")
 
         # If we have record, print
-        total_number_of_players += len(members_list_record_cached["dict"]["members"])
+        total_number_of_players += len(members)
 
         # making embed for list of summoners
         embed_data = EmbedData()
@@ -415,19 +465,23 @@ async def display_current_list_of_summoners(ctx):
 
         # for saving output str
         output_str = ""
-        for member in members_list_record_cached["dict"]["members"]:
+        for member in members:
             output_str += (
-                "`{0}` {1}\n".format(
+                "`{0}` {1}".format(
                     UNCOMMON_TIER_DISPLAY_MAP.get(member["tier_division"]),
                     member["summoner_name"],
                 )
                 if member["tier_division"] in UNCOMMON_TIERS
-                else "`{0}{1}` {2}\n".format(
+                else "`{0}{1}` {2}".format(
                     member["tier_division"][0],
                     TIER_RANK_MAP.get(member["tier_rank"]),
                     member["summoner_name"],
                 )
             )
+            # Roles picked with 'role' command
+            if member.get("roles"):
+                output_str += " ({0})".format(", ".join(member["roles"]))
+            output_str += "\n"
 
         embed_data.fields = []
         embed_data.fields.append(
@@ -446,37 +500,72 @@ async def display_current_list_of_summoners(ctx):
         await ctx.send(embed=create_embed(embed_data))
 
 
-@bot.command(name="teams", help="Display two teams")
-async def display_teams(ctx):
+@bot.command(
+    name="teams",
+    help="Display two teams. Add a number (eg. `teams 2`) to see the next best teams.\n \
+        Keep players together or apart: `teams together name1, name2; apart name3, name4`",
+)
+async def display_teams(ctx, *, options: str = ""):
     """Make and display teams to bot from list of summoners in json"""
     try:
-        # typing indicator
-        async with ctx.typing():
-            await asyncio.sleep(1)
-
         # server id
-        server_id = str(ctx.guild.id)
+        server_id = ctx.guild.id
 
         # Grab team member list from db
-        members_list_record_cached = check_cached(
-            server_id, TeamMembers, TeamMembers.channel_id
-        )
+        members = await repositories.get_roster(server_id)
 
         # If no record, error out.
-        if members_list_record_cached is None:
+        if members is None:
             raise Exception("NO SUMMONERS IN THE LIST")
 
         # Error out if we don't have 10 players
-        if len(members_list_record_cached["dict"]["members"]) != 10:
+        if len(members) < MAX_NUM_PLAYERS_TEAM:
             raise Exception("NOT ENOUGH PLAYERS")
 
-        teams = make_teams(members_list_record_cached["dict"]["members"])
-
-        blue_team = teams[0]
-        red_team = teams[1]
+        try:
+            alternative, together_names, apart_names = parse_team_options(options)
+        except ValueError as e_value:
+            raise Exception(
+                "Invalid Option",
+                f"`{e_value}` is not a valid option.",
+            ) from e_value
+
+        # together/apart names -> puuid pairs
+        puuids = {normalize_name(m["summoner_name"]): m["puuid"] for m in members}
+        pairs = {"together": [], "apart": []}
+        for key, name_pairs in (("together", together_names), ("apart", apart_names)):
+            for name_pair in name_pairs:
+                unmatched = [n for n in name_pair if normalize_name(n) not in puuids]
+                if unmatched:
+                    raise Exception(
+                        "Unregistered Summoner(s)",
+                        "Summoners: {0} were not registered for the game".format(
+                            str(unmatched)
+                        ),
+                    )
+                pairs[key].append(tuple(puuids[normalize_name(n)] for n in name_pair))
+
+        # 'alternative' 1 is the most balanced teams, 2 the next best, ...
+        alternative = min(max(alternative, 1), MAX_TEAM_ALTERNATIVES)
+        try:
+            # Searching 15 player lobbies takes a while; keep the event loop free.
+            teams = await asyncio.get_running_loop().run_in_executor(
+                None,
+                functools.partial(
+                    make_teams,
+                    members,
+                    alternative - 1,
+                    together=pairs["together"],
+                    apart=pairs["apart"],
+                ),
+            )
+        except ValueError as e_value:
+            raise Exception("No Possible Teams", f"{e_value}.") from e_value
 
-        blue_team_output = create_team_string(blue_team)
-        red_team_output = create_team_string(red_team)
+        # Show team members in role order when roles were assigned.
+        if teams.roles:
+            for team in (teams.blue, teams.red):
+                team.sort(key=lambda member: ROLES.index(teams.roles[member["puuid"]]))
 
         for team_name in ["blue", "red"]:
             embed_data = EmbedData()
@@ -485,19 +574,32 @@ async def display_teams(ctx):
             embed_data.color = (
                 discord.Color.blue() if team_name == "blue" else discord.Color.red()
             )
-            file = discord.File(get_file_path(f"images/{team_name}-minion.png"))
-            embed_data.thumbnail = f"attachment://{team_name}-minion.png"
             embed_data.fields = []
             embed_data.fields.append(
                 {
                     "name": "Summoners" + " " * 10,
-                    "value": blue_team_output
-                    if team_name == "blue"
-                    else red_team_output,
+                    "value": create_team_string(
+                        teams.blue if team_name == "blue" else teams.red, teams.roles
+                    ),
                     "inline": True,
                 }
             )
-            await ctx.send(file=file, embed=create_embed(embed_data))
+            await assets.send_embed(ctx, embed_data, f"{team_name}-minion.png")
+
+        # Players that didn't make it into the teams
+        if teams.bench:
+            embed_data = EmbedData()
+            embed_data.title = "BENCH"
+            embed_data.description = "** **"
+            embed_data.color = discord.Color.dark_gray()
+            embed_data.fields = [
+                {
+                    "name": "Summoners" + " " * 10,
+                    "value": create_team_string(teams.bench),
+                    "inline": True,
+                }
+            ]
+            await ctx.send(embed=create_embed(embed_data))
 
     except Exception as e_values:
         if str(e_values) in ["NOT ENOUGH PLAYERS", "NO SUMMONERS IN THE LIST"]:
@@ -505,6 +607,58 @@ async def display_teams(ctx):
             error_description = f"There are not enough players to make teams \
                 \n\nTo add a summoner:\n`@{bot.user.name} add summoner_name` \
                     \n\nAdding multiple summoners:\n `@{bot.user.name} add name1, name2`"
+        elif len(e_values.args) == 2:
+            error_title = e_values.args[0]
+            error_description = e_values.args[1]
+        else:
+            error_title = f"{e_values}"
+            error_description = "Oops! Something went wrong.\nTry again!"
+
+        embed_data = EmbedData()
+        embed_data.title = ":x:   {0}".format(error_title)
+        embed_data.description = "{0}".format(error_description)
+        embed_data.color = discord.Color.red()
+        await ctx.send(embed=create_embed(embed_data))
+
+
+@bot.command(
+    name="role",
+    help="Set roles of a player for teams (eg. `role name: top, jungle`). \
+        Without roles the player can play any role.",
+)
+async def set_summoner_roles(ctx, *, message):
+    """Save role preferences of a summoner in the list"""
+    try:
+        summoner_name, _, roles_input = message.partition(":")
+
+        try:
+            roles = parse_roles(roles_input) if roles_input.strip() else []
+        except ValueError as e_value:
+            raise Exception(
+                "Invalid Role",
+                "`{0}` is not a role. Roles: {1}".format(e_value, ", ".join(ROLES)),
+            ) from e_value
+
+        # initializing server id to a variable
+        server_id = ctx.guild.id
+
+        # Update record in one locked update.
+        members = await repositories.set_member_roles(server_id, summoner_name, roles)
+        if members is None:
+            raise Exception(
+                "Unregistered Summoner(s)",
+                "Summoners: {0} were not registered for the game".format(
+                    str([summoner_name.strip()])
+                ),
+            )
+
+        # display list of summoners
+        await display_current_list_of_summoners(ctx)
+
+    except Exception as e_values:
+        if len(e_values.args) == 2:
+            error_title = e_values.args[0]
+            error_description = e_values.args[1]
         else:
             error_title = f"{e_values}"
             error_description = "Oops! Something went wrong.\nTry again!"
@@ -522,55 +676,34 @@ async def remove_summoner(ctx, *, message):
     and send  the list to the bot"""
 
     try:
-        # typing indicator
-        async with ctx.typing():
-            await asyncio.sleep(1)
-
         # converting the message into list of summoners
         summoner_to_remove_input = [x.strip() for x in message.split(",")]
 
-        # Exception case: attempt to remove more than 10 players
-        if len(summoner_to_remove_input) > MAX_NUM_PLAYERS_TEAM:
+        # Exception case: attempt to remove more players than a lobby can have
+        if len(summoner_to_remove_input) > MAX_NUM_PLAYERS_LOBBY:
             raise Exception(
                 "Limit Exceeded",
-                "You tried to remove more than 10 summoners! \
-                \nPlease remove {0} less summoners or consider using `clear` command".format(
-                    MAX_NUM_PLAYERS_TEAM - len(summoner_to_remove_input)
+                "You tried to remove more than {0} summoners! \
+                \nPlease remove {1} less summoners or consider using `clear` command".format(
+                    MAX_NUM_PLAYERS_LOBBY,
+                    len(summoner_to_remove_input) - MAX_NUM_PLAYERS_LOBBY,
                 ),
             )
         # initializing server id to a variable
-        server_id = str(ctx.guild.id)
+        server_id = ctx.guild.id
 
-        # Grab team member list from db
-        members_list_record_cached = check_cached(
-            server_id, TeamMembers, TeamMembers.channel_id
+        # Remove players in one locked update.
+        members, unmatched_summoner_name = await repositories.remove_members(
+            server_id, summoner_to_remove_input
         )
 
-        # Exception case: data/data.json file does not exist
-        if members_list_record_cached is None:
+        # Exception case: no list for the server
+        if members is None:
             raise Exception(
                 "No summoners added",
                 "There is no summoner(s) added in the game.\nPlease add summoner(s) first!",
             )
 
-        # initializing server id to a variable
-        server_id = str(ctx.guild.id)
-
-        unmatched_summoner_name = []
-        for remove_name in summoner_to_remove_input:
-            # members_list_record_cached["dict"]["members"]:
-            matched_summoner = pydash.find(
-                members_list_record_cached["dict"]["members"],
-                lambda x: normalize_name(x["summoner_name"])
-                == normalize_name(remove_name),
-            )
-
-            if matched_summoner is None:
-                unmatched_summoner_name.append(remove_name)
-                continue
-
-            members_list_record_cached["dict"]["members"].remove(matched_summoner)
-
         if len(unmatched_summoner_name) > 0:
             raise Exception(
                 "Unregistered Summoner(s)",
@@ -579,24 +712,6 @@ async def remove_summoner(ctx, *, message):
                 ),
             )
 
-        member_list_query_result = (
-            session.query(TeamMembers)
-            .filter(TeamMembers.channel_id == server_id)
-            .one_or_none()
-        )
-
-        member_list_query_result.members = members_list_record_cached["dict"]["members"]
-
-        # Update record.
-        # TODO: Simplify this - use base.py - update()
-        try:
-            session.commit()
-        except Exception as e_value:
-            session.rollback()
-            raise e_value
-        finally:
-            session.close()
-
         # display list of summoners
         await display_current_list_of_summoners(ctx)
 
@@ -625,11 +740,9 @@ async def clear_list_of_summoners(ctx):
     """Clear out summoners from the list"""
 
     try:
-        server_id = str(ctx.guild.id)
-        member_list_query_result = (
-            session.query(TeamMembers).filter(TeamMembers.channel_id == server_id).one()
-        )
-        member_list_query_result.delete(session)
+        server_id = ctx.guild.id
+        if not await repositories.clear_members(server_id):
+            raise Exception("NO SUMMONERS IN THE LIST")
 
         # display list of summoners
         await display_current_list_of_summoners(ctx)
@@ -648,6 +761,73 @@ async def clear_list_of_summoners(ctx):
         await display_current_list_of_summoners(ctx)
 
 
+@bot.command(
+    name="region",
+    help="Displays or sets the server's region (eg. euw) used by every command.",
+)
+async def set_region(ctx, *, region: str = ""):
+    """Sets the riot platform the server's commands use"""
+    embed_data = EmbedData()
+    embed_data.color = discord.Color.dark_gray()
+    if not region:
+        embed_data.title = f"Region: {region_name(await get_region(ctx))}"
+        embed_data.description = "Type  `region <region>`  to change it"
+    elif ctx.guild is None:
+        embed_data.title = ":x:   Region can only be set in a server"
+        embed_data.description = "** **"
+        embed_data.color = discord.Color.red()
+    else:
+        try:
+            platform = parse_region(region)
+        except ValueError:
+            embed_data.title = f':x:   Region "{region}" is not found'
+            embed_data.description = "Regions: {0}".format(
+                ", ".join(REGIONS.values())
+            )
+            embed_data.color = discord.Color.red()
+        else:
+            await repositories.set_channel_region(ctx.guild.id, platform)
+            embed_data.title = f"Region set to {region_name(platform)}"
+            embed_data.description = "Summoners are looked up in this region"
+    await ctx.send(embed=create_embed(embed_data))
+
+
+@bot.command(name="stats", hidden=True, help="Display cache and riot api stats")
+async def display_stats(ctx):
+    """Sends row cache hit/miss counters and riot api queue stats"""
+    embed_data = EmbedData()
+    embed_data.title = "Stats"
+    embed_data.description = "** **"
+    embed_data.color = discord.Color.dark_gray()
+
+    embed_data.fields = []
+    for table_name, stats in row_cache_stats().items():
+        embed_data.fields.append(
+            {
+                "name": f"Cache: {table_name}",
+                "value": "{0[hits]} hits / {0[misses]} misses ({1:.0%})\n"
+                "{0[size]}/{0[max_size]} rows".format(stats, stats["hit_rate"]),
+                "inline": True,
+            }
+        )
+
+    # One rate limit (and queue) per platform or regional route.
+    for route, scheduler in riot_api.riot_client.schedulers.items():
+        embed_data.fields.append(
+            {
+                "name": f"Riot API: {route}",
+                "value": "queue: {0[queue_depth]}, in flight: {0[in_flight]}\n"
+                "requests: {0[total_requests]}, retries: {0[total_retries]}\n"
+                "wait avg {0[avg_wait]:.2f}s / max {0[max_wait]:.2f}s".format(
+                    scheduler.stats()
+                ),
+                "inline": False,
+            }
+        )
+
+    await ctx.send(embed=create_embed(embed_data))
+
+
 @bot.event
 async def on_command_error(ctx, error):
     """Checks error and sends error message if exists"""
@@ -665,4 +845,19 @@ async def on_command_error(ctx, error):
         await ctx.send(embed=err_embed)
 
 
-bot.run(TOKEN)
+def main():
+    """Connect to DB and run the bot"""
+    # Async engine so queries don't block the event loop.
+    # Pool settings come from env; see 'db.db'.
+    # pylint: disable=import-outside-toplevel
+    from db.db import bind_async_engine, create_async_db_engine
+
+    engine = create_async_db_engine(DB_URL)
+    bind_async_engine(engine)
+
+    bot.run(TOKEN)
+
+
+# Importing bot (eg. in tests) doesn't connect or run it.
+if __name__ == "__main__":
+    main()
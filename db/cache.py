@@ -0,0 +1,220 @@
+"""
+In-process LRU cache for db rows
+
+Rows that are read on every command (roster by channel, summoners by
+puuid) are kept in memory for 'ROW_CACHE_TTL' seconds so repeated commands
+don't hit postgres. Writes through 'BaseMixin.upsert' (eg. 'upsert_profiles')
+and the roster repository invalidate the cached rows.
+A row read from the db is only stored if none of its keys were invalidated
+while it was read (see 'RowCache.generation'), so a read racing a write
+can't put the old row back.
+"""
+
+import os
+import copy
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+ROW_CACHE_MAX_SIZE = int(os.getenv("ROW_CACHE_MAX_SIZE", "1024"))
+ROW_CACHE_TTL = int(os.getenv("ROW_CACHE_TTL", "300"))
+
+
+class LRUCache:
+    """Bounded least recently used cache whose entries expire after 'ttl' seconds"""
+
+    def __init__(self, max_size=ROW_CACHE_MAX_SIZE, ttl=ROW_CACHE_TTL, clock=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock or time.monotonic
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Get value of key, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= self.clock():
+            if entry is not None:
+                self.invalidate(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value):
+        """Save value of key, evicting the least recently used entry if full"""
+        self._entries[key] = (value, self.clock() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self.invalidate(next(iter(self._entries)))
+
+    def invalidate(self, key):
+        """Remove key"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries"""
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+
+class RowCache(LRUCache):
+    """
+    Cache of one table's rows (as dicts) keyed by 'key_column'.
+    'alias_columns' are other unique columns rows can be looked up by;
+    they map to the key column value. A tuple of columns is a unique index
+    on all of them, looked up with a tuple of values
+    eg; lookup(("region", "normalized_name"), ("na1", "name"))
+    """
+
+    def __init__(self, key_column, alias_columns=(), **kwargs):
+        super().__init__(**kwargs)
+        self.key_column = key_column
+        # column -> {alias value: key}, and key -> [(column, alias value)] to clean up.
+        self.aliases = {column: {} for column in alias_columns}
+        self._row_aliases = {}
+        # Bumped by every invalidation; (column, value) -> its last invalidation.
+        self._generation = 0
+        self._invalidations = OrderedDict()
+        # Newest invalidation no longer in '_invalidations'.
+        self._forgotten = 0
+
+    @staticmethod
+    def alias_value(column, row: dict):
+        """Value of the alias column (or tuple of columns) in row; None if missing"""
+        if isinstance(column, tuple):
+            values = tuple(row.get(part) for part in column)
+            return None if None in values else values
+        return row.get(column)
+
+    def _key(self, column, value):
+        if column == self.key_column:
+            return str(value)
+        if column in self.aliases:
+            return self.aliases[column].get(str(value))
+        return None
+
+    def lookup(self, column, value):
+        """Get copy of the row whose 'column' is 'value'"""
+        key = self._key(column, value)
+        row = self.get(key) if key is not None else None
+        if row is None:
+            if key is None:
+                self.misses += 1
+            return None
+        # Callers modify the rows they get (eg. members list); keep ours intact.
+        return copy.deepcopy(row)
+
+    def generation(self):
+        """Take before reading a row from the db; pass to 'store'"""
+        return self._generation
+
+    def _identities(self, row: dict):
+        identities = [(self.key_column, str(row[self.key_column]))]
+        for column in self.aliases:
+            value = self.alias_value(column, row)
+            if value is not None:
+                identities.append((column, str(value)))
+        return identities
+
+    def changed_since(self, row: dict, generation):
+        """True if the row's key or alias values were invalidated after 'generation'"""
+        if generation < self._forgotten:
+            return True
+        return any(
+            self._invalidations.get(identity, 0) > generation
+            for identity in self._identities(row)
+        )
+
+    def store(self, row: dict, generation=None):
+        """Save row (dict of column values)
+        Rows read from the db pass the 'generation' taken before the read;
+        they are dropped if the row was invalidated in the meantime.
+        Returns True if the row was stored.
+        """
+        if generation is not None and self.changed_since(row, generation):
+            return False
+        key = str(row[self.key_column])
+        self.invalidate(key)
+        row_aliases = []
+        for column, alias in self.aliases.items():
+            value = self.alias_value(column, row)
+            if value is not None:
+                alias[str(value)] = key
+                row_aliases.append((column, str(value)))
+        self._row_aliases[key] = row_aliases
+        self.set(key, copy.deepcopy(row))
+        return True
+
+    def invalidate_by(self, column, value):
+        """Remove the row whose 'column' is 'value'"""
+        self._generation += 1
+        identity = (column, str(value))
+        self._invalidations[identity] = self._generation
+        self._invalidations.move_to_end(identity)
+        while len(self._invalidations) > self.max_size:
+            self._forgotten = self._invalidations.popitem(last=False)[1]
+        key = self._key(column, value)
+        if key is not None:
+            self.invalidate(key)
+
+    def invalidate_row(self, row: dict):
+        """Remove cached rows with the same key or alias values as row"""
+        for column in [self.key_column, *self.aliases]:
+            value = self.alias_value(column, row)
+            if value is not None:
+                self.invalidate_by(column, value)
+
+    def invalidate(self, key):
+        super().invalidate(key)
+        for column, alias_value in self._row_aliases.pop(key, []):
+            if self.aliases[column].get(alias_value) == key:
+                del self.aliases[column][alias_value]
+
+    def clear(self):
+        super().clear()
+        # Reads started before the clear may be stale.
+        self._generation += 1
+        self._forgotten = self._generation
+        self._invalidations.clear()
+        self._row_aliases.clear()
+        for alias in self.aliases.values():
+            alias.clear()
+
+
+# table name -> cache of its rows.
+row_caches = {
+    # channel_id -> {"channel_id", "members": roster member dicts}
+    "roster_entries": RowCache("channel_id"),
+    # puuids are unique across regions; summoner names only within a region.
+    "summoners": RowCache("puuid", alias_columns=(("region", "normalized_name"),)),
+    "channels": RowCache("channel_id"),
+}
+
+
+def get_row_cache(table):
+    """Get cache of the table's model, or None if its rows are not cached"""
+    return row_caches.get(getattr(table, "__tablename__", None))
+
+
+def row_cache_stats():
+    """Hit/miss counters of every row cache"""
+    return {name: row_cache.stats() for name, row_cache in row_caches.items()}
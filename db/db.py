@@ -3,14 +3,104 @@ DB handler
 
 """
 
+import os
+import asyncio
+import contextlib
+from contextvars import ContextVar
+
+from dotenv import load_dotenv
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 
+load_dotenv()
+# Connection pool settings; see README.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
 Base = declarative_base()
-Session = sessionmaker()
+# Sessions of the async engine, so queries don't block the event loop.
+# Rows stay readable after their 'async_session_scope' commits.
+AsyncSessionMaker = sessionmaker(  # pylint: disable=invalid-name
+    class_=AsyncSession, expire_on_commit=False
+)
+
+# (task, session) of the running 'async_session_scope'
+current_async_session = ContextVar("current_async_session", default=None)
+
+# sync driver -> async driver of the same database
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def bind_async_engine(engine):
+    """Init async db connection"""
+    AsyncSessionMaker.configure(bind=engine)
+
+
+def pool_options(db_url):
+    """Engine pool settings from env"""
+    if db_url.startswith("sqlite"):
+        # sqlite has no server connections to pool.
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def to_async_url(db_url):
+    """DB_URL with its async driver (eg. 'postgresql://' -> 'postgresql+asyncpg://')"""
+    scheme, separator, rest = db_url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+
+def create_async_db_engine(db_url, **kwargs):
+    """Create async engine for DB_URL with pool settings from env"""
+    async_url = to_async_url(db_url)
+    return create_async_engine(async_url, **{**pool_options(async_url), **kwargs})
+
+
+def _current_task():
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        # Not in event loop.
+        return None
+
 
+@contextlib.asynccontextmanager
+async def async_session_scope():
+    """
+    Unit of work; commits when the block ends, rolls back on error.
+    Every repository call opens its own scope, so a command uses one short session
+    per call and holds no transaction while it waits on riot api.
+    Scopes opened inside another scope of the same task share its session and
+    commit with it; other tasks always get their own session.
+    eg; async with async_session_scope() as session: await session.execute(query)
+    """
+    task = _current_task()
+    outer = current_async_session.get()
+    if outer is not None and outer[0] is task:
+        yield outer[1]
+        return
 
-def bind_engine(engine):
-    """Init db connection"""
-    Base.metadata.bind = engine
-    Session.configure(bind=engine)
+    session = AsyncSessionMaker()
+    token = current_async_session.set((task, session))
+    try:
+        yield session
+        await session.commit()
+    except Exception as e_values:
+        await session.rollback()
+        raise e_values
+    finally:
+        current_async_session.reset(token)
+        await session.close()
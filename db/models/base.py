@@ -1,8 +1,27 @@
 import datetime
 from sqlalchemy import Column, Integer, DateTime
-from ..db import Session, Base
+from sqlalchemy.dialects import postgresql, sqlite
+from ..db import Base, async_session_scope
+from ..cache import get_row_cache
 
-session = Session()
+# dialect name -> insert supporting 'on_conflict_do_update'
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def create_upsert(table, dialect_name, rows: list, index_elements: list):
+    """INSERT ... ON CONFLICT (index_elements) DO UPDATE of every given column"""
+    statement = UPSERT_INSERTS[dialect_name](table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={
+            column: statement.excluded[column]
+            for column in rows[0]
+            if column not in index_elements and column != "created_at"
+        },
+    )
 
 
 class BaseMixin(Base):
@@ -16,49 +35,39 @@ class BaseMixin(Base):
         DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow
     )
 
-    def create(self, orig_session=session, commit=True):
-        """Create a row in table
-        orig_session will be defaulted to session.
-        """
-        orig_session.add(self)
-        if commit:
-            try:
-                orig_session.commit()
-            except Exception as e_values:
-                orig_session.rollback()
-                raise e_values
-            finally:
-                orig_session.close()
-
-    def delete(self, orig_session=session, commit=True):
-        """
-        Delete a row in table
+    @classmethod
+    def invalidate_cached(cls, rows: list):
+        """Remove cached rows with the same key or alias values as rows (dicts)"""
+        row_cache = get_row_cache(cls)
+        if row_cache is not None:
+            for row in rows:
+                row_cache.invalidate_row(row)
 
-        We need to use the orig_session, the session passed into this function,
-        since the session to query 'to delete' row will still be opened.
+    @classmethod
+    async def upsert(cls, rows: list, index_elements: list, orig_session=None):
+        """Insert rows, or update the rows they conflict with, in one statement
+        Parameters:
+        rows (list): dicts of column values; every dict has the same keys
+        index_elements (list): columns of the unique index rows conflict on
+        orig_session (AsyncSession): if given, the caller commits, and has to
+        'invalidate_cached' the rows again after it did
         """
-        orig_session.delete(self)
-        if commit:
-            try:
-                orig_session.commit()
-            except Exception as e_values:
-                orig_session.rollback()
-                raise e_values
-            finally:
-                orig_session.close()
+        if not rows:
+            return
+        now = datetime.datetime.utcnow()
+        rows = [{**row, "created_at": now, "updated_at": now} for row in rows]
 
-    # TODO: Not working figure out why
-    def update(self, orig_session=session, commit=True):
-        """
-        Update a row in table
-        NOT USED ATM.
-        """
-        orig_session.add(self)
-        if commit:
-            try:
-                orig_session.commit()
-            except Exception as e_values:
-                orig_session.rollback()
-                raise e_values
-            finally:
-                orig_session.close()
+        cls.invalidate_cached(rows)
+        if orig_session is not None:
+            await orig_session.execute(
+                create_upsert(
+                    cls.__table__, orig_session.bind.dialect.name, rows, index_elements
+                )
+            )
+            return
+        async with async_session_scope() as session:
+            await session.execute(
+                create_upsert(cls.__table__, session.bind.dialect.name, rows, index_elements)
+            )
+        # Rows read while the statement ran may be old.
+        cls.invalidate_cached(rows)
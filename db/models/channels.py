@@ -1,17 +1,14 @@
 """channels model mapping"""
-import datetime
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, BigInteger, String
 from ..db import Base
+from .base import BaseMixin
 
 
-class Channels(Base):
+class Channels(BaseMixin, Base):
     """channels model definition"""
 
     __tablename__ = "channels"
 
-    channel_id = Column(Integer, primary_key=True)
+    # Discord guild id; snowflakes need 64 bits.
+    channel_id = Column(BigInteger, nullable=False, unique=True)
     region = Column(String(20))
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    updated_at = Column(
-        DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow
-    )
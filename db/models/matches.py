@@ -0,0 +1,79 @@
+"""
+matches / match_participants model mapping
+
+Finished matches never change, so rows are only inserted; never updated.
+"""
+from sqlalchemy import (
+    Column,
+    Integer,
+    BigInteger,
+    String,
+    Boolean,
+    ForeignKey,
+    UniqueConstraint,
+)
+from ..db import Base
+from .base import BaseMixin
+
+
+class Matches(BaseMixin, Base):
+    """matches model definition"""
+
+    __tablename__ = "matches"
+
+    # match-v5 match id (eg. 'NA1_4000000000')
+    match_id = Column(String(30), nullable=False, index=True, unique=True)
+    region = Column(String(20))
+    game_mode = Column(String(30))
+    # seconds
+    duration = Column(Integer)
+    # milliseconds since epoch
+    game_end_timestamp = Column(BigInteger)
+
+    def __init__(self, match_summary, region="na1"):
+        super().__init__()
+        self.match_id = match_summary["match_id"]
+        self.region = region
+        self.game_mode = match_summary["game_mode"]
+        self.duration = match_summary["duration"]
+        self.game_end_timestamp = match_summary.get("game_end_timestamp")
+
+
+class MatchParticipants(BaseMixin, Base):
+    """match_participants model definition"""
+
+    __tablename__ = "match_participants"
+    # Bots share one puuid; participants are told apart by position in the match.
+    __table_args__ = (UniqueConstraint("match_id", "position"),)
+
+    match_id = Column(
+        String(30),
+        ForeignKey("matches.match_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # Index of the participant in the match (0 to 9 in 5v5)
+    position = Column(Integer, nullable=False)
+    puuid = Column(String, nullable=False, index=True)
+    summoner_name = Column(String)
+    champion = Column(String(30))
+    kills = Column(Integer)
+    deaths = Column(Integer)
+    assists = Column(Integer)
+    damage = Column(Integer)
+    win = Column(Boolean)
+    team_id = Column(Integer)
+
+    def __init__(self, match_id, participant):
+        super().__init__()
+        self.match_id = match_id
+        self.position = participant["position"]
+        self.puuid = participant["puuid"]
+        self.summoner_name = participant["summoner_name"]
+        self.champion = participant["champion"]
+        self.kills = participant["kills"]
+        self.deaths = participant["deaths"]
+        self.assists = participant["assists"]
+        self.damage = participant["damage"]
+        self.win = participant["win"]
+        self.team_id = participant["team_id"]
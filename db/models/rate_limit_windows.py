@@ -0,0 +1,31 @@
+"""
+rate_limit_windows model mapping
+
+Requests counted in one riot rate limit window, shared by every bot
+process using the api key (see 'riot_api.budget.DatabaseBudget').
+"""
+from sqlalchemy import Column, Float, Integer, String, UniqueConstraint
+from ..db import Base
+from .base import BaseMixin
+
+
+class RateLimitWindows(BaseMixin, Base):
+    """rate_limit_windows model definition"""
+
+    __tablename__ = "rate_limit_windows"
+    __table_args__ = (UniqueConstraint("key", "seconds"),)
+
+    # Route, or route and method (eg. 'na1', 'na1:summoner.by_name')
+    key = Column(String, nullable=False)
+    # Length of the window
+    seconds = Column(Integer, nullable=False)
+    # Seconds since epoch the window started at
+    start = Column(Float, nullable=False)
+    count = Column(Integer, nullable=False)
+
+    def __init__(self, key, seconds, start, count=1):
+        super().__init__()
+        self.key = key
+        self.seconds = seconds
+        self.start = start
+        self.count = count
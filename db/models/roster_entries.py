@@ -0,0 +1,81 @@
+"""
+roster_entries model mapping
+
+One row per summoner in a channel's list of players. 'roster_members' view
+joins the rows with 'summoners' to give the member dicts 'make_teams' takes.
+"""
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Integer,
+    String,
+    JSON,
+    MetaData,
+    Table,
+    ForeignKey,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from ..db import Base
+from .base import BaseMixin
+from .summoners import SummonerProfile
+
+
+class RosterEntries(BaseMixin, Base):
+    """roster_entries model definition"""
+
+    __tablename__ = "roster_entries"
+    __table_args__ = (UniqueConstraint("channel_id", "puuid"),)
+
+    # Discord guild id. Lookups by channel use the (channel_id, puuid) unique index.
+    channel_id = Column(BigInteger, nullable=False)
+    # Indexed for the join with 'summoners' and cascaded deletes.
+    puuid = Column(
+        String,
+        ForeignKey("summoners.puuid", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    # Order players were added in; earliest first.
+    position = Column(Integer, nullable=False)
+    # Roles picked with 'role' command; JSONB on postgres, JSON on sqlite.
+    roles = Column(JSON().with_variant(JSONB, "postgresql"))
+
+    def __init__(self, channel_id, puuid, position, roles=None):
+        super().__init__()
+        self.channel_id = channel_id
+        self.puuid = puuid
+        self.position = position
+        self.roles = roles
+
+
+# Summoner columns every roster member has.
+ROSTER_MEMBER_COLUMNS = list(SummonerProfile.__slots__)
+
+# Plain SQL so postgres (migration) and sqlite (tests) create the same view.
+CREATE_ROSTER_MEMBERS_VIEW = """
+CREATE VIEW roster_members AS
+SELECT roster_entries.channel_id, roster_entries.position, roster_entries.roles, {0}
+FROM roster_entries
+JOIN summoners ON summoners.puuid = roster_entries.puuid
+""".format(
+    ", ".join(f"summoners.{column}" for column in ROSTER_MEMBER_COLUMNS)
+)
+
+# The view is created by migration, not by 'Base.metadata'.
+roster_members = Table(
+    "roster_members",
+    MetaData(),
+    Column("channel_id", BigInteger),
+    Column("position", Integer),
+    Column("roles", JSON().with_variant(JSONB, "postgresql")),
+    Column("puuid", String),
+    Column("summoner_name", String),
+    Column("summoner_icon_image_url", String),
+    Column("summoner_level", Integer),
+    Column("tier_division", String(10)),
+    Column("tier_rank", String(10)),
+    Column("solo_win", Integer),
+    Column("solo_loss", Integer),
+    Column("league_points", Integer),
+)
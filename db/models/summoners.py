@@ -2,36 +2,132 @@
 summoners model mapping
 
 """
-from sqlalchemy import Column, Integer, String
-from ..db import Base
+from dataclasses import dataclass
+from sqlalchemy import Column, Integer, String, Index, update
+from utils.utils import get_file_path, normalize_name
+from ..db import Base, async_session_scope
 from .base import BaseMixin
 
 
+@dataclass
+class SummonerProfile:
+    """Rank information about a summoner; returned by 'get_summoner_rank'"""
+
+    __slots__ = (
+        "puuid",
+        "summoner_name",
+        "summoner_icon_image_url",
+        "summoner_level",
+        "tier_division",
+        "tier_rank",
+        "solo_win",
+        "solo_loss",
+        "league_points",
+    )
+
+    puuid: str
+    summoner_name: str
+    summoner_icon_image_url: str
+    summoner_level: int
+    tier_division: str
+    tier_rank: str
+    solo_win: int
+    solo_loss: int
+    league_points: int
+
+    @classmethod
+    def from_row(cls, row: dict):
+        """Profile from 'summoners' column values (eg. 'check_cached' dict)"""
+        return cls(*[row[column] for column in cls.__slots__])
+
+    @property
+    def tier(self):
+        """eg. 'GOLD I'"""
+        return f"{self.tier_division} {self.tier_rank}"
+
+    @property
+    def tier_image_name(self):
+        """File name of the tier emblem in images/"""
+        return f"Emblem_{self.tier_division.capitalize()}.png"
+
+    @property
+    def tier_image_path(self):
+        """Full path of the tier emblem"""
+        return get_file_path(f"images/{self.tier_image_name}")
+
+
 class Summoners(BaseMixin, Base):
     """summoners model definition"""
 
     __tablename__ = "summoners"
+    # Names are unique within a region; the same name can be taken in another one.
+    __table_args__ = (
+        Index(
+            "ix_summoners_region_normalized_name",
+            "region",
+            "normalized_name",
+            unique=True,
+        ),
+    )
 
     summoner_name = Column(String)
+    # Lookup key for summoner names typed by users; see 'normalize_name'.
+    normalized_name = Column(String)
     summoner_icon_image_url = Column(String)
     summoner_level = Column(Integer)
     region = Column(String(20))
-    puuid = Column(String)
+    puuid = Column(String, unique=True)
     tier_division = Column(String(10))
     tier_rank = Column(String(10))
     solo_win = Column(Integer)
     solo_loss = Column(Integer)
     league_points = Column(Integer)
 
-    def __init__(self, summoner_data):
+    def __init__(self, summoner_profile: SummonerProfile, region: str):
         super().__init__()
-        self.summoner_name = summoner_data["summoner_name"]
-        self.summoner_icon_image_url = (summoner_data["summoner_icon_image_url"],)
-        self.summoner_level = (summoner_data["summoner_level"],)
-        self.region = ("na1",)
-        self.puuid = (summoner_data["puuid"],)
-        self.tier_division = (summoner_data["tier_division"],)
-        self.tier_rank = (summoner_data["tier_rank"],)
-        self.solo_win = (summoner_data["solo_win"],)
-        self.solo_loss = (summoner_data["solo_loss"],)
-        self.league_points = (summoner_data["league_points"],)
+        for column, value in self.record_values(summoner_profile, region).items():
+            setattr(self, column, value)
+
+    @staticmethod
+    def record_values(summoner_profile: SummonerProfile, region: str):
+        """Column values of a summoner profile of a platform (eg. 'na1')"""
+        values = {
+            column: getattr(summoner_profile, column)
+            for column in SummonerProfile.__slots__
+        }
+        values["normalized_name"] = normalize_name(summoner_profile.summoner_name)
+        values["region"] = region
+        return values
+
+    @classmethod
+    async def upsert_profiles(cls, summoner_profiles: list, region: str):
+        """
+        Save summoner profiles of the region in one transaction and one insert statement.
+        Summoners we have a row of (same puuid) are updated, so concurrent
+        lookups of a new summoner can't add it twice.
+        """
+        # One statement can't update the same row twice; keep the last profile.
+        rows = list(
+            {
+                profile.puuid: cls.record_values(profile, region)
+                for profile in summoner_profiles
+            }.values()
+        )
+        if not rows:
+            return
+
+        async with async_session_scope() as session:
+            # Summoners renamed since we saved them may still hold one of the names.
+            await session.execute(
+                update(cls)
+                .where(
+                    cls.region == region,
+                    cls.normalized_name.in_([row["normalized_name"] for row in rows]),
+                    cls.puuid.notin_([row["puuid"] for row in rows]),
+                )
+                .values(normalized_name=None)
+                .execution_options(synchronize_session=False)
+            )
+            await cls.upsert(rows, ["puuid"], session)
+        # Rows read before the commit may be old.
+        cls.invalidate_cached(rows)
@@ -0,0 +1,45 @@
+"""
+Queries of the bot's tables, grouped by table
+
+Repository functions (eg. 'get_roster') are loaded, with sqlalchemy, on
+first use, so importing this package alone doesn't load them.
+"""
+
+
+import importlib
+from typing import TYPE_CHECKING
+
+# name -> submodule defining it
+EXPORTS = {
+    "RosterFullError": "roster",
+    "get_roster": "roster",
+    "add_members": "roster",
+    "remove_members": "roster",
+    "set_member_roles": "roster",
+    "clear_members": "roster",
+    "get_channel_region": "channels",
+    "set_channel_region": "channels",
+}
+
+
+def __getattr__(name):
+    """Load a repository function the first time it is used"""
+    if name not in EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(f".{EXPORTS[name]}", __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+if TYPE_CHECKING:
+    # What '__getattr__' gives, for linters and type checkers.
+    from .roster import (
+        RosterFullError,
+        get_roster,
+        add_members,
+        remove_members,
+        set_member_roles,
+        clear_members,
+    )
+    from .channels import get_channel_region, set_channel_region
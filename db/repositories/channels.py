@@ -0,0 +1,37 @@
+"""
+Channels repository
+
+Settings of a discord server (eg. the riot platform its commands use).
+Every command reads them, so they are kept in the 'channels' row cache;
+servers without a row are cached too, with the settings unset.
+"""
+from sqlalchemy import select
+
+from ..db import async_session_scope
+from ..cache import get_row_cache
+from ..models.channels import Channels
+
+
+async def get_channel_region(channel_id):
+    """Riot platform (eg. 'euw1') the channel picked; None if it hasn't"""
+    row_cache = get_row_cache(Channels)
+    row = row_cache.lookup("channel_id", channel_id)
+    if row is None:
+        generation = row_cache.generation()
+        async with async_session_scope() as session:
+            region = (
+                await session.execute(
+                    select(Channels.region).where(Channels.channel_id == channel_id)
+                )
+            ).scalar_one_or_none()
+        row = {"channel_id": channel_id, "region": region}
+        row_cache.store(row, generation)
+    return row["region"]
+
+
+async def set_channel_region(channel_id, region: str):
+    """Save the riot platform the channel's commands use"""
+    # 'upsert' drops the cached row.
+    await Channels.upsert(
+        [{"channel_id": channel_id, "region": region}], ["channel_id"]
+    )
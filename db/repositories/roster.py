@@ -0,0 +1,323 @@
+"""
+Roster repository
+
+A channel's list of players is stored as 'roster_entries' rows, so dedup
+(unique channel_id, puuid) and removal are index lookups in the database.
+Every change runs in one transaction holding a per-channel lock, so
+concurrent commands in one channel can't lose each other's changes.
+Each function returns the new roster as member dicts (see 'roster_members').
+"""
+from sqlalchemy import select, delete, update, func, text
+
+from utils.utils import normalize_name
+
+from ..db import async_session_scope
+from ..cache import get_row_cache
+from ..models.roster_entries import RosterEntries, roster_members, ROSTER_MEMBER_COLUMNS
+from ..models.summoners import Summoners
+
+
+class RosterFullError(Exception):
+    """Adding members would go over the roster limit"""
+
+    def __init__(self, limit, available):
+        self.limit = limit
+        self.available = available
+        super().__init__(f"Roster limit of {limit} exceeded; {available} left")
+
+
+async def lock_roster(session, channel_id):
+    """Hold the channel's roster lock until 'session' commits (postgres only)"""
+    if session.bind.dialect.name == "postgresql":
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock(:channel_id)"),
+            {"channel_id": channel_id},
+        )
+
+
+def shard_filter(channel_id_column, shards):
+    """Where clauses keeping channels (guilds) of 'shards'
+    Parameters:
+    channel_id_column (Column): discord guild id column
+    shards (tuple): (shard ids, shard count) of this process; None for every shard
+    """
+    if shards is None:
+        return []
+    shard_ids, shard_count = shards
+    # Discord puts a guild on shard (guild_id >> 22) % shard_count.
+    return [(channel_id_column.op(">>")(22) % shard_count).in_(shard_ids)]
+
+
+def invalidate_roster(channel_id):
+    """Remove cached roster of the channel"""
+    get_row_cache(RosterEntries).invalidate_by("channel_id", channel_id)
+
+
+async def invalidate_rosters_of(puuids: list):
+    """Remove cached rosters the summoners are in, eg. after their ranks changed"""
+    if not puuids:
+        return
+    async with async_session_scope() as session:
+        channel_ids = (
+            await session.execute(
+                select(RosterEntries.channel_id)
+                .where(RosterEntries.puuid.in_(puuids))
+                .distinct()
+            )
+        ).scalars().all()
+    for channel_id in channel_ids:
+        invalidate_roster(channel_id)
+
+
+async def load_roster(session, channel_id):
+    """Member dicts of the channel's roster, earliest added first"""
+    result = await session.execute(
+        select(roster_members)
+        .where(roster_members.c.channel_id == channel_id)
+        .order_by(roster_members.c.position)
+    )
+    return [create_member(row) for row in result.mappings()]
+
+
+def create_member(row):
+    """Member dict from a 'roster_members' row"""
+    member = {column: row[column] for column in ROSTER_MEMBER_COLUMNS}
+    member["roles"] = row["roles"] or []
+    return member
+
+
+async def get_roster(channel_id):
+    """Get the channel's roster
+    Parameters:
+    channel_id (int): server id
+
+    Returns:
+    members (list): member dicts, earliest added first; None if there are none
+
+    """
+    row_cache = get_row_cache(RosterEntries)
+    cached = row_cache.lookup("channel_id", channel_id)
+    if cached is None:
+        generation = row_cache.generation()
+        async with async_session_scope() as session:
+            cached = {
+                "channel_id": channel_id,
+                "members": await load_roster(session, channel_id),
+            }
+        row_cache.store(cached, generation)
+    return cached["members"] or None
+
+
+async def cache_recent_rosters(limit: int, shards=None):
+    """Load rosters changed most recently into the roster cache
+    Parameters:
+    limit (int): max number of rosters
+    shards (tuple): only load rosters of these shards; see 'shard_filter'
+
+    Returns:
+    rosters (dict): channel id -> member dicts of the loaded rosters
+
+    """
+    row_cache = get_row_cache(RosterEntries)
+    generation = row_cache.generation()
+    async with async_session_scope() as session:
+        channel_ids = (
+            await session.execute(
+                select(RosterEntries.channel_id)
+                .where(*shard_filter(RosterEntries.channel_id, shards))
+                .group_by(RosterEntries.channel_id)
+                .order_by(func.max(RosterEntries.updated_at).desc())
+                .limit(limit)
+            )
+        ).scalars().all()
+        result = await session.execute(
+            select(roster_members)
+            .where(roster_members.c.channel_id.in_(channel_ids))
+            .order_by(roster_members.c.channel_id, roster_members.c.position)
+        )
+        rosters = {channel_id: [] for channel_id in channel_ids}
+        for row in result.mappings():
+            rosters[row["channel_id"]].append(create_member(row))
+
+    for channel_id, members in rosters.items():
+        row_cache.store({"channel_id": channel_id, "members": members}, generation)
+    return rosters
+
+
+async def find_stale_members(active_since, updated_before, limit: int, shards=None):
+    """Find members of active rosters whose summoner rows are old
+    Parameters:
+    active_since (datetime): rosters changed since then are active
+    updated_before (datetime): summoner rows updated before then are old
+    limit (int): max number of summoners, oldest first
+    shards (tuple): only rosters of these shards are active; see 'shard_filter'
+
+    Returns:
+    members (dict): puuid -> {'region', 'channel_ids'} of the summoner, with the
+    ids of the active channels it is in
+
+    """
+    active_channels = (
+        select(RosterEntries.channel_id)
+        .where(*shard_filter(RosterEntries.channel_id, shards))
+        .group_by(RosterEntries.channel_id)
+        .having(func.max(RosterEntries.updated_at) >= active_since)
+    )
+    async with async_session_scope() as session:
+        stale_puuids = (
+            select(Summoners.puuid)
+            .join(RosterEntries, RosterEntries.puuid == Summoners.puuid)
+            .where(
+                RosterEntries.channel_id.in_(active_channels),
+                Summoners.updated_at < updated_before,
+            )
+            .group_by(Summoners.puuid, Summoners.updated_at)
+            .order_by(Summoners.updated_at)
+            .limit(limit)
+        )
+        result = await session.execute(
+            select(RosterEntries.puuid, Summoners.region, RosterEntries.channel_id)
+            .join(Summoners, Summoners.puuid == RosterEntries.puuid)
+            .where(
+                RosterEntries.puuid.in_(stale_puuids),
+                RosterEntries.channel_id.in_(active_channels),
+            )
+        )
+        members = {}
+        for puuid, region, channel_id in result:
+            member = members.setdefault(
+                puuid, {"region": region, "channel_ids": set()}
+            )
+            member["channel_ids"].add(channel_id)
+    return members
+
+
+async def find_puuids(session, channel_id, names: list):
+    """normalized name -> puuid of roster members matching 'names'"""
+    result = await session.execute(
+        select(Summoners.normalized_name, RosterEntries.puuid)
+        .join(Summoners, Summoners.puuid == RosterEntries.puuid)
+        .where(
+            RosterEntries.channel_id == channel_id,
+            Summoners.normalized_name.in_([normalize_name(name) for name in names]),
+        )
+    )
+    return dict(result.all())
+
+
+async def add_members(channel_id, new_members: list, limit=None):
+    """Append members to the roster
+    Parameters:
+    channel_id (int): server id
+    new_members (list): 'SummonerProfile's saved in 'summoners'; ones already
+    in the roster are skipped
+    limit (int): max number of members; raises 'RosterFullError' when exceeded
+
+    Returns:
+    members (list): new roster
+
+    """
+    async with async_session_scope() as session:
+        await lock_roster(session, channel_id)
+        new_puuids = list(dict.fromkeys(member.puuid for member in new_members))
+        existing = set(
+            (
+                await session.execute(
+                    select(RosterEntries.puuid).where(
+                        RosterEntries.channel_id == channel_id,
+                        RosterEntries.puuid.in_(new_puuids),
+                    )
+                )
+            ).scalars()
+        )
+        count, last_position = (
+            await session.execute(
+                select(
+                    func.count(RosterEntries.id), func.max(RosterEntries.position)
+                ).where(RosterEntries.channel_id == channel_id)
+            )
+        ).one()
+
+        added = [puuid for puuid in new_puuids if puuid not in existing]
+        if limit is not None and count + len(added) > limit:
+            raise RosterFullError(limit, limit - count)
+
+        position = last_position or 0
+        for puuid in added:
+            position += 1
+            session.add(RosterEntries(channel_id, puuid, position))
+        await session.flush()
+        members = await load_roster(session, channel_id)
+    invalidate_roster(channel_id)
+    return members
+
+
+async def remove_members(channel_id, names: list):
+    """Remove members by summoner name
+    Parameters:
+    channel_id (int): server id
+    names (list): summoner names typed by users
+
+    Returns:
+    members (list): new roster, or None if the channel has no roster
+    unmatched (list): names that are not in the roster
+
+    """
+    async with async_session_scope() as session:
+        await lock_roster(session, channel_id)
+        puuids = await find_puuids(session, channel_id, names)
+        unmatched = [name for name in names if normalize_name(name) not in puuids]
+
+        # Nothing is removed if any name is wrong.
+        if not unmatched:
+            await session.execute(
+                delete(RosterEntries).where(
+                    RosterEntries.channel_id == channel_id,
+                    RosterEntries.puuid.in_(list(puuids.values())),
+                )
+            )
+        members = await load_roster(session, channel_id)
+    invalidate_roster(channel_id)
+    if not members and unmatched:
+        # Channel has no roster.
+        return None, list(names)
+    return members, unmatched
+
+
+async def set_member_roles(channel_id, name: str, roles: list):
+    """Set role preferences of a member
+    Parameters:
+    channel_id (int): server id
+    name (str): summoner name typed by user
+    roles (list): roles from 'ROLES'; empty for any role
+
+    Returns:
+    members (list): new roster, or None if the member is not in the roster
+
+    """
+    async with async_session_scope() as session:
+        puuids = await find_puuids(session, channel_id, [name])
+        if not puuids:
+            return None
+
+        await session.execute(
+            update(RosterEntries)
+            .where(
+                RosterEntries.channel_id == channel_id,
+                RosterEntries.puuid == puuids[normalize_name(name)],
+            )
+            .values(roles=roles)
+        )
+        members = await load_roster(session, channel_id)
+    invalidate_roster(channel_id)
+    return members
+
+
+async def clear_members(channel_id):
+    """Delete the roster of the channel. Returns False if there was none."""
+    async with async_session_scope() as session:
+        result = await session.execute(
+            delete(RosterEntries).where(RosterEntries.channel_id == channel_id)
+        )
+    invalidate_roster(channel_id)
+    return result.rowcount > 0
@@ -1,24 +1,113 @@
 """
 Data processing the data from riot API
+
+Shared clients are built, and methods (eg. 'get_summoner_rank') with their
+db dependencies are loaded, on first use; importing 'riot_api.client'
+alone doesn't load them.
 """
 
 
 import os
-from riotwatcher import LolWatcher
+import importlib
+from typing import TYPE_CHECKING
 
 from dotenv import load_dotenv
 
 
-from db.db import Session
-
+from .client import RiotClient, ApiError
 
-session = Session()
 
 load_dotenv()
 RIOTAPIKEY = os.getenv("RIOT_API_KEY")
 
-watcher = LolWatcher(RIOTAPIKEY)
-MY_REGION = "na1"
+# Platform of channels that haven't picked one with the 'region' command;
+# data dragon static data is the same everywhere and read from this platform too.
+DEFAULT_REGION = os.getenv("DEFAULT_REGION", "na1")
+
+# Seconds a saved summoner rank is served before it is refreshed in the background.
+SUMMONER_CACHE_TTL = int(os.getenv("SUMMONER_CACHE_TTL", "1800"))
+
+# Data dragon versions/champions; loaded on start and refreshed every interval.
+STATIC_DATA_REFRESH_INTERVAL = int(os.getenv("STATIC_DATA_REFRESH_INTERVAL", "21600"))
+
+# Rosters (and their summoners) loaded into memory on start, within a time budget.
+WARM_UP_ROSTERS = int(os.getenv("WARM_UP_ROSTERS", "50"))
+WARM_UP_TIME_BUDGET = float(os.getenv("WARM_UP_TIME_BUDGET", "10"))
+
+# Summoners of rosters changed within the window are refreshed in the background,
+# a batch every interval.
+ROSTER_REFRESH_INTERVAL = int(os.getenv("ROSTER_REFRESH_INTERVAL", "60"))
+ROSTER_REFRESH_BATCH = int(os.getenv("ROSTER_REFRESH_BATCH", "10"))
+ROSTER_ACTIVE_WINDOW = int(os.getenv("ROSTER_ACTIVE_WINDOW", "86400"))
+
+# Where processes sharing the api key count their requests; see 'RATE_LIMIT_BACKENDS'.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "local")
+
+
+def create_database_budget():
+    """Rate limit budget counted in the database every process uses"""
+    # pylint: disable=import-outside-toplevel
+    from .budget import DatabaseBudget
+
+    return DatabaseBudget()
+
+
+# RATE_LIMIT_BACKEND -> function building the shared budget;
+# 'local' is for a single process, which only needs its own limits.
+RATE_LIMIT_BACKENDS = {
+    "local": lambda: None,
+    "database": create_database_budget,
+}
+
+
+def create_riot_client():
+    """Client shared by every method"""
+    return RiotClient(RIOTAPIKEY, budget=RATE_LIMIT_BACKENDS[RATE_LIMIT_BACKEND]())
+
+
+def create_static_data():
+    """Data dragon store shared by every method"""
+    # pylint: disable=import-outside-toplevel
+    from .static_data import StaticDataStore
+
+    return StaticDataStore(get_shared("riot_client"), DEFAULT_REGION)
+
+
+# name -> function building the shared object
+SHARED_OBJECTS = {
+    "riot_client": create_riot_client,
+    "static_data": create_static_data,
+}
+
+
+def get_shared(name):
+    """Shared object of 'SHARED_OBJECTS', built once"""
+    if name not in globals():
+        globals()[name] = SHARED_OBJECTS[name]()
+    return globals()[name]
+
+
+def __getattr__(name):
+    """Build 'riot_client'/'static_data' or load a method the first time it is used"""
+    if name in SHARED_OBJECTS:
+        return get_shared(name)
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    methods = importlib.import_module(".methods", __name__)
+    try:
+        value = getattr(methods, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = value
+    return value
+
+
+if TYPE_CHECKING:
+    # What '__getattr__' gives, for linters and type checkers.
+    # pylint: disable=wildcard-import,unused-wildcard-import
+    from .methods import *
+    from .static_data import StaticDataStore
 
-# pylint: disable=wrong-import-position
-from .methods import *
+    riot_client = create_riot_client()
+    static_data = StaticDataStore(riot_client, DEFAULT_REGION)
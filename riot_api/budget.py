@@ -0,0 +1,94 @@
+"""
+Rate limit budget shared through the database
+
+Every bot process (eg. one per range of discord shards) counts the requests
+it sends in 'rate_limit_windows', so together they stay under the limits of
+the one riot api key. Rows of a request's windows are locked while they are
+checked, and counted with updates that only apply to the window as it was
+read and not yet full, so two processes can't take the last request of a
+window even where rows can't be locked (sqlite).
+"""
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from db.db import async_session_scope
+from db.models.rate_limit_windows import RateLimitWindows
+
+from .scheduler import SharedBudget
+
+# Seconds to wait when another process created or counted a window we were counting.
+CONFLICT_WAIT = 0.01
+
+
+class WindowChanged(Exception):
+    """Another process counted a window between our read and our update"""
+
+
+class DatabaseBudget(SharedBudget):
+    """
+    'SharedBudget' counted in 'rate_limit_windows'.
+    Window starts are wall clock times so every process on the host agrees on them.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+
+    async def reserve(self, buckets: list):
+        windows = [
+            (key, limit, seconds) for key, limits in buckets for limit, seconds in limits
+        ]
+        if not windows:
+            return 0
+        try:
+            async with async_session_scope() as session:
+                return await self._reserve(session, windows, self.clock())
+        except (IntegrityError, WindowChanged):
+            # Another process got to a window first; count it again.
+            return CONFLICT_WAIT
+
+    @staticmethod
+    async def _reserve(session, windows, now):
+        # Same lock order in every process, so they can't deadlock.
+        result = await session.execute(
+            select(RateLimitWindows)
+            .where(RateLimitWindows.key.in_({key for key, _, _ in windows}))
+            .order_by(RateLimitWindows.key, RateLimitWindows.seconds)
+            .with_for_update()
+        )
+        rows = {(row.key, row.seconds): row for row in result.scalars()}
+
+        wait = 0
+        for key, limit, seconds in windows:
+            row = rows.get((key, seconds))
+            if row is not None and now < row.start + seconds and row.count >= limit:
+                wait = max(wait, row.start + seconds - now)
+        if wait > 0:
+            return wait
+
+        for key, limit, seconds in windows:
+            row = rows.get((key, seconds))
+            if row is None:
+                session.add(RateLimitWindows(key, seconds, now))
+                continue
+            # Only the window as we read it; another process may have moved it on.
+            query = update(RateLimitWindows).where(
+                RateLimitWindows.key == key,
+                RateLimitWindows.seconds == seconds,
+                RateLimitWindows.start == row.start,
+            )
+            if now >= row.start + seconds:
+                query = query.values(start=now, count=1)
+            else:
+                query = query.where(RateLimitWindows.count < limit).values(
+                    count=RateLimitWindows.count + 1
+                )
+            result = await session.execute(
+                query.execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                # Rolls back the windows already counted.
+                raise WindowChanged()
+        await session.flush()
+        return 0
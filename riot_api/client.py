@@ -0,0 +1,231 @@
+"""
+Asyncio-native Riot API client
+
+All riot api calls go through 'RiotClient' so that a slow response never
+blocks the discord event loop. The HTTP layer is a 'Transport' object which
+can be swapped out (eg. with a fake one in unit tests).
+Requests using the api key are queued in a 'RequestScheduler' to stay under
+riot's rate limits. Riot counts rate limits per platform (eg. 'na1') and per
+regional routing value (eg. 'americas'), so each has its own scheduler and a
+busy region can't use up another region's limit.
+"""
+
+import json
+from collections import namedtuple
+from urllib.parse import quote
+
+from .scheduler import RequestScheduler, PRIORITY_INTERACTIVE
+
+PLATFORM_URL = "https://{region}.api.riotgames.com"
+# match-v5 is served from regional routing values instead of platforms.
+REGIONAL_URL = "https://{routing}.api.riotgames.com"
+DATA_DRAGON_URL = "https://ddragon.leagueoflegends.com"
+
+# Response returned by every transport.
+# status (int), headers (dict), body (parsed json, or None)
+Response = namedtuple("Response", ["status", "headers", "body"])
+
+
+# platform (eg. 'na1') -> regional routing value of match-v5
+REGIONAL_ROUTING = {
+    "na1": "americas",
+    "br1": "americas",
+    "la1": "americas",
+    "la2": "americas",
+    "kr": "asia",
+    "jp1": "asia",
+    "eun1": "europe",
+    "euw1": "europe",
+    "tr1": "europe",
+    "ru": "europe",
+    "oc1": "sea",
+}
+
+
+class ApiError(Exception):
+    """
+    Error returned from riot api.
+    Message keeps the status code in it so '"404" in str(error)' checks still work.
+    """
+
+    def __init__(self, status_code, url, headers=None):
+        self.status_code = status_code
+        self.url = url
+        self.headers = headers or {}
+        kind = "Client" if status_code < 500 else "Server"
+        super().__init__(f"{status_code} {kind} Error for url: {url}")
+
+
+class Transport:
+    """
+    Base transport; sends a GET request and returns 'Response'.
+    Override 'get' to mock riot api in tests.
+    """
+
+    async def get(self, url, params=None, headers=None):
+        """Send GET request to url"""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release any resources held by the transport"""
+
+
+class AiohttpTransport(Transport):
+    """Transport using aiohttp. Session is created on first request."""
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self._session = None
+
+    async def _get_session(self):
+        # pylint: disable=import-outside-toplevel
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def get(self, url, params=None, headers=None):
+        """Send GET request to url"""
+        session = await self._get_session()
+        async with session.get(url, params=params, headers=headers) as resp:
+            raw = await resp.read()
+            body = json.loads(raw) if raw else None
+            return Response(resp.status, dict(resp.headers), body)
+
+    async def close(self):
+        """Close aiohttp session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class RiotClient:
+    """Riot api client. Each method returns parsed json from riot api."""
+
+    def __init__(
+        self, api_key, transport=None, scheduler_factory=RequestScheduler, budget=None
+    ):
+        self.api_key = api_key
+        self.transport = transport if transport is not None else AiohttpTransport()
+        self.scheduler_factory = scheduler_factory
+        # 'SharedBudget' of other processes using the api key; None if there are none.
+        self.budget = budget
+        # platform or regional routing value -> its 'RequestScheduler'
+        self.schedulers = {}
+
+    def scheduler(self, route):
+        """Scheduler of the route (eg. 'na1', 'americas'), created on first use"""
+        if route not in self.schedulers:
+            self.schedulers[route] = self.scheduler_factory(
+                budget=self.budget, budget_key=route
+            )
+        return self.schedulers[route]
+
+    async def request(
+        self,
+        url,
+        params=None,
+        method_key=None,
+        priority=PRIORITY_INTERACTIVE,
+        route=None,
+    ):
+        """
+        Send request through the transport and return json body.
+        Requests with 'method_key' are riot api calls; they carry the api key
+        and wait for their turn in the scheduler of their 'route'.
+        Others (data dragon) go straight out.
+        Raises 'ApiError' for non 2xx responses.
+        """
+        if method_key is None:
+            response = await self.transport.get(url, params=params)
+        else:
+            headers = {"X-Riot-Token": self.api_key}
+            response = await self.scheduler(route).submit(
+                method_key,
+                lambda: self.transport.get(url, params=params, headers=headers),
+                priority,
+            )
+        if response.status >= 400:
+            raise ApiError(response.status, url, response.headers)
+        return response.body
+
+    async def close(self):
+        """Close underlying transport"""
+        await self.transport.close()
+
+    # summoner-v4
+    async def summoner_by_name(
+        self, region: str, name: str, priority=PRIORITY_INTERACTIVE
+    ):
+        """Get summoner by summoner name"""
+        url = PLATFORM_URL.format(region=region)
+        return await self.request(
+            f"{url}/lol/summoner/v4/summoners/by-name/{quote(name)}",
+            method_key="summoner.by_name",
+            priority=priority,
+            route=region,
+        )
+
+    async def summoner_by_puuid(
+        self, region: str, puuid: str, priority=PRIORITY_INTERACTIVE
+    ):
+        """Get summoner by puuid"""
+        url = PLATFORM_URL.format(region=region)
+        return await self.request(
+            f"{url}/lol/summoner/v4/summoners/by-puuid/{puuid}",
+            method_key="summoner.by_puuid",
+            priority=priority,
+            route=region,
+        )
+
+    # league-v4
+    async def league_by_summoner(
+        self, region: str, summoner_id: str, priority=PRIORITY_INTERACTIVE
+    ):
+        """Get league entries of the summoner"""
+        url = PLATFORM_URL.format(region=region)
+        return await self.request(
+            f"{url}/lol/league/v4/entries/by-summoner/{summoner_id}",
+            method_key="league.by_summoner",
+            priority=priority,
+            route=region,
+        )
+
+    # match-v5
+    async def match_ids_by_puuid(
+        self, region: str, puuid: str, count=1, priority=PRIORITY_INTERACTIVE
+    ):
+        """Get ids of the latest matches of the player, newest first"""
+        routing = REGIONAL_ROUTING.get(region, "americas")
+        return await self.request(
+            f"{REGIONAL_URL.format(routing=routing)}/lol/match/v5/matches/by-puuid/{puuid}/ids",
+            params={"start": 0, "count": count},
+            method_key="match.ids_by_puuid",
+            priority=priority,
+            route=routing,
+        )
+
+    async def match_by_id(self, region: str, match_id, priority=PRIORITY_INTERACTIVE):
+        """Get match detail (eg. match_id 'NA1_4000000000')"""
+        routing = REGIONAL_ROUTING.get(region, "americas")
+        return await self.request(
+            f"{REGIONAL_URL.format(routing=routing)}/lol/match/v5/matches/{match_id}",
+            method_key="match.by_id",
+            priority=priority,
+            route=routing,
+        )
+
+    # data dragon; static data, no api key needed.
+    async def versions_for_region(self, region: str):
+        """Get latest data dragon versions for the region (eg. 'na1' -> 'na')"""
+        realm = region.rstrip("0123456789")
+        return await self.request(f"{DATA_DRAGON_URL}/realms/{realm}.json")
+
+    async def champions(self, version: str, locale: str = "en_US"):
+        """Get static champion list"""
+        return await self.request(
+            f"{DATA_DRAGON_URL}/cdn/{version}/data/{locale}/champion.json"
+        )
@@ -1,3 +1,5 @@
 from .get_rank import *
 from .previous_match import *
 from .create_summoners_list import *
+from .warm_up import *
+from .roster_refresh import *
@@ -1,35 +1,80 @@
-from .get_rank import get_summoner_rank
+import asyncio
 
+from utils.utils import normalize_name
+from utils.constants import MAX_CONCURRENT_LOOKUPS
+from .. import DEFAULT_REGION
+from .get_rank import lookup_summoner_rank, save_summoner_profiles
 
-def create_summoner_list(user_input_list_names: list):
+
+async def resolve_summoners(
+    user_input_list_names: list,
+    region: str = DEFAULT_REGION,
+    limit: int = MAX_CONCURRENT_LOOKUPS,
+):
+    """Looks up summoners concurrently, at most 'limit' at a time
+    Parameters:
+    user_input_list_names (list): list of summoner names
+    region (str): platform to look the names up in (eg. 'na1')
+    limit (int): max number of lookups running at the same time
+
+    Returns:
+    results (list): (name, (summoner profile, fetched) or exception) pairs in input order
+
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def resolve(name):
+        async with semaphore:
+            try:
+                return await lookup_summoner_rank(name, region)
+            # pylint: disable=broad-except
+            except Exception as e_values:
+                return e_values
+
+    results = await asyncio.gather(*[resolve(name) for name in user_input_list_names])
+    return list(zip(user_input_list_names, results))
+
+
+async def create_summoner_list(
+    user_input_list_names: list, region: str = DEFAULT_REGION
+):
     """Gets the list of summoner names and returns the information abou the summoners
     Parameters:
-    players_list (list): list of summoner names
-    server_id (int): discord server id
+    user_input_list_names (list): list of summoner names
+    region (str): platform to look the names up in (eg. 'na1')
 
     Returns:
-    members_to_add (dict): summoner's latest match information
+    members_to_add (list): 'SummonerProfile's found, in the order they were given
+    failed_summoners (dict): name -> exception for names that could not be looked up
 
     """
-    try:
-        # dictionary for data input
-        members_to_add = []
-
-        # accessing each player
-        for user_input_list_name in user_input_list_names:
-            # 'get_summoner_rank' will handle getting summoner's data.
-            summoner_data = get_summoner_rank(user_input_list_name)
-
-            members_to_add.append(
-                {
-                    "puuid": summoner_data["puuid"],
-                    "summoner_name": summoner_data["summoner_name"],
-                    "tier_division": summoner_data["tier_division"],
-                    "tier_rank": summoner_data["tier_rank"],
-                    "league_points": summoner_data["league_points"],
-                }
-            )
-        return members_to_add
-    # pylint: disable=broad-except
-    except Exception as e_str:
-        raise Exception(e_str, user_input_list_name) from e_str
+    # Same name typed twice (eg. 'Name' and 'name ') only needs one lookup.
+    unique_names = {}
+    for name in user_input_list_names:
+        unique_names.setdefault(normalize_name(name), name)
+
+    members_to_add = []
+    failed_summoners = {}
+    added_puuids = set()
+    fetched_profiles = []
+
+    for name, result in await resolve_summoners(
+        list(unique_names.values()), region
+    ):
+        if isinstance(result, Exception):
+            failed_summoners[name] = result
+            continue
+
+        summoner_data, fetched = result
+        if fetched:
+            fetched_profiles.append(summoner_data)
+
+        if summoner_data.puuid in added_puuids:
+            continue
+        added_puuids.add(summoner_data.puuid)
+        members_to_add.append(summoner_data)
+
+    # Summoners new to us are saved together, in one statement.
+    await save_summoner_profiles(fetched_profiles, region)
+
+    return members_to_add, failed_summoners
@@ -1,104 +1,153 @@
 """
 Data processing the data from riot API
 """
+import asyncio
 import pydash
-from db.models.summoners import Summoners
+from db.models.summoners import Summoners, SummonerProfile
+from db.repositories.roster import invalidate_rosters_of
 
-from utils.utils import get_file_path
+from utils.utils import normalize_name
 
-from .. import watcher, MY_REGION
+from .. import riot_client, static_data, DEFAULT_REGION, SUMMONER_CACHE_TTL
+from ..scheduler import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
 from .utils import check_cached
 
+# puuid -> running background refresh, so one summoner is refreshed once at a time.
+refresh_tasks = {}
 
-def create_summoner_profile_data(summoner: dict):
+
+async def save_summoner_profiles(summoner_profiles: list, region: str):
+    """Save summoner profiles of the region; cached rosters they are in are dropped
+    so 'teams' uses the new ranks
     """
-    Helper to create data to be returned fro 'get_rank()' function
+    await Summoners.upsert_profiles(summoner_profiles, region)
+    await invalidate_rosters_of([profile.puuid for profile in summoner_profiles])
+
+
+async def fetch_summoner_profile(
+    user: dict, region: str, priority=PRIORITY_INTERACTIVE
+):
+    """Gets the summoner's rank information from riot api
+    Parameters:
+    user (dict): summoner returned by summoner-v4 api
+    region (str): platform of the summoner (eg. 'na1')
+    priority (int): scheduler priority of the requests
+
+    Returns:
+    summoner_profile (SummonerProfile): rank information about the summoner
+
     """
-    emblem_path = get_file_path(
-        f"images/Emblem_{summoner['tier_division'].capitalize()}.png"
+    ranked_stat = await riot_client.league_by_summoner(region, user["id"], priority)
+
+    # Get summoner Icon Image
+    await static_data.ensure_loaded()
+    icon_url = static_data.profile_icon_url(user["profileIconId"])
+
+    # Find solo queue data.
+    # If summoner does not have any rank information, summoner is unranked.
+    solo_rank_stat = pydash.find(ranked_stat, {"queueType": "RANKED_SOLO_5x5"}) or {}
+
+    return SummonerProfile(
+        summoner_name=user["name"],
+        summoner_icon_image_url=icon_url,
+        summoner_level=user["summonerLevel"],
+        puuid=user["puuid"],
+        tier_division=solo_rank_stat.get("tier", "UNRANKED"),
+        tier_rank=solo_rank_stat.get("rank", "I"),
+        solo_win=solo_rank_stat.get("wins", 0),
+        solo_loss=solo_rank_stat.get("losses", 0),
+        league_points=solo_rank_stat.get("leaguePoints", 0),
     )
 
-    tier = " ".join([summoner["tier_division"], summoner["tier_rank"]])
-
-    summoner_profile = {
-        "summoner_name": summoner["summoner_name"],
-        "summoner_icon_image_url": summoner["summoner_icon_image_url"],
-        "summoner_level": summoner["summoner_level"],
-        "tier_image_path": emblem_path,
-        "tier_image_name": f"Emblem_{summoner['tier_division'].capitalize()}.png",
-        "tier": tier,
-        "puuid": summoner["puuid"],
-        "tier_division": summoner["tier_division"],
-        "tier_rank": summoner["tier_rank"],
-        "solo_win": summoner["solo_win"],
-        "solo_loss": summoner["solo_loss"],
-        "league_points": summoner["league_points"],
-    }
 
+async def refresh_summoner_rank(puuid: str, region: str, priority=PRIORITY_BACKGROUND):
+    """Gets the latest rank of a summoner we have a record of and updates the record
+    Parameters:
+    puuid (str): puuid of the summoner
+    region (str): platform of the summoner (eg. 'na1')
+
+    Returns:
+    summoner_profile (SummonerProfile): updated rank information about the summoner
+
+    """
+    user = await riot_client.summoner_by_puuid(region, puuid, priority)
+    summoner_profile = await fetch_summoner_profile(user, region, priority)
+
+    # The summoner may have been renamed to a name another row still holds;
+    # 'upsert_profiles' takes it from that row (and drops both cached rows).
+    await save_summoner_profiles([summoner_profile], region)
     return summoner_profile
 
 
-# Get summoner rank.
-def get_summoner_rank(name: str):
-    """Gets the summoner's rank information from riot watcher api
+def schedule_summoner_refresh(puuid: str, region: str):
+    """Refresh summoner's record in the background, unless already refreshing"""
+    if puuid in refresh_tasks:
+        return
+
+    def finish_refresh(task):
+        refresh_tasks.pop(puuid, None)
+        if not task.cancelled() and task.exception():
+            print(f"Failed to refresh summoner {puuid}: {task.exception()}")
+
+    task = asyncio.ensure_future(refresh_summoner_rank(puuid, region))
+    refresh_tasks[puuid] = task
+    task.add_done_callback(finish_refresh)
+
+
+async def lookup_summoner_rank(name: str, region: str):
+    """Gets the summoner's rank information, from our db when we have it
     Parameters:
     name (str): name of the summoner
+    region (str): platform to look the name up in (eg. 'na1')
 
     Returns:
-    summoner_profile (dict): rank information about the summoner
+    summoner_profile (SummonerProfile): rank information about the summoner
+    fetched (bool): True if the profile came from riot api and is not saved yet
 
     """
 
-    # We need to get id
-    user = watcher.summoner.by_name(MY_REGION, name)
+    # First check if we have existing record for given summoner name.
+    # Names are matched normalized, so no api call is needed to get the exact name.
+    summoner_cached = await check_cached(
+        (region, normalize_name(name)),
+        Summoners,
+        (Summoners.region, Summoners.normalized_name),
+        SUMMONER_CACHE_TTL,
+    )
 
-    # First check if we have existing record for given summoner name
-    summoner_cached = check_cached(user["name"], Summoners, Summoners.summoner_name)
+    # Rows saved without stats (eg. roster members from before 'summoners' had them)
+    # can't be shown; look them up like unknown names.
+    if summoner_cached and None in (
+        summoner_cached["dict"][column] for column in SummonerProfile.__slots__
+    ):
+        summoner_cached = None
 
     # If data exists, form data and return here.
+    # Stale record is still returned right away, and refreshed in the background.
     if summoner_cached:
-        return create_summoner_profile_data(summoner_cached["dict"])
+        if summoner_cached["stale"]:
+            schedule_summoner_refresh(summoner_cached["dict"]["puuid"], region)
+        return SummonerProfile.from_row(summoner_cached["dict"]), False
 
     # Cached value doesn't exist; Grab data from API.
-    ranked_stat = watcher.league.by_summoner(MY_REGION, user["id"])
+    user = await riot_client.summoner_by_name(region, name)
+    return await fetch_summoner_profile(user, region), True
 
-    # Init 'profile_data' to contain all data needed in one place.
-    profile_data = {}
 
-    # Format keys and save into 'profile_data'
-    profile_data["summoner_name"] = user["name"]
-    profile_data["summoner_level"] = user["summonerLevel"]
-    profile_data["puuid"] = user["puuid"]
-
-    # Get summoner Icon Image
-    profileiconid = user["profileIconId"]
+# Get summoner rank.
+async def get_summoner_rank(name: str, region: str = DEFAULT_REGION):
+    """Gets the summoner's rank information from riot watcher api
+    Parameters:
+    name (str): name of the summoner
+    region (str): platform to look the name up in (eg. 'na1')
 
-    version = watcher.data_dragon.versions_for_region(MY_REGION)["v"]
-    profile_data["summoner_icon_image_url"] = (
-        "http://ddragon.leagueoflegends.com/"
-        + f"cdn/{version}/img/profileicon/{profileiconid}.png"
-    )
+    Returns:
+    summoner_profile (SummonerProfile): rank information about the summoner
 
-    # Find solo queue data.
-    solo_rank_stat = pydash.find(ranked_stat, {"queueType": "RANKED_SOLO_5x5"})
-    if solo_rank_stat:
-        profile_data["tier_division"] = solo_rank_stat["tier"]
-        profile_data["tier_rank"] = solo_rank_stat["rank"]
-        profile_data["solo_win"] = solo_rank_stat["wins"]
-        profile_data["solo_loss"] = solo_rank_stat["losses"]
-        profile_data["league_points"] = solo_rank_stat["leaguePoints"]
-
-    # If summoner does not have any rank information
-    else:
-        profile_data["tier_division"] = "UNRANKED"
-        profile_data["tier_rank"] = "I"
-        profile_data["solo_win"] = 0
-        profile_data["solo_loss"] = 0
-        profile_data["league_points"] = 0
-
-    summoner_profile = create_summoner_profile_data(profile_data)
-
-    summoner_data = Summoners(summoner_profile)
-    summoner_data.create()
+    """
+    summoner_profile, fetched = await lookup_summoner_rank(name, region)
+    if fetched:
+        # Summoner may have a record under the name before renaming; upsert updates it.
+        await save_summoner_profiles([summoner_profile], region)
 
     return summoner_profile
@@ -1,59 +1,254 @@
-# pylint: disable-all
-# TODO: reanble pylint.
-import pydash
-import pandas as pd
+"""
+Latest matches of a summoner from match-v5
 
-from .. import watcher, MY_REGION
+Finished matches never change; they are saved in 'matches' and
+'match_participants' tables and only match ids we don't have are fetched.
+"""
+import asyncio
 
-# Get previous match history of summoner.
-def previous_match(name: str):
-    """Gets the summoner's last match information from riot watcher api
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from db.db import async_session_scope
+from db.models.summoners import Summoners
+from db.models.matches import Matches, MatchParticipants
+
+from utils.utils import normalize_name
+
+from .. import riot_client, static_data, DEFAULT_REGION
+from ..scheduler import PRIORITY_INTERACTIVE
+from .utils import check_cached
+
+# Keys of a participant summary that are saved in 'match_participants' table.
+PARTICIPANT_COLUMNS = [
+    "position",
+    "puuid",
+    "summoner_name",
+    "champion",
+    "kills",
+    "deaths",
+    "assists",
+    "damage",
+    "win",
+    "team_id",
+]
+
+# match-v5 team ids
+BLUE_TEAM_ID = 100
+RED_TEAM_ID = 200
+
+
+def summarize_participant(row: dict, position: int):
+    """Compact summary of one match-v5 participant, the 'position'th of the match"""
+    return {
+        "position": position,
+        # Bots all have the puuid 'BOT'.
+        "puuid": row["puuid"],
+        "summoner_name": row.get("riotIdGameName") or row.get("summonerName", ""),
+        # Old matches may not have 'championName'.
+        "champion": row.get("championName")
+        or static_data.champion_name(row["championId"]),
+        "kills": row["kills"],
+        "deaths": row["deaths"],
+        "assists": row["assists"],
+        "damage": row["totalDamageDealtToChampions"],
+        "win": row["win"],
+        "team_id": row["teamId"],
+    }
+
+
+def create_match_summary(match: dict, participant_list: list, puuid: str = None):
+    """Match summary from match info and participant summaries
+    Parameters:
+    match (dict): match_id, game_mode, duration and game_end_timestamp
+    participant_list (list): participant summaries from 'summarize_participant',
+    in position order
+    puuid (str): puuid of the summoner the match was looked up for
+
+    Returns:
+    summary (dict): match info, participants (list) and participants by team,
+    and the player
+
+    """
+    teams = {BLUE_TEAM_ID: [], RED_TEAM_ID: []}
+    for participant in participant_list:
+        teams.setdefault(participant["team_id"], []).append(participant)
+    player = next(
+        (participant for participant in participant_list if participant["puuid"] == puuid),
+        None,
+    )
+
+    return {
+        "match_id": match["match_id"],
+        "game_mode": match["game_mode"],
+        "duration": match["duration"],
+        "game_end_timestamp": match.get("game_end_timestamp"),
+        "participants": participant_list,
+        "teams": teams,
+        "player": player,
+    }
+
+
+def summarize_match(match_detail: dict, puuid: str = None):
+    """Gets match-v5 match detail and returns only what 'last_match' shows
+    Parameters:
+    match_detail (dict): match from match-v5 'match_by_id'
+    puuid (str): puuid of the summoner the match was looked up for
+
+    Returns:
+    summary (dict): see 'create_match_summary'
+
+    """
+    info = match_detail["info"]
+
+    # Matches before patch 11.20 have duration in milliseconds.
+    duration = info["gameDuration"]
+    if "gameEndTimestamp" not in info:
+        duration //= 1000
+
+    return create_match_summary(
+        {
+            "match_id": match_detail["metadata"]["matchId"],
+            "game_mode": info["gameMode"],
+            "duration": duration,
+            "game_end_timestamp": info.get("gameEndTimestamp"),
+        },
+        [
+            summarize_participant(row, position)
+            for position, row in enumerate(info["participants"])
+        ],
+        puuid,
+    )
+
+
+async def load_matches(match_ids: list):
+    """Get saved matches
+    Parameters:
+    match_ids (list): match ids to look up
+
+    Returns:
+    matches (dict): match id -> (match dict, [participant dict]) of saved matches
+
+    """
+    if not match_ids:
+        return {}
+    async with async_session_scope() as session:
+        match_rows = (
+            await session.execute(select(Matches).where(Matches.match_id.in_(match_ids)))
+        ).scalars()
+        participant_rows = (
+            await session.execute(
+                select(MatchParticipants)
+                .where(MatchParticipants.match_id.in_(match_ids))
+                .order_by(MatchParticipants.match_id, MatchParticipants.position)
+            )
+        ).scalars()
+        matches = {
+            row.match_id: (
+                {
+                    "match_id": row.match_id,
+                    "game_mode": row.game_mode,
+                    "duration": row.duration,
+                    "game_end_timestamp": row.game_end_timestamp,
+                },
+                [],
+            )
+            for row in match_rows
+        }
+        for row in participant_rows:
+            if row.match_id in matches:
+                matches[row.match_id][1].append(
+                    {column: getattr(row, column) for column in PARTICIPANT_COLUMNS}
+                )
+    return matches
+
+
+async def save_match(summary: dict, region: str):
+    """Save a finished match summary; matches saved already are left as they are"""
+    try:
+        async with async_session_scope() as session:
+            session.add(Matches(summary, region))
+            for participant in summary["participants"]:
+                session.add(MatchParticipants(summary["match_id"], participant))
+            await session.flush()
+    except IntegrityError:
+        # Saved by another lookup in the meantime.
+        pass
+
+
+async def get_matches(
+    match_ids: list, region: str, puuid=None, priority=PRIORITY_INTERACTIVE
+):
+    """Gets match summaries, reading saved matches first
+    Parameters:
+    match_ids (list): match ids to get
+    region (str): platform the matches were played in (eg. 'na1')
+    puuid (str): puuid of the summoner the matches were looked up for
+    priority (int): riot api priority of fetching missing matches
+
+    Returns:
+    summaries (list): match summaries in the same order as 'match_ids'
+
+    """
+    saved = await load_matches(match_ids)
+    summaries = {
+        match_id: create_match_summary(match, participant_list, puuid)
+        for match_id, (match, participant_list) in saved.items()
+    }
+
+    missing = [match_id for match_id in match_ids if match_id not in summaries]
+    match_details = await asyncio.gather(
+        *[
+            riot_client.match_by_id(region, match_id, priority=priority)
+            for match_id in missing
+        ]
+    )
+    for match_detail in match_details:
+        summary = summarize_match(match_detail, puuid)
+        await save_match(summary, region)
+        summaries[summary["match_id"]] = summary
+
+    return [summaries[match_id] for match_id in match_ids if match_id in summaries]
+
+
+async def match_history(name: str, count: int = 20, region: str = DEFAULT_REGION):
+    """Gets the summoner's latest matches
     Parameters:
     name (str): name of the summoner
+    count (int): number of matches
+    region (str): platform to look the name up in (eg. 'na1')
 
     Returns:
-    df (DataFrame): summoner's latest match information
+    summaries (list): match summaries, newest first
 
     """
+    # Saved summoners already have puuid; skip the summoner lookup.
+    cached = await check_cached(
+        (region, normalize_name(name)),
+        Summoners,
+        (Summoners.region, Summoners.normalized_name),
+    )
+    if cached is not None:
+        puuid = cached["dict"]["puuid"]
+    else:
+        user = await riot_client.summoner_by_name(region, name)
+        puuid = user["puuid"]
 
-    user = watcher.summoner.by_name(MY_REGION, name)
-    matches = watcher.match.matchlist_by_account(MY_REGION, user["accountId"])
-    last_match = matches["matches"][0]
-    match_detail = watcher.match.by_id(MY_REGION, last_match["gameId"])
-    # check league's latest version
-    latest = watcher.data_dragon.versions_for_region(MY_REGION)["n"]["champion"]
-    # Get static info.
-    static_champ_list = watcher.data_dragon.champions(latest, False, "en_US")
-    # champ static data list.
-    champ_dict = {}
-    for key in static_champ_list["data"]:
-        row = static_champ_list["data"][key]
-        champ_dict[row["key"]] = row["id"]
-
-    participants = []
-    for row in match_detail["participants"]:
-        participants_row = {}
-        # Get summoner name
-        pid = row["participantId"]
-        summoner_info = pydash.find(
-            match_detail["participantIdentities"], {"participantId": pid}
-        )
-        participants_row["Name"] = summoner_info["player"]["summonerName"]
-        participants_row["Champion"] = champ_dict[str(row["championId"])]
-        # participants_row['spell1'] = row['spell1Id']
-        # participants_row['spell2'] = row['spell2Id']
-        participants_row["Win"] = row["stats"]["win"]
-        participants_row["Kills"] = row["stats"]["kills"]
-        participants_row["Deaths"] = row["stats"]["deaths"]
-        participants_row["Assists"] = row["stats"]["assists"]
-        participants_row["Damage"] = row["stats"]["totalDamageDealt"]
-        # TODO: Check do we need this??
-        # participants_row['Gold'] = row['stats']['goldEarned']
-        # participants_row['champLevel'] = row['stats']['champLevel']
-        # participants_row['Minions'] = row['stats']['totalMinionsKilled']
-        # participants_row['item0'] = row['stats']['item0']
-        # participants_row['item1'] = row['stats']['item1']
-        participants.append(participants_row)
-    # TODO: REWORK THIS WITHOUT pd
-    # last_match_info = pd.DataFrame(participants)
-    return None
+    match_ids = await riot_client.match_ids_by_puuid(region, puuid, count=count)
+    return await get_matches(match_ids, region, puuid)
+
+
+# Get previous match history of summoner.
+async def previous_match(name: str, region: str = DEFAULT_REGION):
+    """Gets the summoner's last match information
+    Parameters:
+    name (str): name of the summoner
+    region (str): platform to look the name up in (eg. 'na1')
+
+    Returns:
+    summary (dict): summoner's latest match from 'summarize_match', or None
+    if the summoner has no matches
+
+    """
+    summaries = await match_history(name, count=1, region=region)
+    return summaries[0] if summaries else None
@@ -0,0 +1,86 @@
+"""
+Background refresh of rosters' summoner ranks
+
+Summoners in rosters changed recently are refreshed a batch at a time with
+background priority, so 'teams' uses current ranks without calling riot api
+and interactive commands still go first under the rate limit.
+"""
+import asyncio
+import datetime
+
+from db.repositories.roster import find_stale_members
+
+from .. import (
+    SUMMONER_CACHE_TTL,
+    ROSTER_REFRESH_INTERVAL,
+    ROSTER_REFRESH_BATCH,
+    ROSTER_ACTIVE_WINDOW,
+)
+from ..scheduler import PRIORITY_BACKGROUND
+from .get_rank import refresh_summoner_rank, refresh_tasks
+
+# Running 'roster_refresh_loop'
+roster_refresher = {"task": None}
+
+
+async def refresh_rosters(
+    batch_size=ROSTER_REFRESH_BATCH, ttl=SUMMONER_CACHE_TTL, shards=None
+):
+    """Refresh one batch of old summoner rows of active rosters
+    Parameters:
+    batch_size (int): max number of summoners to refresh
+    ttl (int): summoner rows older than this many seconds are refreshed
+    shards (tuple): (shard ids, shard count) of this process; None for every shard
+
+    Returns:
+    refreshed (int): number of summoners refreshed
+
+    """
+    now = datetime.datetime.utcnow()
+    members = await find_stale_members(
+        now - datetime.timedelta(seconds=ROSTER_ACTIVE_WINDOW),
+        now - datetime.timedelta(seconds=ttl),
+        batch_size,
+        shards,
+    )
+    # Summoners a 'rank' lookup is refreshing already are skipped.
+    puuids = [puuid for puuid in members if puuid not in refresh_tasks]
+    results = await asyncio.gather(
+        *[
+            refresh_summoner_rank(puuid, members[puuid]["region"], PRIORITY_BACKGROUND)
+            for puuid in puuids
+        ],
+        return_exceptions=True,
+    )
+
+    # Cached rosters with the old ranks are dropped by 'refresh_summoner_rank'.
+    refreshed = 0
+    for puuid, result in zip(puuids, results):
+        if isinstance(result, Exception):
+            print(f"Failed to refresh summoner {puuid}: {result}")
+            continue
+        refreshed += 1
+    return refreshed
+
+
+async def roster_refresh_loop(interval, shards=None):
+    """Refresh a batch every 'interval' seconds"""
+    while True:
+        try:
+            await refresh_rosters(shards=shards)
+        # pylint: disable=broad-except
+        except Exception as e_values:
+            print(f"Failed to refresh rosters: {e_values}")
+        await asyncio.sleep(interval)
+
+
+def start_roster_refresher(interval=ROSTER_REFRESH_INTERVAL, shards=None):
+    """Start refreshing rosters in the background, unless already running
+    Each process only refreshes rosters of its own 'shards'.
+    """
+    task = roster_refresher["task"]
+    if task is None or task.done():
+        roster_refresher["task"] = asyncio.ensure_future(
+            roster_refresh_loop(interval, shards)
+        )
+    return roster_refresher["task"]
@@ -1,30 +1,97 @@
-from db.db import Session
+import datetime
 
-session = Session()
+from sqlalchemy import select
+
+from db.db import async_session_scope
+from db.cache import get_row_cache
+
+
+def is_stale(updated_at, ttl):
+    """
+    Check if a record last updated at 'updated_at' is older than 'ttl' seconds.
+    Records without 'updated_at' are treated as stale.
+    """
+    if updated_at is None:
+        return True
+    age = datetime.datetime.utcnow() - updated_at
+    return age.total_seconds() > ttl
+
+
+def column_key(target_column):
+    """Row cache column name; tuple of names for a tuple of columns"""
+    if isinstance(target_column, tuple):
+        return tuple(column.key for column in target_column)
+    return target_column.key
+
+
+def column_filters(target_param, target_column):
+    """Where clauses matching 'target_param' (tuple of values for a tuple of columns)"""
+    if isinstance(target_column, tuple):
+        return [column == param for column, param in zip(target_column, target_param)]
+    return [target_column == target_param]
+
+
+def row_values(table, row):
+    """Dict of column values of a model instance"""
+    return {column.key: getattr(row, column.key) for column in table.__table__.columns}
+
+
+async def cache_rows(table, target_column, target_params: list):
+    """
+    Load rows whose 'target_column' is one of 'target_params' into the table's
+    row cache in one query. Returns the number of rows loaded.
+    """
+    row_cache = get_row_cache(table)
+    generation = row_cache.generation()
+    async with async_session_scope() as session:
+        rows = (
+            await session.execute(select(table).where(target_column.in_(target_params)))
+        ).scalars()
+        values = [row_values(table, row) for row in rows]
+    for row in values:
+        row_cache.store(row, generation)
+    return len(values)
 
 
 # Check if we have the summoner record in our db.
-def check_cached(target_param, table, target_column):
+async def check_cached(target_param, table, target_column, ttl=None):
     """
     Check if we have a record matching name in our db.
     name (str): name of the summoner
+    ttl (int): if given, result has 'stale' set when the record is older than ttl seconds
 
+    'target_column' can be a tuple of columns with a tuple of values as
+    'target_param' (eg. (Summoners.region, Summoners.normalized_name)).
+
+    Rows of tables in 'db.cache.row_caches' are served from memory when possible;
+    'raw' is None when the row came from memory.
     """
-    try:
-        # Create query; TODO: check for update_time
-        cached_data = (
-            session.query(table).filter(target_column == target_param).one_or_none()
-        )
-    except Exception as e_values:
-        session.rollback()
-        raise e_values
-    finally:
-        session.close()
-
-    if cached_data:
-        query_result = {}
-        query_result["dict"] = dict(cached_data.__dict__)
-        query_result["raw"] = cached_data
-        return query_result
-
-    return None
+    row_cache = get_row_cache(table)
+    cached_row = (
+        row_cache.lookup(column_key(target_column), target_param)
+        if row_cache is not None
+        else None
+    )
+
+    if cached_row is None:
+        generation = row_cache.generation() if row_cache is not None else None
+        async with async_session_scope() as session:
+            result = await session.execute(
+                select(table).where(*column_filters(target_param, target_column))
+            )
+            cached_data = result.scalar_one_or_none()
+            if cached_data is None:
+                return None
+
+            cached_row = row_values(table, cached_data)
+        if row_cache is not None:
+            row_cache.store(cached_row, generation)
+    else:
+        cached_data = None
+
+    query_result = {}
+    query_result["dict"] = cached_row
+    query_result["raw"] = cached_data
+    if ttl is not None:
+        query_result["stale"] = is_stale(cached_row["updated_at"], ttl)
+    return query_result
@@ -0,0 +1,60 @@
+"""
+Cache warm-up when the bot starts
+
+Loads data dragon data and the rosters used most recently, with their
+summoners, so the first commands after a deploy are served from memory.
+Warm-up never fails the start; whatever couldn't be loaded is loaded on
+first use.
+"""
+import time
+import asyncio
+
+from db.models.summoners import Summoners
+from db.repositories.roster import cache_recent_rosters
+
+from .. import static_data, WARM_UP_ROSTERS, WARM_UP_TIME_BUDGET
+from .utils import cache_rows
+
+
+async def warm_up_caches(
+    roster_limit=WARM_UP_ROSTERS, budget=WARM_UP_TIME_BUDGET, shards=None
+):
+    """Fill caches, stopping once 'budget' seconds have passed
+    Parameters:
+    roster_limit (int): max number of rosters to load
+    budget (float): seconds warm-up may take
+    shards (tuple): (shard ids, shard count) of this process; None for every shard
+
+    Returns:
+    report (dict): static_data (bool), rosters and summoners loaded, seconds
+    taken, timed_out, and error (str of the exception that stopped it, or None)
+
+    """
+    start = time.monotonic()
+    report = {"static_data": False, "rosters": 0, "summoners": 0, "timed_out": False}
+    report["error"] = None
+
+    async def within_budget(coroutine):
+        return await asyncio.wait_for(coroutine, max(start + budget - time.monotonic(), 0))
+
+    try:
+        await within_budget(static_data.ensure_loaded())
+        report["static_data"] = True
+
+        rosters = await within_budget(cache_recent_rosters(roster_limit, shards))
+        report["rosters"] = len(rosters)
+
+        puuids = list(
+            {member["puuid"] for members in rosters.values() for member in members}
+        )
+        report["summoners"] = await within_budget(
+            cache_rows(Summoners, Summoners.puuid, puuids)
+        )
+    except asyncio.TimeoutError:
+        report["timed_out"] = True
+    # pylint: disable=broad-except
+    except Exception as e_values:
+        report["error"] = str(e_values) or type(e_values).__name__
+
+    report["seconds"] = time.monotonic() - start
+    return report
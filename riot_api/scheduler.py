@@ -0,0 +1,354 @@
+"""
+Rate limit aware request scheduler for riot api
+
+Every request using the api key goes through one 'RequestScheduler'.
+It keeps track of the app rate limit and each method's rate limit from
+the response headers, sends queued requests in priority order
+(interactive commands before background jobs), and retries 429 responses
+after 'Retry-After'.
+Bot processes sharing the api key also reserve each request in a
+'SharedBudget' (eg. 'riot_api.budget.DatabaseBudget'), so together they stay
+under the limits.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+
+# Lower number goes first.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Development api key limits, used until riot tells us the real ones.
+DEFAULT_APP_RATE_LIMIT = "20:1,100:120"
+
+# Seconds to back off when a 429 has no 'Retry-After' (eg. service rate limit).
+DEFAULT_RETRY_AFTER = 1
+
+MAX_RETRIES = 3
+
+# Number of recent requests used for wait time stats.
+WAIT_STATS_SIZE = 100
+
+
+class Clock:
+    """Wall clock used by the scheduler. Replaced by a fake clock in tests."""
+
+    def now(self):
+        """Current time in seconds"""
+        return time.monotonic()
+
+    async def sleep(self, seconds):
+        """Sleep for given seconds"""
+        await asyncio.sleep(seconds)
+
+
+def parse_rate_limit(header):
+    """
+    Parse rate limit header into list of (number, seconds).
+    eg. '20:1,100:120' -> [(20, 1), (100, 120)]
+    """
+    if not header:
+        return []
+    pairs = []
+    for item in header.split(","):
+        number, seconds = item.strip().split(":")
+        pairs.append((int(number), int(seconds)))
+    return pairs
+
+
+def get_header(headers, name):
+    """Case insensitive header lookup"""
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class RateLimitWindow:
+    """One 'limit requests per seconds' window"""
+
+    def __init__(self, limit, seconds):
+        self.limit = limit
+        self.seconds = seconds
+        self.count = 0
+        self.start = None
+
+    def _reset_if_expired(self, now):
+        if self.start is None or now >= self.start + self.seconds:
+            self.start = now
+            self.count = 0
+
+    def wait_time(self, now):
+        """Seconds until one more request fits in the window"""
+        if self.start is None or now >= self.start + self.seconds:
+            return 0
+        if self.count < self.limit:
+            return 0
+        return self.start + self.seconds - now
+
+    def consume(self, now):
+        """Count one request"""
+        self._reset_if_expired(now)
+        self.count += 1
+
+    def sync_count(self, count, now):
+        """Take the count riot reported if it is ahead of ours"""
+        self._reset_if_expired(now)
+        self.count = max(self.count, count)
+
+
+class RateLimitBucket:
+    """Set of windows sharing one limit (the app limit, or one method's limit)"""
+
+    def __init__(self, limits=None):
+        self.windows = {}
+        self.blocked_until = 0
+        self.set_limits(limits or [])
+
+    def set_limits(self, limits):
+        """Update windows from [(limit, seconds)], keeping counts of known windows"""
+        windows = {}
+        for limit, seconds in limits:
+            window = self.windows.get(seconds) or RateLimitWindow(limit, seconds)
+            window.limit = limit
+            windows[seconds] = window
+        self.windows = windows
+
+    def sync_counts(self, counts, now):
+        """Update counts from [(count, seconds)] reported by riot"""
+        for count, seconds in counts:
+            if seconds in self.windows:
+                self.windows[seconds].sync_count(count, now)
+
+    def wait_time(self, now):
+        """Seconds until a request can be sent through this bucket"""
+        wait = max(self.blocked_until - now, 0)
+        for window in self.windows.values():
+            wait = max(wait, window.wait_time(now))
+        return wait
+
+    def consume(self, now):
+        """Count one request in every window"""
+        for window in self.windows.values():
+            window.consume(now)
+
+    def limits(self):
+        """[(limit, seconds)] of the windows"""
+        return [(window.limit, window.seconds) for window in self.windows.values()]
+
+
+class SharedBudget:
+    """
+    Base rate limit budget shared by every process using the api key.
+    Override 'reserve' to count requests somewhere all processes see.
+    """
+
+    async def reserve(self, buckets: list):
+        """
+        Count one request in every window of 'buckets', if all have room
+        Parameters:
+        buckets (list): (key, [(limit, seconds)]) of the app and method limits
+
+        Returns:
+        wait (float): 0 if the request was counted, else seconds until it may fit
+        """
+        raise NotImplementedError
+
+
+class _Request:
+    """Queued request"""
+
+    def __init__(self, method_key, send, future, enqueued_at):
+        self.method_key = method_key
+        self.send = send
+        self.future = future
+        self.enqueued_at = enqueued_at
+        self.retries = 0
+
+
+class RequestScheduler:
+    """
+    Queue of riot api requests sent under the app and method rate limits.
+
+    'submit' takes a coroutine function returning a transport 'Response'
+    and resolves once the request was sent (and retried, if it got a 429).
+    """
+
+    def __init__(
+        self,
+        clock=None,
+        app_rate_limit=DEFAULT_APP_RATE_LIMIT,
+        budget: SharedBudget = None,
+        budget_key="",
+    ):
+        self.clock = clock or Clock()
+        # Shared with other processes; 'budget_key' is the route (eg. 'na1').
+        self.budget = budget
+        self.budget_key = budget_key
+        self.app_bucket = RateLimitBucket(parse_rate_limit(app_rate_limit))
+        self.method_buckets = {}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._dispatcher = None
+        self._in_flight = 0
+        self._wait_times = deque(maxlen=WAIT_STATS_SIZE)
+        self.total_requests = 0
+        self.total_retries = 0
+
+    def _method_bucket(self, method_key):
+        if method_key not in self.method_buckets:
+            self.method_buckets[method_key] = RateLimitBucket()
+        return self.method_buckets[method_key]
+
+    async def submit(self, method_key, send, priority=PRIORITY_INTERACTIVE):
+        """
+        Queue a request and wait for its response
+        Parameters:
+        method_key (str): riot api method the request belongs to, eg. 'summoner.by_name'
+        send (coroutine function): sends the request and returns 'Response'
+        priority (int): PRIORITY_INTERACTIVE or PRIORITY_BACKGROUND
+
+        Returns:
+        response (Response): final response, a 429 only if retries ran out
+        """
+        future = asyncio.get_running_loop().create_future()
+        request = _Request(method_key, send, future, self.clock.now())
+        self._push(priority, request)
+        return await future
+
+    def _push(self, priority, request, sequence=None):
+        if sequence is None:
+            sequence = next(self._sequence)
+        heapq.heappush(self._queue, (priority, sequence, request))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self):
+        """Send queued requests as soon as rate limits allow"""
+        while self._queue:
+            now = self.clock.now()
+            app_wait = self.app_bucket.wait_time(now)
+            if app_wait > 0:
+                await self.clock.sleep(app_wait)
+                continue
+
+            # Highest priority request whose method limit has room.
+            min_wait = None
+            for entry in sorted(self._queue, key=lambda item: item[:2]):
+                request = entry[2]
+                if request.future.done():
+                    # Caller gave up (eg. command was cancelled); drop it.
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    break
+                wait = self._method_bucket(request.method_key).wait_time(now)
+                if wait == 0:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    shared_wait = await self._reserve_shared(request.method_key)
+                    if shared_wait > 0:
+                        # Other processes used the budget; keep its place and wait.
+                        heapq.heappush(self._queue, entry)
+                        await self.clock.sleep(shared_wait)
+                    else:
+                        self._send(entry[0], entry[1], request, self.clock.now())
+                    break
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+            else:
+                await self.clock.sleep(min_wait)
+
+            # Let the sent request start before picking the next one.
+            await asyncio.sleep(0)
+
+    async def _reserve_shared(self, method_key):
+        """Seconds to wait for the shared budget; 0 once the request is counted"""
+        if self.budget is None:
+            return 0
+        try:
+            return await self.budget.reserve(
+                [
+                    (self.budget_key, self.app_bucket.limits()),
+                    (
+                        f"{self.budget_key}:{method_key}",
+                        self._method_bucket(method_key).limits(),
+                    ),
+                ]
+            )
+        # pylint: disable=broad-except
+        except Exception as e_values:
+            # Our own limits still apply; don't stop commands when the budget is down.
+            print(f"Failed to reserve shared rate limit budget: {e_values}")
+            return 0
+
+    def _send(self, priority, sequence, request, now):
+        self.app_bucket.consume(now)
+        self._method_bucket(request.method_key).consume(now)
+        self.total_requests += 1
+        self._in_flight += 1
+        asyncio.ensure_future(self._run(priority, sequence, request))
+
+    async def _run(self, priority, sequence, request):
+        """Send one request and handle its rate limit headers"""
+        try:
+            response = await request.send()
+        # pylint: disable=broad-except
+        except Exception as e_values:
+            if not request.future.done():
+                request.future.set_exception(e_values)
+            return
+        finally:
+            self._in_flight -= 1
+
+        now = self.clock.now()
+        self._update_from_headers(request.method_key, response.headers, now)
+
+        if response.status == 429 and request.retries < MAX_RETRIES:
+            retry_after = get_header(response.headers, "Retry-After")
+            retry_after = float(retry_after) if retry_after else DEFAULT_RETRY_AFTER
+            if get_header(response.headers, "X-Rate-Limit-Type") == "application":
+                bucket = self.app_bucket
+            else:
+                bucket = self._method_bucket(request.method_key)
+            bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+
+            request.retries += 1
+            self.total_retries += 1
+            # Keep its original place in the queue.
+            self._push(priority, request, sequence)
+            return
+
+        self._wait_times.append(now - request.enqueued_at)
+        if not request.future.done():
+            request.future.set_result(response)
+
+    def _update_from_headers(self, method_key, headers, now):
+        app_limits = parse_rate_limit(get_header(headers, "X-App-Rate-Limit"))
+        if app_limits:
+            self.app_bucket.set_limits(app_limits)
+        self.app_bucket.sync_counts(
+            parse_rate_limit(get_header(headers, "X-App-Rate-Limit-Count")), now
+        )
+
+        method_bucket = self._method_bucket(method_key)
+        method_limits = parse_rate_limit(get_header(headers, "X-Method-Rate-Limit"))
+        if method_limits:
+            method_bucket.set_limits(method_limits)
+        method_bucket.sync_counts(
+            parse_rate_limit(get_header(headers, "X-Method-Rate-Limit-Count")), now
+        )
+
+    def stats(self):
+        """Queue depth and wait times (seconds from submit to final response)"""
+        wait_times = list(self._wait_times)
+        return {
+            "queue_depth": len(self._queue),
+            "in_flight": self._in_flight,
+            "total_requests": self.total_requests,
+            "total_retries": self.total_retries,
+            "avg_wait": sum(wait_times) / len(wait_times) if wait_times else 0,
+            "max_wait": max(wait_times) if wait_times else 0,
+        }
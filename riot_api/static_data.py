@@ -0,0 +1,132 @@
+"""
+Data dragon static data store
+
+Latest versions, champion key -> champion id map and the profile icon url
+prefix are loaded once, refreshed on a timer, and saved to disk so a restart
+doesn't fetch them again.
+"""
+
+import os
+import json
+import time
+import asyncio
+
+from utils.utils import get_file_path
+
+STATIC_DATA_PATH = get_file_path("data/static_data.json")
+
+DATA_DRAGON_CDN_URL = "http://ddragon.leagueoflegends.com/cdn"
+
+
+class StaticDataStore:
+    """Process wide data dragon data for one region"""
+
+    def __init__(self, client, region, path=STATIC_DATA_PATH):
+        self.client = client
+        self.region = region
+        self.path = path
+        self.versions = None
+        # champion key (eg. '266') -> champion id (eg. 'Aatrox')
+        self.champions = {}
+        self.updated_at = 0
+        self._refresh_task = None
+        self._pending_refresh = None
+
+    @property
+    def loaded(self):
+        """True once versions are available"""
+        return self.versions is not None
+
+    @property
+    def profile_icon_url_prefix(self):
+        """Url of profile icons without the icon id"""
+        return f"{DATA_DRAGON_CDN_URL}/{self.versions['v']}/img/profileicon/"
+
+    def profile_icon_url(self, profile_icon_id):
+        """Url of the profile icon image"""
+        return f"{self.profile_icon_url_prefix}{profile_icon_id}.png"
+
+    def champion_name(self, champion_key):
+        """Champion id (name) of the champion key"""
+        return self.champions.get(str(champion_key), str(champion_key))
+
+    def load_from_disk(self):
+        """Load data saved by 'save_to_disk'. Returns True if loaded."""
+        try:
+            with open(self.path, encoding="utf-8") as static_data_file:
+                saved = json.load(static_data_file)
+        except (OSError, ValueError):
+            return False
+
+        if saved.get("region") != self.region:
+            return False
+
+        self.versions = saved["versions"]
+        self.champions = saved["champions"]
+        self.updated_at = saved["updated_at"]
+        return True
+
+    def save_to_disk(self):
+        """Save data so restarts don't need to fetch it"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as static_data_file:
+            json.dump(
+                {
+                    "region": self.region,
+                    "versions": self.versions,
+                    "champions": self.champions,
+                    "updated_at": self.updated_at,
+                },
+                static_data_file,
+            )
+
+    async def refresh(self):
+        """Fetch latest data; callers arriving during a refresh wait for the same one"""
+        if self._pending_refresh is None or self._pending_refresh.done():
+            self._pending_refresh = asyncio.ensure_future(self._refresh())
+        await self._pending_refresh
+
+    async def _refresh(self):
+        """Fetch latest versions; champions are fetched only when their version changed"""
+        versions = await self.client.versions_for_region(self.region)
+
+        champion_version = versions["n"]["champion"]
+        if (
+            not self.champions
+            or not self.loaded
+            or self.versions["n"]["champion"] != champion_version
+        ):
+            static_champ_list = await self.client.champions(champion_version)
+            self.champions = {
+                row["key"]: row["id"] for row in static_champ_list["data"].values()
+            }
+
+        self.versions = versions
+        self.updated_at = time.time()
+        self.save_to_disk()
+
+    async def ensure_loaded(self):
+        """Load from disk, or fetch if nothing was saved"""
+        if self.loaded:
+            return
+        if not self.load_from_disk():
+            await self.refresh()
+
+    def start_refresh_loop(self, interval):
+        """Refresh data every 'interval' seconds in the background"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop(interval))
+        return self._refresh_task
+
+    async def _refresh_loop(self, interval):
+        while True:
+            # Data loaded from disk may already be old.
+            wait = self.updated_at + interval - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                await self.refresh()
+            # pylint: disable=broad-except
+            except Exception as e_values:
+                print(f"Failed to refresh static data: {e_values}")
+                await asyncio.sleep(min(interval, 60))
@@ -1,6 +1,16 @@
 #!/bin/bash
 cd /home/ubuntu/discord
 sudo chown -R ubuntu:ubuntu /home/ubuntu/discord
-nohup python3 bot.py > my.log 2>&1 &
-echo $! > save_pid.txt
-echo "finished"
\ No newline at end of file
+# SHARD_RANGES="0-1 2-3" (with SHARD_COUNT=4 in .env) runs one process per range.
+SHARD_RANGES=$(grep -s '^SHARD_RANGES=' .env | cut -d= -f2- | tr -d '"')
+if [ -n "$SHARD_RANGES" ]; then
+    rm -f save_pid.txt
+    for range in $SHARD_RANGES; do
+        SHARD_IDS=$range nohup python3 bot.py > "my-$range.log" 2>&1 &
+        echo $! >> save_pid.txt
+    done
+else
+    nohup python3 bot.py > my.log 2>&1 &
+    echo $! > save_pid.txt
+fi
+echo "finished"
@@ -0,0 +1,116 @@
+"""
+Shared fixtures for unit tests
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from db.db import Base, bind_async_engine, create_async_db_engine
+from db.cache import row_caches
+from db.models.summoners import Summoners
+from db.models.channels import Channels
+from db.models.roster_entries import RosterEntries, CREATE_ROSTER_MEMBERS_VIEW
+from db.models.matches import Matches, MatchParticipants
+from db.models.rate_limit_windows import RateLimitWindows
+from riot_api import riot_client, static_data
+from riot_api.client import Transport, Response
+
+
+class FakeTransport(Transport):
+    """
+    Transport returning canned responses instead of calling riot api.
+    'routes' maps a url path fragment to a json body, a Response, or an Exception.
+    """
+
+    def __init__(self, routes=None):
+        self.routes = routes or {}
+        self.calls = []
+
+    async def get(self, url, params=None, headers=None):
+        """Find the first route that matches url"""
+        self.calls.append(url)
+        for fragment, result in self.routes.items():
+            if fragment in url:
+                if isinstance(result, Exception):
+                    raise result
+                if isinstance(result, Response):
+                    return result
+                return Response(200, {}, result)
+        return Response(404, {}, {"status": {"status_code": 404}})
+
+
+@pytest.fixture
+def fake_transport(tmp_path, monkeypatch):
+    """
+    Swap riot client's transport with 'FakeTransport' for the test.
+    Static data starts empty and is saved under tmp_path.
+    """
+    original_transport = riot_client.transport
+    transport = FakeTransport({"/champion.json": {"data": {}}})
+    riot_client.transport = transport
+    monkeypatch.setattr(static_data, "path", str(tmp_path / "static_data.json"))
+    monkeypatch.setattr(static_data, "versions", None)
+    monkeypatch.setattr(static_data, "champions", {})
+    yield transport
+    riot_client.transport = original_transport
+
+
+@pytest.fixture
+def ranked_summoner(fake_transport):  # pylint: disable=redefined-outer-name
+    """
+    Function setting riot api responses of one summoner (puuid, name),
+    ranked PLATINUM II 75LP.
+    """
+
+    def set_routes(puuid, name):
+        fake_transport.routes.update(
+            {
+                "/realms/na.json": {"v": "1.1.1", "n": {"champion": "1.1.1"}},
+                "/summoners/by-puuid/": {
+                    "id": f"id-{puuid}",
+                    "puuid": puuid,
+                    "name": name,
+                    "profileIconId": 1,
+                    "summonerLevel": 2,
+                },
+                "/entries/by-summoner/": [
+                    {
+                        "queueType": "RANKED_SOLO_5x5",
+                        "tier": "PLATINUM",
+                        "rank": "II",
+                        "wins": 5,
+                        "losses": 4,
+                        "leaguePoints": 75,
+                    }
+                ],
+            }
+        )
+
+    return set_routes
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """
+    Bind models to a sqlite db with summoners, roster and matches tables.
+    Sync engine is returned to set up rows; models use the async engine.
+    """
+    db_url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(db_url)
+    # Each asyncio.run() has its own event loop; don't keep connections between them.
+    bind_async_engine(create_async_db_engine(db_url, poolclass=NullPool))
+    Base.metadata.create_all(
+        engine,
+        tables=[
+            Summoners.__table__,
+            Channels.__table__,
+            RosterEntries.__table__,
+            Matches.__table__,
+            MatchParticipants.__table__,
+            RateLimitWindows.__table__,
+        ],
+    )
+    engine.execute(CREATE_ROSTER_MEMBERS_VIEW)
+    yield engine
+    for row_cache in row_caches.values():
+        row_cache.clear()
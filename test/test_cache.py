@@ -0,0 +1,161 @@
+import asyncio
+
+from db.cache import LRUCache, RowCache, row_caches
+from db.models.summoners import Summoners, SummonerProfile
+from db.repositories.roster import add_members
+from riot_api.methods.utils import check_cached
+from riot_api.methods import warm_up
+from riot_api.methods.warm_up import warm_up_caches
+
+
+class FakeClock:
+    """Clock that only moves when told to"""
+
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+# pylint: disable=E0213,R0201,C0103,W0613
+class TestRowCache():
+    """
+    Class to test db/cache.py
+    """
+
+    def test_lru_evicts_least_recently_used(root_path):
+        """Oldest unused key is dropped when cache is full"""
+        cache = LRUCache(max_size=2, ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_expires_after_ttl(root_path):
+        """Entries older than ttl are misses"""
+        clock = FakeClock()
+        cache = LRUCache(max_size=2, ttl=10, clock=clock)
+        cache.set("a", 1)
+        clock.time = 11
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_row_cache_alias_lookup_returns_copy(root_path):
+        """Rows are found by alias column, and changing the result keeps cache intact"""
+        cache = RowCache("puuid", alias_columns=("normalized_name",))
+        cache.store({"puuid": "p1", "normalized_name": "name", "members": [1]})
+        row = cache.lookup("normalized_name", "name")
+        row["members"].append(2)
+        assert cache.lookup("puuid", "p1")["members"] == [1]
+
+        cache.invalidate_by("normalized_name", "name")
+        assert cache.lookup("puuid", "p1") is None
+        assert cache.aliases["normalized_name"] == {}
+
+    def test_row_invalidated_during_read_is_not_stored(root_path):
+        """A row read before a write to it (by key or alias) doesn't go back in the cache"""
+        cache = RowCache("puuid", alias_columns=(("region", "normalized_name"),))
+        row = {"puuid": "p1", "region": "na1", "normalized_name": "name"}
+
+        generation = cache.generation()
+        cache.invalidate_by(("region", "normalized_name"), ("na1", "name"))
+        assert not cache.store(row, generation)
+        assert cache.lookup("puuid", "p1") is None
+
+        # Writes to other rows don't matter.
+        generation = cache.generation()
+        cache.invalidate_by("puuid", "p2")
+        assert cache.store(row, generation)
+        assert cache.lookup(("region", "normalized_name"), ("na1", "name")) == row
+
+    def test_row_read_during_upsert_is_not_kept(root_path, sqlite_db, monkeypatch):
+        """A row read after the upsert statement, before its commit, isn't served afterwards"""
+        profile = SummonerProfile("p1", "Some Name", "", 1, "GOLD", "I", 1, 1, 1)
+        asyncio.run(Summoners.upsert_profiles([profile], "na1"))
+        upsert = Summoners.upsert.__func__
+
+        async def upsert_then_read(cls, rows, index_elements, orig_session=None):
+            await upsert(cls, rows, index_elements, orig_session)
+            # Another command reads the row before the write commits.
+            read = await asyncio.ensure_future(
+                check_cached("p1", Summoners, Summoners.puuid)
+            )
+            assert read["dict"]["league_points"] == 1
+
+        monkeypatch.setattr(Summoners, "upsert", classmethod(upsert_then_read))
+        profile.league_points = 99
+        asyncio.run(Summoners.upsert_profiles([profile], "na1"))
+
+        read = asyncio.run(check_cached("p1", Summoners, Summoners.puuid))
+        assert read["dict"]["league_points"] == 99
+
+    def test_check_cached_reads_db_once(root_path, sqlite_db):
+        """Second lookup is served from memory until the row is updated"""
+        sqlite_db.execute(
+            Summoners.__table__.insert().values(
+                summoner_name="Some Name",
+                normalized_name="somename",
+                puuid="p1",
+                tier_division="GOLD",
+                tier_rank="I",
+                league_points=1,
+            )
+        )
+        stats = row_caches["summoners"].stats()
+
+        first = asyncio.run(
+            check_cached("somename", Summoners, Summoners.normalized_name)
+        )
+        second = asyncio.run(check_cached("p1", Summoners, Summoners.puuid))
+        assert first["dict"]["summoner_name"] == second["dict"]["summoner_name"]
+        assert row_caches["summoners"].stats()["hits"] == stats["hits"] + 1
+
+        profile = SummonerProfile("p1", "Some Name", "", 1, "GOLD", "I", 1, 1, 50)
+        asyncio.run(Summoners.upsert_profiles([profile], "na1"))
+        third = asyncio.run(
+            check_cached("somename", Summoners, Summoners.normalized_name)
+        )
+        assert third["dict"]["league_points"] == 50
+
+    def test_warm_up_caches(root_path, sqlite_db, fake_transport):
+        """Static data, recent rosters and their summoners are loaded into memory"""
+        fake_transport.routes["/realms/na.json"] = {"v": "1.1.1", "n": {"champion": "1.1.1"}}
+        profile = SummonerProfile("p1", "Some Name", "", 1, "GOLD", "I", 1, 1, 1)
+        asyncio.run(Summoners.upsert_profiles([profile], "na1"))
+        asyncio.run(add_members(1, [profile]))
+        for row_cache in row_caches.values():
+            row_cache.clear()
+
+        report = asyncio.run(warm_up_caches(roster_limit=5, budget=5))
+
+        assert (report["static_data"], report["rosters"], report["summoners"]) == (True, 1, 1)
+        assert not report["timed_out"]
+        assert row_caches["summoners"].lookup(
+            ("region", "normalized_name"), ("na1", "somename")
+        ) is not None
+        assert row_caches["roster_entries"].lookup("channel_id", 1) is not None
+
+    def test_warm_up_stops_at_budget(root_path, sqlite_db, fake_transport):
+        """Nothing more is loaded once the time budget is used"""
+        report = asyncio.run(warm_up_caches(budget=0))
+        assert report["timed_out"]
+        assert report["rosters"] == 0
+
+    def test_warm_up_reports_loader_error(root_path, sqlite_db, fake_transport, monkeypatch):
+        """A failing loader stops warm-up with the error in the report instead of raising"""
+        fake_transport.routes["/realms/na.json"] = {"v": "1.1.1", "n": {"champion": "1.1.1"}}
+
+        async def failing_load(limit, shards=None):
+            raise ConnectionError("db is down")
+
+        monkeypatch.setattr(warm_up, "cache_recent_rosters", failing_load)
+        report = asyncio.run(warm_up_caches(budget=5))
+
+        assert report["error"] == "db is down"
+        assert report["static_data"]
+        assert (report["rosters"], report["timed_out"]) == (0, False)
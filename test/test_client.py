@@ -0,0 +1,75 @@
+import asyncio
+import time
+import pytest
+
+from riot_api.client import RiotClient, ApiError, Transport, Response
+
+
+class SlowTransport(Transport):
+    """Transport that takes 'delay' seconds to respond"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.headers = []
+
+    async def get(self, url, params=None, headers=None):
+        self.headers.append(headers)
+        await asyncio.sleep(self.delay)
+        if "missing" in url:
+            return Response(404, {}, None)
+        return Response(200, {}, {"url": url})
+
+
+# pylint: disable=E0213,R0201,C0103
+class TestRiotClient():
+    """
+    Class to test riot_api/client.py
+    """
+
+    def test_request_sends_api_key_only_to_riot_api(root_path):
+        """Api key goes to riot api but not to data dragon"""
+        transport = SlowTransport(0)
+        client = RiotClient("KEY", transport)
+
+        async def run():
+            await client.summoner_by_name("na1", "some name")
+            await client.versions_for_region("na1")
+
+        asyncio.run(run())
+        assert transport.headers[0] == {"X-Riot-Token": "KEY"}
+        assert transport.headers[1] is None
+
+    def test_request_raises_api_error_with_status(root_path):
+        """Non 2xx responses raise ApiError that still contains the status code"""
+        client = RiotClient("KEY", SlowTransport(0))
+        with pytest.raises(ApiError) as error:
+            asyncio.run(client.summoner_by_name("na1", "missing"))
+        assert error.value.status_code == 404
+        assert "404" in str(error.value)
+
+    def test_requests_do_not_block_event_loop(root_path):
+        """Concurrent lookups overlap instead of running back to back"""
+        client = RiotClient("KEY", SlowTransport(0.1))
+
+        async def run():
+            await asyncio.gather(
+                *[client.summoner_by_name("na1", f"name{i}") for i in range(5)]
+            )
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        assert time.perf_counter() - start < 0.3
+
+    def test_each_route_has_its_own_scheduler(root_path):
+        """Platforms and regional routes are rate limited separately"""
+        client = RiotClient("KEY", SlowTransport(0))
+
+        async def run():
+            await client.summoner_by_name("na1", "name")
+            await client.summoner_by_name("euw1", "name")
+            await client.match_by_id("euw1", "EUW1_1")
+            await client.match_by_id("eun1", "EUN1_1")
+
+        asyncio.run(run())
+        assert sorted(client.schedulers) == ["europe", "euw1", "na1"]
+        assert client.schedulers["europe"].stats()["total_requests"] == 2
@@ -0,0 +1,61 @@
+import asyncio
+
+from riot_api.client import ApiError
+from riot_api.methods import create_summoners_list
+from db.models.summoners import Summoners, SummonerProfile
+
+
+# pylint: disable=E0213,R0201,C0103,W0613
+class TestCreateSummonerList():
+    """
+    Class to test functionality from create_summoners_list.py file
+    """
+
+    def test_create_summoner_list_keeps_partial_results(
+        root_path, monkeypatch, sqlite_db
+    ):
+        """
+        Test Scenario:
+        - One of the names is not a valid summoner
+        Expected Result: valid summoners are returned and saved, invalid name is reported
+        """
+
+        async def fake_lookup_summoner_rank(name, region):
+            if name == "invalid":
+                raise ApiError(404, "by-name")
+            profile = SummonerProfile(f"puuid-{name}", name, "", 1, "GOLD", "II", 1, 1, 10)
+            return profile, True
+
+        monkeypatch.setattr(
+            create_summoners_list, "lookup_summoner_rank", fake_lookup_summoner_rank
+        )
+        members, failed = asyncio.run(
+            create_summoners_list.create_summoner_list(["a", "invalid", "b", "A "])
+        )
+
+        assert [member.summoner_name for member in members] == ["a", "b"]
+        assert list(failed) == ["invalid"]
+        assert "404" in str(failed["invalid"])
+        saved = sqlite_db.execute(Summoners.__table__.select()).fetchall()
+        assert sorted(row.puuid for row in saved) == ["puuid-a", "puuid-b"]
+
+    def test_resolve_summoners_bounded_concurrency(root_path, monkeypatch):
+        """Never more than 'limit' lookups in flight at once"""
+        in_flight = []
+        max_in_flight = []
+
+        async def fake_lookup_summoner_rank(name, region):
+            in_flight.append(name)
+            max_in_flight.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(name)
+            return {"puuid": name}, False
+
+        monkeypatch.setattr(
+            create_summoners_list, "lookup_summoner_rank", fake_lookup_summoner_rank
+        )
+        names = [f"name{i}" for i in range(10)]
+        results = asyncio.run(create_summoners_list.resolve_summoners(names, limit=3))
+
+        assert [name for name, _ in results] == names
+        assert max(max_in_flight) == 3
@@ -0,0 +1,142 @@
+import asyncio
+import datetime
+
+from db.cache import row_caches
+from db.models.summoners import Summoners, SummonerProfile
+from db.repositories.roster import add_members, get_roster
+from riot_api.methods.get_rank import (
+    lookup_summoner_rank,
+    get_summoner_rank,
+    refresh_summoner_rank,
+    refresh_tasks,
+)
+from riot_api.methods.utils import is_stale
+
+def save_summoner(sqlite_db, updated_at):
+    """'Some Name' saved in na1 at 'updated_at'"""
+    profile = SummonerProfile("p1", "Some Name", "", 1, "GOLD", "I", 1, 1, 1)
+    sqlite_db.execute(
+        Summoners.__table__.insert().values(
+            **Summoners.record_values(profile, "na1"), updated_at=updated_at
+        )
+    )
+    return profile
+
+
+# pylint: disable=E0213,R0201,C0103,W0613
+class TestLookupSummonerRank():
+    """
+    Class to test riot_api/methods/get_rank.py against sqlite and fake riot api
+    """
+
+    def test_stale_row_refreshed_once_in_background(
+        root_path, sqlite_db, fake_transport, ranked_summoner
+    ):
+        """Stale row is returned at once; concurrent lookups start one refresh"""
+        updated_at = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+        saved = save_summoner(sqlite_db, updated_at)
+        ranked_summoner("p1", "Some Name")
+
+        send = fake_transport.get
+
+        async def run():
+            # Riot api answers only after every lookup returned.
+            answered = asyncio.Event()
+
+            async def slow_get(url, params=None, headers=None):
+                await answered.wait()
+                return await send(url, params, headers)
+
+            fake_transport.get = slow_get
+            results = await asyncio.gather(
+                *[lookup_summoner_rank("Some Name", "na1") for _ in range(3)]
+            )
+            assert len(refresh_tasks) == 1
+            answered.set()
+            await asyncio.gather(*refresh_tasks.values())
+            return results
+
+        results = asyncio.run(run())
+
+        # Lookups didn't wait for the refresh; they got the saved rank.
+        assert results == [(saved, False)] * 3
+        by_puuid = [url for url in fake_transport.calls if "/by-puuid/" in url]
+        assert len(by_puuid) == 1
+        row = sqlite_db.execute(Summoners.__table__.select()).fetchone()
+        assert (row.tier_division, row.league_points) == ("PLATINUM", 75)
+        assert row.updated_at > updated_at
+        # The cached row was dropped; the next lookup reads the new one.
+        assert row_caches["summoners"].lookup("puuid", "p1") is None
+        profile, _ = asyncio.run(lookup_summoner_rank("Some Name", "na1"))
+        assert profile.league_points == 75
+
+    def test_saved_name_needs_no_riot_api_call(root_path, sqlite_db, fake_transport):
+        """Fresh saved row is found by any spelling of its name without calling riot api"""
+        saved = save_summoner(sqlite_db, datetime.datetime.utcnow())
+
+        for name in ["Some Name", "somename", "SOMENAME ", "some name"]:
+            assert asyncio.run(lookup_summoner_rank(name, "na1")) == (saved, False)
+        assert fake_transport.calls == []
+        assert not refresh_tasks
+
+    def test_unknown_name_fetched_and_saved(
+        root_path, sqlite_db, fake_transport, ranked_summoner
+    ):
+        """A name we don't have is fetched by name once, then served from db"""
+        ranked_summoner("p1", "Some Name")
+        fake_transport.routes["/summoners/by-name/"] = fake_transport.routes[
+            "/summoners/by-puuid/"
+        ]
+
+        profile = asyncio.run(get_summoner_rank("Some Name", "na1"))
+
+        assert (profile.puuid, profile.league_points) == ("p1", 75)
+        by_name = [url for url in fake_transport.calls if "/by-name/" in url]
+        assert len(by_name) == 1
+        row = sqlite_db.execute(Summoners.__table__.select()).fetchone()
+        assert (row.puuid, row.region, row.normalized_name) == ("p1", "na1", "somename")
+
+        fake_transport.calls.clear()
+        assert asyncio.run(lookup_summoner_rank("somename", "na1")) == (profile, False)
+        assert fake_transport.calls == []
+
+    def test_row_without_stats_is_looked_up_again(
+        root_path, sqlite_db, fake_transport, ranked_summoner
+    ):
+        """Migrated rows with NULL stats are fetched instead of shown"""
+        sqlite_db.execute(
+            Summoners.__table__.insert().values(
+                puuid="p1", summoner_name="Some Name", normalized_name="somename", region="na1"
+            )
+        )
+        ranked_summoner("p1", "Some Name")
+        fake_transport.routes["/summoners/by-name/"] = fake_transport.routes[
+            "/summoners/by-puuid/"
+        ]
+
+        profile = asyncio.run(get_summoner_rank("Some Name", "na1"))
+
+        assert (profile.solo_win, profile.solo_loss) == (5, 4)
+        row = sqlite_db.execute(Summoners.__table__.select()).fetchone()
+        assert row.solo_win == 5
+
+    def test_refresh_drops_cached_rosters(
+        root_path, sqlite_db, fake_transport, ranked_summoner
+    ):
+        """A rank refreshed by 'rank' shows in 'teams' rosters cached before it"""
+        updated_at = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+        saved = save_summoner(sqlite_db, updated_at)
+        asyncio.run(add_members(1, [saved]))
+        assert asyncio.run(get_roster(1))[0]["league_points"] == 1
+        ranked_summoner("p1", "Some Name")
+
+        asyncio.run(refresh_summoner_rank("p1", "na1"))
+
+        assert asyncio.run(get_roster(1))[0]["league_points"] == 75
+
+    def test_is_stale(root_path):
+        """Rows older than ttl, or without updated_at, are stale"""
+        now = datetime.datetime.utcnow()
+        assert is_stale(None, 60)
+        assert is_stale(now - datetime.timedelta(seconds=120), 60)
+        assert not is_stale(now, 60)
@@ -0,0 +1,154 @@
+import time
+from itertools import combinations
+
+from utils.make_teams import balance_teams, make_teams, estimate_mmr, solve_teams
+from utils.utils import parse_team_options
+
+TIERS = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "DIAMOND"]
+RANKS = ["IV", "III", "II", "I"]
+
+
+def create_summoners(number_of_summoners=10):
+    """Summoners of mixed tiers"""
+    summoners = []
+    for index in range(number_of_summoners):
+        summoners.append(
+            {
+                "puuid": f"puuid{index}",
+                "summoner_name": f"name{index}",
+                "tier_division": TIERS[(index * 7) % len(TIERS)],
+                "tier_rank": RANKS[(index * 3) % len(RANKS)],
+                "league_points": (index * 37) % 100,
+            }
+        )
+    return summoners
+
+
+def brute_force_difference(summoners):
+    """Smallest mmr difference checking every split"""
+    total = sum(estimate_mmr(s) for s in summoners)
+    return min(
+        abs(total - 2 * sum(estimate_mmr(s) for s in blue))
+        for blue in combinations(summoners, 5)
+    )
+
+
+# pylint: disable=E0213,R0201,C0103
+class TestMakeTeams():
+    """
+    Class to test utils/make_teams.py
+    """
+
+    def test_estimate_mmr_tier_outweighs_rank(root_path):
+        """Gold IV 0LP is above Silver I 99LP"""
+        gold = {"tier_division": "GOLD", "tier_rank": "IV", "league_points": 0}
+        silver = {"tier_division": "SILVER", "tier_rank": "I", "league_points": 99}
+        assert estimate_mmr(gold) > estimate_mmr(silver)
+
+    def test_balance_teams_finds_minimum_difference(root_path):
+        """Best split matches brute force, and alternatives are distinct and sorted"""
+        summoners = create_summoners()
+        splits = balance_teams(summoners, top_k=5)
+
+        assert splits[0].difference == brute_force_difference(summoners)
+        assert [split.difference for split in splits] == sorted(
+            split.difference for split in splits
+        )
+        blue_teams = {frozenset(s["puuid"] for s in split.blue) for split in splits}
+        assert len(blue_teams) == 5
+        for split in splits:
+            assert len(split.blue) == len(split.red) == 5
+
+    def test_make_teams_pluggable_mmr(root_path):
+        """Custom mmr function is used for balancing"""
+        summoners = create_summoners()
+        blue, red = make_teams(summoners, mmr=lambda s: int(s["puuid"][-1]))[:2]
+        assert sum(int(s["puuid"][-1]) for s in blue) in (22, 23)
+        assert len(red) == 5
+
+    def test_balance_teams_is_fast(root_path):
+        """Well under a millisecond per call"""
+        summoners = create_summoners()
+        balance_teams(summoners)
+        start = time.perf_counter()
+        for _ in range(200):
+            balance_teams(summoners, top_k=5)
+        assert (time.perf_counter() - start) / 200 < 0.001
+
+    def test_solve_teams_matches_balance_teams(root_path):
+        """Without roles or rules, branch and bound finds the same difference"""
+        summoners = create_summoners()
+        assignment = solve_teams(summoners)[0]
+        assert assignment.difference == brute_force_difference(summoners)
+        assert assignment.off_roles == 0
+
+    def test_make_teams_roles(root_path):
+        """Players who picked the same role are split when it costs little mmr"""
+        summoners = create_summoners()
+        for summoner in summoners:
+            summoner["roles"] = ["support"]
+        summoners[0]["roles"] = summoners[1]["roles"] = ["jungle"]
+        teams = make_teams(summoners)
+
+        # One support and one jungle per team are on role.
+        assert teams.off_roles == 6
+        blue_puuids = {summoner["puuid"] for summoner in teams.blue}
+        assert ("puuid0" in blue_puuids) != ("puuid1" in blue_puuids)
+        assert sorted(teams.roles[s["puuid"]] for s in teams.blue) == sorted(
+            ["top", "jungle", "mid", "adc", "support"]
+        )
+
+    def test_make_teams_together_apart(root_path):
+        """Together pairs share a team and apart pairs don't"""
+        summoners = create_summoners()
+        teams = make_teams(
+            summoners,
+            together=[("puuid0", "puuid5")],
+            apart=[("puuid2", "puuid3")],
+        )
+        for team in (teams.blue, teams.red):
+            puuids = {summoner["puuid"] for summoner in team}
+            assert ("puuid0" in puuids) == ("puuid5" in puuids)
+            assert not {"puuid2", "puuid3"} <= puuids
+
+    def test_make_teams_bench(root_path):
+        """15 players make two teams of 5 and a bench of 5, quickly"""
+        summoners = create_summoners(15)
+        for index, summoner in enumerate(summoners):
+            summoner["roles"] = [["top", "mid"], ["adc"], ["jungle", "support"]][index % 3]
+        start = time.perf_counter()
+        teams = make_teams(summoners, together=[("puuid0", "puuid14")])
+        assert time.perf_counter() - start < 5
+        assert len(teams.blue) == len(teams.red) == len(teams.bench) == 5
+        assert len({s["puuid"] for s in teams.blue + teams.red + teams.bench}) == 15
+
+    def test_make_teams_without_roles_assigns_none(root_path):
+        """Bench or together/apart teams of players without roles get no roles"""
+        teams = make_teams(create_summoners(12))
+        assert len(teams.bench) == 2
+        assert (teams.roles, teams.off_roles) == ({}, 0)
+
+        teams = make_teams(create_summoners(), together=[("puuid0", "puuid5")])
+        assert teams.roles == {}
+
+    def test_make_teams_overlapping_roles_fast(root_path):
+        """15 players who all picked the same roles don't make a slow search"""
+        for roles, off_roles in ((["top"], 8), (["top", "mid"], 6)):
+            summoners = create_summoners(15)
+            for summoner in summoners:
+                summoner["roles"] = roles
+            start = time.perf_counter()
+            teams = make_teams(summoners)
+            assert time.perf_counter() - start < 0.5
+            assert teams.off_roles == off_roles
+            # Off roles are the same in every split; the 10 players are balanced.
+            assert teams.difference == brute_force_difference(teams.blue + teams.red)
+
+    def test_parse_team_options(root_path):
+        """Number and together/apart pairs are parsed from 'teams' command"""
+        assert parse_team_options("2; together a, b c; apart d, e") == (
+            2,
+            [("a", "b c")],
+            [("d", "e")],
+        )
+        assert parse_team_options("") == (1, [], [])
@@ -0,0 +1,113 @@
+import asyncio
+
+from db.models.summoners import Summoners
+from riot_api import previous_match, summarize_match, match_history
+
+
+def create_participant(index, win):
+    """match-v5 participant"""
+    return {
+        "puuid": f"puuid{index}",
+        "riotIdGameName": f"name{index}",
+        "championId": 266,
+        "championName": "Aatrox",
+        "kills": index,
+        "deaths": 1,
+        "assists": 2,
+        "totalDamageDealtToChampions": 1000 * index,
+        "win": win,
+        "teamId": 100 if win else 200,
+    }
+
+
+def create_match_detail(match_id):
+    """match-v5 match"""
+    return {
+        "metadata": {"matchId": match_id},
+        "info": {
+            "gameMode": "CLASSIC",
+            "gameDuration": 1865,
+            "gameEndTimestamp": 1,
+            "participants": [create_participant(i, i < 5) for i in range(10)],
+        },
+    }
+
+
+MATCH_DETAIL = create_match_detail("NA1_1")
+
+
+# pylint: disable=E0213,R0201,C0103,W0613
+class TestPreviousMatch():
+    """
+    Class to test riot_api/methods/previous_match.py
+    """
+
+    def test_summarize_match(root_path):
+        """Participants are listed in match order and split by team"""
+        summary = summarize_match(MATCH_DETAIL, "puuid7")
+        assert summary["player"]["damage"] == 7000
+        assert summary["player"]["win"] is False
+        assert len(summary["teams"][100]) == len(summary["teams"][200]) == 5
+        assert [p["puuid"] for p in summary["participants"]][:3] == [
+            "puuid0",
+            "puuid1",
+            "puuid2",
+        ]
+        assert summary["duration"] == 1865
+
+    def test_previous_match_uses_cached_puuid(root_path, fake_transport, sqlite_db):
+        """Saved summoners skip summoner lookup and go straight to match-v5"""
+        sqlite_db.execute(
+            Summoners.__table__.insert().values(
+                summoner_name="name3",
+                normalized_name="name3",
+                puuid="puuid3",
+                region="euw1",
+            )
+        )
+        fake_transport.routes["/by-puuid/puuid3/ids"] = ["NA1_1"]
+        fake_transport.routes["/matches/NA1_1"] = MATCH_DETAIL
+
+        summary = asyncio.run(previous_match("Name 3", "euw1"))
+        assert summary["player"]["summoner_name"] == "name3"
+        assert not any("/summoners/by-name/" in url for url in fake_transport.calls)
+        # euw1 matches are on the europe route.
+        assert fake_transport.calls[0].startswith("https://europe.api.riotgames.com")
+
+    def test_match_history_fetches_only_new_matches(
+        root_path, fake_transport, sqlite_db
+    ):
+        """Saved matches are read from db; only new match ids hit riot api"""
+        fake_transport.routes["/summoners/by-name/"] = {"puuid": "puuid3"}
+        fake_transport.routes["/by-puuid/puuid3/ids"] = ["NA1_2", "NA1_1"]
+        fake_transport.routes["/matches/NA1_1"] = create_match_detail("NA1_1")
+        fake_transport.routes["/matches/NA1_2"] = create_match_detail("NA1_2")
+
+        first = asyncio.run(match_history("name3"))
+        fake_transport.calls.clear()
+        fake_transport.routes["/by-puuid/puuid3/ids"] = ["NA1_3", "NA1_2", "NA1_1"]
+        fake_transport.routes["/matches/NA1_3"] = create_match_detail("NA1_3")
+        second = asyncio.run(match_history("name3"))
+
+        match_calls = [url for url in fake_transport.calls if "/matches/NA1_" in url]
+        assert match_calls == ["https://americas.api.riotgames.com/lol/match/v5/matches/NA1_3"]
+        assert [summary["match_id"] for summary in second] == ["NA1_3", "NA1_2", "NA1_1"]
+        assert second[1]["player"] == first[0]["player"]
+        assert len(second[2]["teams"][200]) == 5
+
+    def test_saved_match_keeps_bots(root_path, fake_transport, sqlite_db):
+        """Bots all have puuid 'BOT'; every one of them is saved and read back"""
+        match_detail = create_match_detail("NA1_1")
+        for participant in match_detail["info"]["participants"][5:]:
+            participant["puuid"] = "BOT"
+        fake_transport.routes["/summoners/by-name/"] = {"puuid": "puuid3"}
+        fake_transport.routes["/by-puuid/puuid3/ids"] = ["NA1_1"]
+        fake_transport.routes["/matches/NA1_1"] = match_detail
+
+        fetched = asyncio.run(match_history("name3"))[0]
+        saved = asyncio.run(match_history("name3"))[0]
+
+        assert len([url for url in fake_transport.calls if "/matches/NA1_1" in url]) == 1
+        assert saved["teams"] == fetched["teams"]
+        assert [p["kills"] for p in saved["teams"][200]] == [5, 6, 7, 8, 9]
+        assert saved["player"]["summoner_name"] == "name3"
@@ -0,0 +1,67 @@
+import asyncio
+import datetime
+
+from db.models.summoners import Summoners, SummonerProfile
+from db.repositories.roster import add_members, get_roster
+from riot_api.methods.roster_refresh import refresh_rosters
+
+
+def save_summoner(sqlite_db, puuid, updated_at):
+    """Summoner row with 'updated_at'"""
+    profile = SummonerProfile(puuid, puuid, "", 1, "GOLD", "I", 1, 1, 1)
+    sqlite_db.execute(
+        Summoners.__table__.insert().values(
+            **Summoners.record_values(profile, "euw1"), updated_at=updated_at
+        )
+    )
+    return profile
+
+
+# pylint: disable=E0213,R0201,C0103,W0613
+class TestRosterRefresh():
+    """
+    Class to test riot_api/methods/roster_refresh.py
+    """
+
+    def test_refresh_rosters_updates_old_members(
+        root_path, sqlite_db, fake_transport, ranked_summoner
+    ):
+        """Only old summoner rows of active rosters are fetched; cached roster is updated"""
+        now = datetime.datetime.utcnow()
+        old = save_summoner(sqlite_db, "old", now - datetime.timedelta(days=1))
+        fresh = save_summoner(sqlite_db, "fresh", now)
+        asyncio.run(add_members(1, [old, fresh]))
+        assert asyncio.run(get_roster(1))[0]["league_points"] == 1
+
+        ranked_summoner("old", "old")
+
+        assert asyncio.run(refresh_rosters(ttl=3600)) == 1
+        by_puuid = [url for url in fake_transport.calls if "/by-puuid/" in url]
+        assert [url.rsplit("/", 1)[-1] for url in by_puuid] == ["old"]
+        # Refreshed on the platform the summoner was saved from.
+        assert "euw1.api.riotgames.com" in by_puuid[0]
+
+        members = asyncio.run(get_roster(1))
+        assert (members[0]["tier_division"], members[0]["league_points"]) == ("PLATINUM", 75)
+        assert asyncio.run(refresh_rosters(ttl=3600)) == 0
+
+    def test_refresh_takes_name_of_renamed_summoner(
+        root_path, sqlite_db, fake_transport, ranked_summoner
+    ):
+        """A summoner renamed to a name we saved for another summoner gets the name"""
+        now = datetime.datetime.utcnow()
+        old = save_summoner(sqlite_db, "old", now - datetime.timedelta(days=1))
+        taken = save_summoner(sqlite_db, "taken", now)
+        asyncio.run(add_members(1, [old, taken]))
+
+        # 'old' took the name 'taken' had when we saved it.
+        ranked_summoner("old", "Taken")
+
+        assert asyncio.run(refresh_rosters(ttl=3600)) == 1
+        rows = sqlite_db.execute(
+            Summoners.__table__.select().order_by(Summoners.puuid)
+        ).fetchall()
+        assert [(row.puuid, row.normalized_name) for row in rows] == [
+            ("old", "taken"),
+            ("taken", None),
+        ]
@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+
+from db.cache import row_caches
+from db.models.summoners import Summoners, SummonerProfile
+from db.repositories import roster
+from db.repositories.roster import (
+    get_roster,
+    add_members,
+    cache_recent_rosters,
+    clear_members,
+    remove_members,
+    set_member_roles,
+    RosterFullError,
+)
+
+# Discord guild ids are bigger than 32 bits.
+CHANNEL_ID = 876543210987654321
+
+
+def create_member(index):
+    """Summoner profile added to a roster"""
+    return SummonerProfile(f"puuid{index}", f"Name {index}", "", 1, "GOLD", "I", 0, 0, index)
+
+
+@pytest.fixture
+def summoners(sqlite_db):
+    """Summoner rows every roster entry refers to"""
+    for index in range(3):
+        sqlite_db.execute(
+            Summoners.__table__.insert().values(
+                summoner_name=f"Name {index}",
+                normalized_name=f"name{index}",
+                puuid=f"puuid{index}",
+                tier_division="GOLD",
+                tier_rank="I",
+                league_points=index,
+            )
+        )
+
+
+# pylint: disable=E0213,R0201,C0103,W0613,W0621
+class TestRosterRepository():
+    """
+    Class to test db/repositories/roster.py
+    """
+
+    def test_add_members_dedups_in_order(root_path, summoners):
+        """Members already in the roster are skipped; order is kept"""
+        asyncio.run(add_members(CHANNEL_ID, [create_member(1), create_member(0)]))
+        members = asyncio.run(add_members(CHANNEL_ID, [create_member(0), create_member(2)]))
+        assert [member["puuid"] for member in members] == ["puuid1", "puuid0", "puuid2"]
+        assert members[0]["tier_division"] == "GOLD"
+        assert asyncio.run(get_roster(CHANNEL_ID)) == members
+
+    def test_add_members_limit(root_path, summoners):
+        """Roster is left as it is when the limit would be exceeded"""
+        asyncio.run(add_members(CHANNEL_ID, [create_member(0)]))
+        with pytest.raises(RosterFullError) as error:
+            asyncio.run(add_members(CHANNEL_ID, [create_member(1), create_member(2)], limit=2))
+        assert error.value.available == 1
+        assert len(asyncio.run(get_roster(CHANNEL_ID))) == 1
+
+    def test_remove_members_all_or_nothing(root_path, summoners):
+        """Names are matched normalized; one wrong name removes nobody"""
+        asyncio.run(add_members(CHANNEL_ID, [create_member(0), create_member(1)]))
+        members, unmatched = asyncio.run(remove_members(CHANNEL_ID, ["name0", "missing"]))
+        assert unmatched == ["missing"]
+        assert len(members) == 2
+
+        members, unmatched = asyncio.run(remove_members(CHANNEL_ID, ["NAME 0"]))
+        assert unmatched == []
+        assert [member["puuid"] for member in members] == ["puuid1"]
+
+    def test_set_roles_and_clear(root_path, summoners):
+        """Roles are saved on the entry; clear deletes the roster"""
+        asyncio.run(add_members(CHANNEL_ID, [create_member(0)]))
+        members = asyncio.run(set_member_roles(CHANNEL_ID, "NAME 0", ["mid"]))
+        assert members[0]["roles"] == ["mid"]
+        assert asyncio.run(set_member_roles(CHANNEL_ID, "missing", ["mid"])) is None
+
+        assert asyncio.run(clear_members(CHANNEL_ID)) is True
+        assert asyncio.run(get_roster(CHANNEL_ID)) is None
+        assert asyncio.run(remove_members(CHANNEL_ID, ["name0"])) == (None, ["name0"])
+
+    def test_roster_changed_during_read_is_not_cached(root_path, summoners, monkeypatch):
+        """A roster read while another command changed it isn't kept in memory"""
+        asyncio.run(add_members(CHANNEL_ID, [create_member(0)]))
+        row_caches["roster_entries"].clear()
+        load_roster = roster.load_roster
+
+        async def load_roster_then_change(session, channel_id):
+            members = await load_roster(session, channel_id)
+            # 'add' in another command finishes before this read.
+            roster.invalidate_roster(channel_id)
+            return members
+
+        monkeypatch.setattr(roster, "load_roster", load_roster_then_change)
+        assert len(asyncio.run(get_roster(CHANNEL_ID))) == 1
+        assert row_caches["roster_entries"].lookup("channel_id", CHANNEL_ID) is None
+
+    def test_cache_recent_rosters(root_path, summoners):
+        """Most recently changed rosters are loaded into the roster cache"""
+        asyncio.run(add_members(1, [create_member(0)]))
+        asyncio.run(add_members(2, [create_member(1), create_member(2)]))
+        row_caches["roster_entries"].clear()
+
+        rosters = asyncio.run(cache_recent_rosters(1))
+
+        assert [member["puuid"] for member in rosters[2]] == ["puuid1", "puuid2"]
+        assert list(rosters) == [2]
+        assert row_caches["roster_entries"].lookup("channel_id", 2)["members"] == rosters[2]
+
+    def test_cache_recent_rosters_of_shards(root_path, summoners):
+        """Only rosters of guilds on the process's shards are loaded"""
+        # Discord puts a guild on shard (guild_id >> 22) % shard_count.
+        asyncio.run(add_members(0 << 22, [create_member(0)]))
+        asyncio.run(add_members(1 << 22, [create_member(1)]))
+
+        rosters = asyncio.run(cache_recent_rosters(5, shards=([1], 2)))
+
+        assert list(rosters) == [1 << 22]
@@ -0,0 +1,231 @@
+import sys
+import time
+import asyncio
+import subprocess
+
+from riot_api.client import Response
+from riot_api.budget import DatabaseBudget
+from riot_api.scheduler import (
+    RequestScheduler,
+    SharedBudget,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BACKGROUND,
+)
+from utils.utils import get_file_path
+
+# Takes requests from 'DatabaseBudget' until the window is full; prints how many it got.
+RESERVE_PROCESS = """
+import sys, time, asyncio
+from sqlalchemy.pool import NullPool
+from db.db import bind_async_engine, create_async_db_engine
+from riot_api.budget import DatabaseBudget
+
+db_url, start, limit = sys.argv[1], float(sys.argv[2]), int(sys.argv[3])
+bind_async_engine(create_async_db_engine(db_url, poolclass=NullPool))
+
+async def run():
+    budget = DatabaseBudget()
+    reserved = 0
+    while True:
+        wait = await budget.reserve([("na1", [(limit, 3600)])])
+        if wait == 0:
+            reserved += 1
+        elif wait > 60:
+            return reserved
+
+# Both processes start reserving at once.
+time.sleep(max(start - time.time(), 0))
+print(asyncio.run(run()))
+"""
+
+
+class FakeClock:
+    """Clock that only moves when the scheduler sleeps"""
+
+    def __init__(self):
+        self.time = 0
+
+    def now(self):
+        """Current fake time"""
+        return self.time
+
+    async def sleep(self, seconds):
+        """Move time forward instead of sleeping"""
+        self.time += seconds
+        await asyncio.sleep(0)
+
+
+def make_send(clock, sent, name, response=None):
+    """Create 'send' coroutine function recording (name, time) when called"""
+
+    async def send():
+        sent.append((name, clock.now()))
+        return response or Response(200, {}, name)
+
+    return send
+
+
+class FakeBudget(SharedBudget):
+    """Budget another process used up until 'full_until' on the fake clock"""
+
+    def __init__(self, clock, full_until):
+        self.clock = clock
+        self.full_until = full_until
+        self.reserved = []
+
+    async def reserve(self, buckets):
+        if self.clock.now() < self.full_until:
+            return self.full_until - self.clock.now()
+        self.reserved.append([key for key, _ in buckets])
+        return 0
+
+
+# pylint: disable=E0213,R0201,C0103
+class TestRequestScheduler():
+    """
+    Class to test riot_api/scheduler.py against a fake clock
+    """
+
+    def test_app_rate_limit_spreads_requests(root_path):
+        """Only 'limit' requests are sent per window"""
+        clock = FakeClock()
+        scheduler = RequestScheduler(clock, app_rate_limit="2:1")
+        sent = []
+
+        async def run():
+            await asyncio.gather(
+                *[
+                    scheduler.submit("m", make_send(clock, sent, i))
+                    for i in range(5)
+                ]
+            )
+
+        asyncio.run(run())
+        assert [time for _, time in sent] == [0, 0, 1, 1, 2]
+        assert scheduler.stats()["max_wait"] == 2
+
+    def test_interactive_goes_before_background(root_path):
+        """Queued interactive requests jump ahead of queued background ones"""
+        clock = FakeClock()
+        scheduler = RequestScheduler(clock, app_rate_limit="1:1")
+        sent = []
+
+        async def run():
+            await asyncio.gather(
+                scheduler.submit(
+                    "m", make_send(clock, sent, "bg1"), PRIORITY_BACKGROUND
+                ),
+                scheduler.submit(
+                    "m", make_send(clock, sent, "bg2"), PRIORITY_BACKGROUND
+                ),
+                scheduler.submit(
+                    "m", make_send(clock, sent, "rank"), PRIORITY_INTERACTIVE
+                ),
+            )
+
+        asyncio.run(run())
+        assert [name for name, _ in sent] == ["rank", "bg1", "bg2"]
+
+    def test_method_limit_from_headers(root_path):
+        """Method limit learned from headers holds back only that method"""
+        clock = FakeClock()
+        scheduler = RequestScheduler(clock, app_rate_limit="100:1")
+        sent = []
+        headers = {
+            "X-Method-Rate-Limit": "1:10",
+            "X-Method-Rate-Limit-Count": "1:10",
+        }
+
+        async def run():
+            await scheduler.submit(
+                "slow", make_send(clock, sent, "a", Response(200, headers, None))
+            )
+            await asyncio.gather(
+                scheduler.submit("slow", make_send(clock, sent, "b")),
+                scheduler.submit("fast", make_send(clock, sent, "c")),
+            )
+
+        asyncio.run(run())
+        assert sent == [("a", 0), ("c", 0), ("b", 10)]
+
+    def test_retry_after_429(root_path):
+        """429 is retried after 'Retry-After' seconds"""
+        clock = FakeClock()
+        scheduler = RequestScheduler(clock)
+        responses = [
+            Response(429, {"Retry-After": "3", "X-Rate-Limit-Type": "method"}, None),
+            Response(200, {}, "ok"),
+        ]
+        sent_at = []
+
+        async def send():
+            sent_at.append(clock.now())
+            return responses.pop(0)
+
+        async def run():
+            return await scheduler.submit("m", send)
+
+        response = asyncio.run(run())
+        assert response.body == "ok"
+        assert sent_at == [0, 3]
+        assert scheduler.stats()["total_retries"] == 1
+        assert scheduler.stats()["queue_depth"] == 0
+
+    def test_shared_budget_holds_requests(root_path):
+        """Requests wait while other processes have used the shared budget"""
+        clock = FakeClock()
+        budget = FakeBudget(clock, full_until=2)
+        scheduler = RequestScheduler(clock, budget=budget, budget_key="na1")
+        sent = []
+
+        asyncio.run(scheduler.submit("m", make_send(clock, sent, "a")))
+        assert sent == [("a", 2)]
+        assert budget.reserved == [["na1", "na1:m"]]
+
+
+# pylint: disable=E0213,R0201,C0103,W0613
+class TestDatabaseBudget():
+    """
+    Class to test riot_api/budget.py
+    """
+
+    def test_processes_share_windows(root_path, sqlite_db):
+        """Two processes' budgets together stay under one limit"""
+        clock = FakeClock()
+        first = DatabaseBudget(clock.now)
+        second = DatabaseBudget(clock.now)
+        buckets = [("na1", [(2, 1)]), ("na1:m", [])]
+
+        async def run():
+            return [
+                await first.reserve(buckets),
+                await second.reserve(buckets),
+                await second.reserve(buckets),
+            ]
+
+        assert asyncio.run(run()) == [0, 0, 1]
+        clock.time = 1
+        assert asyncio.run(first.reserve(buckets)) == 0
+
+    def test_two_processes_reserve_one_window(root_path, sqlite_db, tmp_path):
+        """Processes reserving at the same time together get exactly the limit"""
+        start = time.time() + 2
+        processes = [
+            subprocess.Popen(  # pylint: disable=consider-using-with
+                [
+                    sys.executable,
+                    "-c",
+                    RESERVE_PROCESS,
+                    f"sqlite:///{tmp_path / 'test.db'}",
+                    str(start),
+                    "40",
+                ],
+                cwd=get_file_path(""),
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for _ in range(2)
+        ]
+        reserved = [int(process.communicate(timeout=60)[0]) for process in processes]
+
+        assert sum(reserved) == 40
@@ -0,0 +1,50 @@
+import os
+import sys
+import json
+import subprocess
+
+from utils.utils import get_file_path
+
+# Seconds 'import bot' may take; raise it on slow machines.
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "2.0"))
+
+# Modules only loaded once they are used.
+LAZY_MODULES = ["discord", "numpy", "sqlalchemy", "aiohttp", "riot_api.methods"]
+
+
+def run_import(module):
+    """Import module in a new interpreter; returns (seconds, loaded modules of LAZY_MODULES)"""
+    code = f"""
+import sys, json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps([time.perf_counter() - start, [m for m in {LAZY_MODULES!r} if m in sys.modules]]))
+"""
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=get_file_path(""),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+# pylint: disable=E0213,R0201,C0103
+class TestStartup():
+    """
+    Class to test import time of bot and riot_api
+    """
+
+    def test_riot_api_import_is_lazy(root_path):
+        """Importing riot_api doesn't load methods, db or discord"""
+        _, loaded = run_import("riot_api")
+        assert loaded == []
+
+    def test_bot_import_time(root_path):
+        """Bot starts within the budget; numpy, riot_api methods and db load on first use"""
+        seconds, loaded = run_import("bot")
+        assert "numpy" not in loaded
+        assert "riot_api.methods" not in loaded
+        assert "sqlalchemy" not in loaded
+        assert seconds < IMPORT_TIME_BUDGET
@@ -0,0 +1,52 @@
+import asyncio
+
+from riot_api.client import RiotClient
+from riot_api.static_data import StaticDataStore
+
+
+def versions(champion_version):
+    """Data dragon realm response"""
+    return {"v": "11.15.1", "n": {"champion": champion_version}}
+
+
+CHAMPIONS = {"data": {"Aatrox": {"key": "266", "id": "Aatrox"}}}
+
+
+# pylint: disable=E0213,R0201,C0103
+class TestStaticDataStore():
+    """
+    Class to test riot_api/static_data.py
+    """
+
+    def test_champions_fetched_only_on_new_version(root_path, fake_transport, tmp_path):
+        """Refresh with the same champion version doesn't download champions again"""
+        store = StaticDataStore(
+            RiotClient("KEY", fake_transport), "na1", str(tmp_path / "data.json")
+        )
+        fake_transport.routes = {
+            "/realms/na.json": versions("11.15.1"),
+            "/champion.json": CHAMPIONS,
+        }
+
+        asyncio.run(store.refresh())
+        asyncio.run(store.refresh())
+
+        assert store.champion_name(266) == "Aatrox"
+        assert store.profile_icon_url(554).endswith("/11.15.1/img/profileicon/554.png")
+        assert len([url for url in fake_transport.calls if "champion" in url]) == 1
+
+    def test_ensure_loaded_reads_disk(root_path, fake_transport, tmp_path):
+        """Saved data is used on restart without calling data dragon"""
+        path = str(tmp_path / "data.json")
+        fake_transport.routes = {
+            "/realms/na.json": versions("11.15.1"),
+            "/champion.json": CHAMPIONS,
+        }
+        asyncio.run(StaticDataStore(RiotClient("KEY", fake_transport), "na1", path).refresh())
+        fake_transport.calls.clear()
+
+        restarted = StaticDataStore(RiotClient("KEY", fake_transport), "na1", path)
+        asyncio.run(restarted.ensure_loaded())
+
+        assert restarted.champion_name("266") == "Aatrox"
+        assert fake_transport.calls == []
@@ -0,0 +1,153 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+import discord
+
+from utils.assets import AssetRegistry
+from utils.embed_object import EmbedData
+from utils.utils import TypingIndicator, parse_region, parse_shard_ids
+
+
+class FakeContext:
+    """Context that counts how many times typing was shown"""
+
+    def __init__(self):
+        self.typing_count = 0
+
+    def typing(self):
+        """Same as discord 'ctx.typing()'"""
+        self.typing_count += 1
+        return asyncio.Lock()
+
+
+class FailingContext:
+    """Context of a channel the bot can't type in"""
+
+    def typing(self):
+        """Same as discord 'ctx.typing()' without permission"""
+        raise RuntimeError("403 Forbidden")
+
+
+class FakeSendContext:
+    """Context that keeps what was sent; uploaded thumbnails get a cdn url"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, embed, file=None):
+        """Same as discord 'ctx.send()'"""
+        self.sent.append((embed, file))
+        if file is not None:
+            embed = embed.copy().set_thumbnail(url=f"https://cdn.test/{file.filename}")
+        return SimpleNamespace(embeds=[embed])
+
+
+def create_embed_data():
+    """Minimal embed"""
+    embed_data = EmbedData()
+    embed_data.title = "title"
+    embed_data.description = "description"
+    embed_data.color = discord.Color.blue()
+    return embed_data
+
+
+# pylint: disable=E0213,R0201,C0103
+class TestTypingIndicator():
+    """
+    Class to test TypingIndicator in utils/utils.py
+    """
+
+    def test_fast_work_has_no_typing(root_path):
+        """Work finished before the delay doesn't show typing or wait"""
+        ctx = FakeContext()
+
+        async def run():
+            async with TypingIndicator(ctx, delay=0.5):
+                await asyncio.sleep(0)
+
+        asyncio.run(asyncio.wait_for(run(), 0.1))
+        assert ctx.typing_count == 0
+
+    def test_slow_work_shows_typing(root_path):
+        """Typing is shown once work takes longer than the delay"""
+        ctx = FakeContext()
+
+        async def run():
+            async with TypingIndicator(ctx, delay=0.01):
+                await asyncio.sleep(0.05)
+
+        asyncio.run(run())
+        assert ctx.typing_count == 1
+
+    def test_typing_error_does_not_fail_command(root_path):
+        """Typing that can't be shown (eg. discord.Forbidden) is only logged"""
+        ctx = FailingContext()
+
+        async def run():
+            async with TypingIndicator(ctx, delay=0):
+                await asyncio.sleep(0.01)
+            return "done"
+
+        assert asyncio.run(run()) == "done"
+
+
+# pylint: disable=E0213,R0201,C0103
+class TestAssetRegistry():
+    """
+    Class to test AssetRegistry in utils/assets.py
+    """
+
+    def test_image_uploaded_once(root_path):
+        """Second embed reuses the url of the first upload until it expires"""
+        now = [0]
+        assets = AssetRegistry(base_url=None, ttl=10, clock=lambda: now[0])
+        ctx = FakeSendContext()
+
+        for _ in range(2):
+            asyncio.run(assets.send_embed(ctx, create_embed_data(), "blue-minion.png"))
+        now[0] = 11
+        asyncio.run(assets.send_embed(ctx, create_embed_data(), "blue-minion.png"))
+
+        assert [file is not None for _, file in ctx.sent] == [True, False, True]
+        assert ctx.sent[1][0].thumbnail.url == "https://cdn.test/blue-minion.png"
+
+    def test_base_url_never_uploads(root_path):
+        """Images are served from ASSET_BASE_URL when it is set"""
+        assets = AssetRegistry(base_url="https://static.test/images/")
+        ctx = FakeSendContext()
+
+        asyncio.run(assets.send_embed(ctx, create_embed_data(), "Emblem_Gold.png"))
+
+        embed, file = ctx.sent[0]
+        assert file is None
+        assert embed.thumbnail.url == "https://static.test/images/Emblem_Gold.png"
+
+
+# pylint: disable=E0213,R0201,C0103
+class TestParseRegion():
+    """
+    Class to test parse_region in utils/utils.py
+    """
+
+    def test_platforms_and_short_names(root_path):
+        """Both 'euw1' and 'EUW' are euw1; unknown regions raise ValueError"""
+        assert parse_region("euw1") == "euw1"
+        assert parse_region(" EUW ") == "euw1"
+        assert parse_region("kr") == "kr"
+        with pytest.raises(ValueError):
+            parse_region("mars")
+
+
+# pylint: disable=E0213,R0201,C0103
+class TestParseShardIds():
+    """
+    Class to test parse_shard_ids in utils/utils.py
+    """
+
+    def test_ids_and_ranges(root_path):
+        """Ranges are expanded; unknown input raises ValueError"""
+        assert parse_shard_ids("0-3") == [0, 1, 2, 3]
+        assert parse_shard_ids("4, 0-1,1") == [0, 1, 4]
+        with pytest.raises(ValueError):
+            parse_shard_ids("first")
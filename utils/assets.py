@@ -0,0 +1,74 @@
+"""
+URLs of the images in images/ used as embed thumbnails
+
+With 'ASSET_BASE_URL' set, images are served from there and never uploaded.
+Otherwise an image is uploaded with the first embed that uses it, and the
+CDN url discord gives the uploaded thumbnail is reused for later embeds
+until 'ASSET_URL_TTL' seconds pass (discord attachment urls expire).
+"""
+
+import os
+import time
+
+import discord
+from dotenv import load_dotenv
+
+from .utils import get_file_path, create_embed
+
+load_dotenv()
+ASSET_BASE_URL = os.getenv("ASSET_BASE_URL")
+ASSET_URL_TTL = int(os.getenv("ASSET_URL_TTL", "43200"))
+
+
+class AssetRegistry:
+    """Image name (eg. 'Emblem_Gold.png') -> url of the image"""
+
+    def __init__(self, base_url=ASSET_BASE_URL, ttl=ASSET_URL_TTL, clock=None):
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.ttl = ttl
+        self.clock = clock or time.monotonic
+        # name -> (url, expires at)
+        self._urls = {}
+
+    def url(self, name):
+        """Url of the image, or None if it has to be uploaded"""
+        if self.base_url is not None:
+            return f"{self.base_url}/{name}"
+        entry = self._urls.get(name)
+        if entry is None or entry[1] <= self.clock():
+            return None
+        return entry[0]
+
+    def register(self, name, url):
+        """Save url discord gave the uploaded image"""
+        self._urls[name] = (url, self.clock() + self.ttl)
+
+    async def send_embed(self, ctx, embed_data, thumbnail_name):
+        """Send embed with image 'thumbnail_name' as thumbnail, uploading it only if needed
+        Parameters:
+        ctx (commands.Context): where the embed is sent
+        embed_data (EmbedData): embed; 'thumbnail' is set here
+        thumbnail_name (str): file name of an image in images/
+
+        Returns:
+        message (discord.Message): sent message
+
+        """
+        url = self.url(thumbnail_name)
+        if url is not None:
+            embed_data.thumbnail = url
+            return await ctx.send(embed=create_embed(embed_data))
+
+        # Note: attachment thumbnail takes the 'file name', not a full path.
+        embed_data.thumbnail = f"attachment://{thumbnail_name}"
+        message = await ctx.send(
+            file=discord.File(get_file_path(f"images/{thumbnail_name}")),
+            embed=create_embed(embed_data),
+        )
+        # Discord replaces 'attachment://' with the uploaded image's url.
+        if message is not None and message.embeds and message.embeds[0].thumbnail.url:
+            self.register(thumbnail_name, message.embeds[0].thumbnail.url)
+        return message
+
+
+assets = AssetRegistry()
@@ -37,3 +37,58 @@ TIER_VALUE = {
 }
 
 RANK_VALUE = {"I": 0.75, "II": 0.5, "III": 0.25, "IV": 0}
+
+# maximum number of summoner lookups sent to riot api at the same time
+MAX_CONCURRENT_LOOKUPS = 5
+
+# mmr of one tier for team balancing; a tier has 4 divisions of 100 LP each.
+MMR_PER_TIER = 400
+
+# number of alternative teams 'teams' command can show
+MAX_TEAM_ALTERNATIVES = 5
+
+# maximum number of players in a lobby; players over 10 sit on the bench
+MAX_NUM_PLAYERS_LOBBY = 15
+
+# number of players in one team
+TEAM_SIZE = 5
+
+# roles every team needs, in display order
+ROLES = ["top", "jungle", "mid", "adc", "support"]
+
+# other ways users type roles
+ROLE_ALIASES = {
+    "jg": "jungle",
+    "jung": "jungle",
+    "jungler": "jungle",
+    "middle": "mid",
+    "bot": "adc",
+    "bottom": "adc",
+    "carry": "adc",
+    "sup": "support",
+    "supp": "support",
+}
+
+# mmr cost of a player playing a role they didn't pick, for team balancing
+OFF_ROLE_PENALTY = 200
+
+# seconds a command can take before the typing indicator is shown
+TYPING_INDICATOR_DELAY = 0.3
+
+# riot platforms servers can pick with 'region' command -> op.gg region name
+REGIONS = {
+    "na1": "na",
+    "br1": "br",
+    "la1": "lan",
+    "la2": "las",
+    "kr": "kr",
+    "jp1": "jp",
+    "eun1": "eune",
+    "euw1": "euw",
+    "tr1": "tr",
+    "ru": "ru",
+    "oc1": "oce",
+}
+
+# other ways users type regions (eg. 'euw' for 'euw1')
+REGION_ALIASES = {name: platform for platform, name in REGIONS.items()}
@@ -1,47 +1,369 @@
-from .constants import TIER_VALUE, RANK_VALUE, UNCOMMON_TIERS
+import heapq
+import itertools
+from collections import namedtuple
+from functools import lru_cache
+from itertools import combinations, permutations
 
+from .constants import (
+    TIER_VALUE,
+    RANK_VALUE,
+    UNCOMMON_TIERS,
+    MMR_PER_TIER,
+    TEAM_SIZE,
+    ROLES,
+    OFF_ROLE_PENALTY,
+)
 
-def make_teams(list_of_summoners: dict):
-    """Gets the list of summoners and returns makes two teams
+# One way of splitting players into two teams.
+# blue/red (list): summoners of each team, difference (float): mmr difference
+TeamSplit = namedtuple("TeamSplit", ["blue", "red", "difference"])
+
+# Teams made by 'make_teams'.
+# blue/red/bench (list): summoners, difference (float): mmr difference,
+# off_roles (int): players not on a role they picked,
+# roles (dict): puuid -> role; empty when nobody picked roles
+TeamAssignment = namedtuple(
+    "TeamAssignment", ["blue", "red", "bench", "difference", "off_roles", "roles"]
+)
+
+# Role bit mask of a player without role preferences.
+ALL_ROLES_MASK = (1 << len(ROLES)) - 1
+
+
+def estimate_mmr(summoner: dict):
+    """
+    Default mmr estimate of a summoner from tier, rank and league points.
+    Every tier is worth 4 divisions and every division 100 LP, so a higher tier
+    always outweighs rank and LP of a lower one.
+    """
+    # Master and above have no divisions; their LP keeps going up instead.
+    tier_rank = (
+        "IV" if summoner["tier_division"] in UNCOMMON_TIERS else summoner["tier_rank"]
+    )
+    return (
+        TIER_VALUE.get(summoner["tier_division"]) + RANK_VALUE.get(tier_rank)
+    ) * MMR_PER_TIER + summoner["league_points"]
+
+
+@lru_cache(maxsize=None)
+def get_split_matrix(number_of_players: int):
+    """
+    Matrix of every distinct way to split players into two equal teams.
+    Each row has +1 for blue and -1 for red players. Player 0 is always blue,
+    so a split and its mirror (blue/red swapped) are counted once; 126 rows for 10.
+    """
+    team_size = number_of_players // 2
+    splits = []
+    for blue_rest in combinations(range(1, number_of_players), team_size - 1):
+        row = [-1] * number_of_players
+        for index in (0,) + blue_rest:
+            row[index] = 1
+        splits.append(row)
+
+    # numpy is loaded on the first 'teams' command, not on bot start.
+    # pylint: disable=import-outside-toplevel
+    import numpy as np
+
+    matrix = np.array(splits, dtype=np.float64)
+    matrix.setflags(write=False)
+    return matrix
+
+
+def balance_teams(list_of_summoners: list, top_k: int = 1, mmr=estimate_mmr):
+    """Finds the most balanced ways to split summoners into two teams
     Parameters:
-    list_of_summoners (dict): list of summoners
+    list_of_summoners (list): even number of summoners
+    top_k (int): number of splits to return
+    mmr (function): summoner -> mmr; 'estimate_mmr' by default
 
     Returns:
-    team_blue (dict): 1st team with 5 members
-    team_red (dict): 2nd team with 5 members
+    splits (list): 'TeamSplit's sorted by mmr difference, smallest first
 
     """
+    # pylint: disable=import-outside-toplevel
+    import numpy as np
 
-    for summoner in list_of_summoners:
+    split_matrix = get_split_matrix(len(list_of_summoners))
+    mmr_values = np.fromiter(
+        (mmr(summoner) for summoner in list_of_summoners),
+        dtype=np.float64,
+        count=len(list_of_summoners),
+    )
 
-        # since tier rank numbers for unranked, master, gm and challengers
-        # are automatically set to I but we need IV values for all of these tiers
-        if summoner["tier_division"] in UNCOMMON_TIERS:
-            summoner["tier_rank"] = "IV"
+    differences = np.abs(split_matrix @ mmr_values)
+    top_k = min(top_k, len(differences))
+    best = np.argpartition(differences, top_k - 1)[:top_k]
+    best = best[np.argsort(differences[best], kind="stable")]
 
-        # calculate value by adding tier_division, tier_rank_number
-        rank_value = (
-            float(TIER_VALUE.get(summoner["tier_division"]))
-            + RANK_VALUE.get(summoner["tier_rank"]) * 1000
-            + summoner["league_points"]
+    # Each team is listed from the highest mmr.
+    by_mmr = np.argsort(-mmr_values, kind="stable")
+    splits = []
+    for split_index in best:
+        row = split_matrix[split_index]
+        splits.append(
+            TeamSplit(
+                [list_of_summoners[i] for i in by_mmr if row[i] > 0],
+                [list_of_summoners[i] for i in by_mmr if row[i] < 0],
+                float(differences[split_index]),
+            )
         )
+    return splits
 
-        # update so that it can be used in display teams function
-        summoner.update({"rank_value": rank_value})
 
-    # sort list of summoners by highest rank value
-    sorted_list_of_summoners = sorted(
-        list_of_summoners, key=lambda i: i["rank_value"], reverse=True
-    )
+def get_role_mask(summoner: dict):
+    """Bit mask of roles the summoner picked; all roles if none were picked"""
+    mask = 0
+    for role in summoner.get("roles") or []:
+        if role in ROLES:
+            mask |= 1 << ROLES.index(role)
+    return mask or ALL_ROLES_MASK
+
+
+@lru_cache(maxsize=4096)
+def count_on_role(role_masks: tuple):
+    """Max number of players that can play one of their roles, each role used once"""
+    # used roles mask -> players on role
+    states = {0: 0}
+    for mask in role_masks:
+        next_states = dict(states)
+        for used, on_role in states.items():
+            free = mask & ~used
+            while free:
+                role_bit = free & -free
+                if next_states.get(used | role_bit, -1) < on_role + 1:
+                    next_states[used | role_bit] = on_role + 1
+                free ^= role_bit
+        states = next_states
+    return max(states.values())
+
+
+def count_off_role(role_masks: list):
+    """Players of a (partial) team that can't get a role they picked"""
+    return len(role_masks) - count_on_role(tuple(sorted(role_masks)))
+
+
+def assign_roles(team: list):
+    """Gives each team member a role, as many as possible on roles they picked"""
+    masks = [get_role_mask(summoner) for summoner in team]
+    best_roles, best_on_role = None, -1
+    for roles in permutations(range(len(ROLES)), len(team)):
+        on_role = sum(1 for mask, role in zip(masks, roles) if mask >> role & 1)
+        if on_role > best_on_role:
+            best_roles, best_on_role = roles, on_role
+    return {
+        summoner["puuid"]: ROLES[role] for summoner, role in zip(team, best_roles)
+    }
+
+
+def solve_teams(
+    list_of_summoners: list,
+    top_k: int = 1,
+    together=(),
+    apart=(),
+    mmr=estimate_mmr,
+):
+    """Finds the best teams using branch and bound
+    Cost of teams is mmr difference plus 'OFF_ROLE_PENALTY' per player off role.
+    Players over 10 go to the bench.
+    Parameters:
+    list_of_summoners (list): at least 10 summoners, earliest added first
+    top_k (int): number of team assignments to return
+    together (list): (puuid, puuid) pairs that must be on the same team
+    apart (list): (puuid, puuid) pairs that must not be on the same team
+    mmr (function): summoner -> mmr; 'estimate_mmr' by default
+
+    Returns:
+    assignments (list): 'TeamAssignment's sorted by cost, lowest first
+
+    """
+    players = list_of_summoners
+    number_of_players = len(players)
+    bench_size = number_of_players - 2 * TEAM_SIZE
+    if bench_size < 0:
+        raise ValueError(f"Need at least {2 * TEAM_SIZE} players to make teams")
+
+    mmrs = [mmr(summoner) for summoner in players]
+    masks = [get_role_mask(summoner) for summoner in players]
+    uses_roles = any(summoner.get("roles") for summoner in players)
+
+    # player index -> [(other player index, must be together)]
+    index_of = {summoner["puuid"]: index for index, summoner in enumerate(players)}
+    partners = [[] for _ in players]
+    for pairs, same_team in ((together, True), (apart, False)):
+        for first, second in pairs:
+            first, second = index_of[first], index_of[second]
+            partners[first].append((second, same_team))
+            partners[second].append((first, same_team))
+
+    # Remaining players' mmr from high to low, as prefix sums, for the bound.
+    suffix_sums = []
+    for start in range(number_of_players + 1):
+        sums = [0]
+        for value in sorted(mmrs[start:], reverse=True):
+            sums.append(sums[-1] + value)
+        suffix_sums.append(sums)
+
+    # Roles any player from index on picked; remaining players can't add others.
+    suffix_unions = [0] * (number_of_players + 1)
+    for index in range(number_of_players - 1, -1, -1):
+        suffix_unions[index] = suffix_unions[index + 1] | masks[index]
+
+    def off_role_bound(index):
+        """Fewest off-role players the finished teams can have
+        A team's on-role players are limited by the players still to join it,
+        and by the roles its members and the remaining players picked.
+        """
+        bound = 0
+        for side in ("blue", "red"):
+            left = TEAM_SIZE - len(teams[side][0])
+            on_role = min(
+                on_roles[side] + left,
+                bin(unions[side] | suffix_unions[index]).count("1"),
+            )
+            bound += TEAM_SIZE - on_role
+        return bound
+
+    def difference_bound(index, difference, heavy_left, light_left):
+        """Smallest possible final difference; light side gets the highest mmrs left"""
+        sums = suffix_sums[index]
+        highest = sums[light_left]
+        lowest = sums[-1] - sums[len(sums) - 1 - heavy_left]
+        return max(0, abs(difference) - (highest - lowest))
+
+    blue, red, bench = [], [], []
+    sides = [None] * number_of_players
+    teams = {"blue": (blue, red), "red": (red, blue)}
+    # Players on a role they picked, and roles picked, of each team so far.
+    on_roles = {"blue": 0, "red": 0}
+    unions = {"blue": 0, "red": 0}
+    # (-cost, sequence, blue, red, bench) of best assignments found; worst on top.
+    best = []
+    sequence = itertools.count()
+
+    def allowed(index, side):
+        for partner, same_team in partners[index]:
+            partner_side = sides[partner]
+            if partner_side is None:
+                continue
+            if same_team and partner_side != side:
+                return False
+            if not same_team and side != "bench" and partner_side == side:
+                return False
+        return True
+
+    def search(index, difference):
+        blue_left = TEAM_SIZE - len(blue)
+        red_left = TEAM_SIZE - len(red)
+        heavy_left, light_left = (
+            (blue_left, red_left) if difference >= 0 else (red_left, blue_left)
+        )
+        cost_bound = (
+            difference_bound(index, difference, heavy_left, light_left)
+            + off_role_bound(index) * OFF_ROLE_PENALTY
+        )
+        if len(best) == top_k and cost_bound >= -best[0][0]:
+            return
 
-    blue_team = []
-    red_team = []
+        if index == number_of_players:
+            entry = (-cost_bound, next(sequence), list(blue), list(red), list(bench))
+            if len(best) < top_k:
+                heapq.heappush(best, entry)
+            else:
+                heapq.heapreplace(best, entry)
+            return
 
-    # distirbute the sorted list into two different list
-    for index, summoner in enumerate(sorted_list_of_summoners):
-        if index % 2 == 0:
-            blue_team.append(summoner)
-        else:
-            red_team.append(summoner)
+        # Try the lighter team first to find good teams early; bench last.
+        options = ["red", "blue"] if difference > 0 else ["blue", "red"]
+        for side in options + ["bench"]:
+            if side == "bench":
+                if len(bench) == bench_size:
+                    continue
+            elif len(teams[side][0]) == TEAM_SIZE or (side == "red" and not blue):
+                # First player on a team is always blue; the mirror is the same teams.
+                continue
+            if not allowed(index, side):
+                continue
 
-    return blue_team, red_team
+            sides[index] = side
+            if side == "bench":
+                bench.append(index)
+                search(index + 1, difference)
+                bench.pop()
+            else:
+                team = teams[side][0]
+                saved = on_roles[side], unions[side]
+                team.append(index)
+                on_roles[side] = count_on_role(tuple(sorted(masks[i] for i in team)))
+                unions[side] |= masks[index]
+                sign = 1 if side == "blue" else -1
+                search(index + 1, difference + sign * mmrs[index])
+                team.pop()
+                on_roles[side], unions[side] = saved
+            sides[index] = None
+
+    search(0, 0)
+
+    assignments = []
+    for _, _, blue_index, red_index, bench_index in sorted(best, key=lambda e: (-e[0], e[1])):
+        # Each team is listed from the highest mmr.
+        blue_team = sorted((players[i] for i in blue_index), key=mmr, reverse=True)
+        red_team = sorted((players[i] for i in red_index), key=mmr, reverse=True)
+        # Roles nobody asked for would only be made up.
+        roles = (
+            {**assign_roles(blue_team), **assign_roles(red_team)} if uses_roles else {}
+        )
+        assignments.append(
+            TeamAssignment(
+                blue_team,
+                red_team,
+                [players[i] for i in bench_index],
+                abs(sum(mmrs[i] for i in blue_index) - sum(mmrs[i] for i in red_index)),
+                count_off_role([masks[i] for i in blue_index])
+                + count_off_role([masks[i] for i in red_index]),
+                roles,
+            )
+        )
+    return assignments
+
+
+def make_teams(
+    list_of_summoners: list,
+    alternative: int = 0,
+    mmr=estimate_mmr,
+    together=(),
+    apart=(),
+):
+    """Gets the list of summoners and returns makes two teams
+    Parameters:
+    list_of_summoners (list): list of summoners, earliest added first
+    alternative (int): 0 for the most balanced teams, 1 for the next best and so on
+    mmr (function): summoner -> mmr; 'estimate_mmr' by default
+    together (list): (puuid, puuid) pairs that must be on the same team
+    apart (list): (puuid, puuid) pairs that must not be on the same team
+
+    Returns:
+    teams (TeamAssignment): blue and red team with 5 members, and the bench
+
+    """
+    uses_roles = any(summoner.get("roles") for summoner in list_of_summoners)
+    if (
+        len(list_of_summoners) == 2 * TEAM_SIZE
+        and not uses_roles
+        and not together
+        and not apart
+    ):
+        # Plain 5v5; checking every split at once is fastest.
+        splits = balance_teams(list_of_summoners, top_k=alternative + 1, mmr=mmr)
+        split = splits[min(alternative, len(splits) - 1)]
+        return TeamAssignment(split.blue, split.red, [], split.difference, 0, {})
+
+    assignments = solve_teams(
+        list_of_summoners,
+        top_k=alternative + 1,
+        together=together,
+        apart=apart,
+        mmr=mmr,
+    )
+    if not assignments:
+        raise ValueError("No teams match the together/apart rules")
+    return assignments[min(alternative, len(assignments) - 1)]
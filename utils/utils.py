@@ -3,15 +3,18 @@ Utils
 """
 
 # OS
+import asyncio
 from os.path import dirname, join
 
-# Discord
-import discord
-
 from .constants import (
     TIER_RANK_MAP,
     UNCOMMON_TIERS,
     UNCOMMON_TIER_DISPLAY_MAP,
+    ROLES,
+    ROLE_ALIASES,
+    REGIONS,
+    REGION_ALIASES,
+    TYPING_INDICATOR_DELAY,
 )
 
 root_dirname = dirname(dirname(__file__))
@@ -28,6 +31,10 @@ def get_file_path(file_path):
 # pylint: disable=inconsistent-return-statements
 def create_embed(embed_object):
     """Helper function to create embed for discords"""
+    # discord is only needed by the bot; riot_api and db use the rest of utils.
+    # pylint: disable=import-outside-toplevel
+    import discord
+
     try:
         embed = discord.Embed(
             title=embed_object.title,
@@ -62,16 +69,117 @@ def create_embed(embed_object):
         print(e_values)
 
 
+class TypingIndicator:
+    """
+    Shows typing indicator in the channel of 'ctx' while the block runs,
+    but only once it has taken longer than 'delay' seconds.
+    Replies served from cache are sent without the indicator.
+    eg; async with TypingIndicator(ctx): await slow_work()
+    """
+
+    def __init__(self, ctx, delay=TYPING_INDICATOR_DELAY):
+        self.ctx = ctx
+        self.delay = delay
+        self._task = None
+
+    async def _show_typing(self):
+        await asyncio.sleep(self.delay)
+        async with self.ctx.typing():
+            # Keeps typing until cancelled in '__aexit__'.
+            await asyncio.Event().wait()
+
+    async def __aenter__(self):
+        self._task = asyncio.ensure_future(self._show_typing())
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        # pylint: disable=broad-except
+        except Exception as e_values:
+            # eg. no permission to type in the channel; the command's work is done.
+            print(f"Failed to show typing indicator: {e_values}")
+
+
 def normalize_name(string):
     """Normalize name by changing to lower case and removing whitespaces"""
     return string.lower().replace(" ", "")
 
 
-def create_team_string(team_members):
-    """Create red/blue team display string"""
+def parse_roles(message):
+    """Parse comma separated roles (eg. 'top, jg') into 'ROLES' names.
+    Raises ValueError with the unknown role."""
+    roles = []
+    for role in message.split(","):
+        role = ROLE_ALIASES.get(normalize_name(role), normalize_name(role))
+        if role not in ROLES:
+            raise ValueError(role)
+        if role not in roles:
+            roles.append(role)
+    return roles
+
+
+def parse_region(message):
+    """Parse a riot platform (eg. 'euw1') or its short name (eg. 'euw').
+    Raises ValueError with the unknown region."""
+    region = normalize_name(message)
+    region = REGION_ALIASES.get(region, region)
+    if region not in REGIONS:
+        raise ValueError(region)
+    return region
+
+
+def parse_shard_ids(message):
+    """Parse shard ids and ranges (eg. '0-3,8') into a sorted list of ids.
+    Raises ValueError for anything else."""
+    shard_ids = set()
+    for item in message.split(","):
+        first, _, last = item.strip().partition("-")
+        shard_ids.update(range(int(first), int(last or first) + 1))
+    return sorted(shard_ids)
+
+
+def parse_team_options(message):
+    """Parse options of 'teams' command
+    eg; '2; together name1, name2; apart name3, name4'
+    Parameters:
+    message (str): options separated by ';'
+
+    Returns:
+    alternative (int): which teams to show; 1 for the most balanced
+    together (list): (name, name) pairs that must be on the same team
+    apart (list): (name, name) pairs that must not be on the same team
+
+    """
+    alternative = 1
+    pairs = {"together": [], "apart": []}
+    for option in message.split(";"):
+        option = option.strip()
+        if not option:
+            continue
+        if option.isdigit():
+            alternative = int(option)
+            continue
+
+        keyword, _, names = option.partition(" ")
+        names = [name.strip() for name in names.split(",")]
+        if keyword.lower() not in pairs or len(names) != 2 or not all(names):
+            raise ValueError(option)
+        pairs[keyword.lower()].append(tuple(names))
+    return alternative, pairs["together"], pairs["apart"]
+
+
+def create_team_string(team_members, roles=None):
+    """Create red/blue team display string
+    'roles' (puuid -> role) adds each member's role in front of the name."""
     team_output_string = ""
     for member in team_members:
-        team_output_string += (
+        role = (roles or {}).get(member["puuid"])
+        team_output_string += "{0}{1}".format(
+            f"`{role.upper():<7}` " if role else "",
             "`{0}{1}` {2}\n".format(
                 member["tier_division"][0],
                 TIER_RANK_MAP.get(member["tier_rank"]),
@@ -82,6 +190,24 @@ def create_team_string(team_members):
             else "`{0}` {1}\n".format(
                 UNCOMMON_TIER_DISPLAY_MAP.get(member["tier_division"]),
                 member["summoner_name"],
-            )
+            ),
         )
     return team_output_string
+
+
+def create_match_team_string(participants, player_puuid=None):
+    """Create one team's display string of 'last_match'; the player is in bold"""
+    match_output_string = ""
+    for participant in participants:
+        line = "`{0}/{1}/{2}` {3} - {4} ({5:,} dmg)".format(
+            participant["kills"],
+            participant["deaths"],
+            participant["assists"],
+            participant["champion"],
+            participant["summoner_name"],
+            participant["damage"],
+        )
+        if participant["puuid"] == player_puuid:
+            line = f"**{line}**"
+        match_output_string += line + "\n"
+    return match_output_string